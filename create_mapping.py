@@ -1,7 +1,10 @@
 import json
 import os
+import sys
 import uuid
-import re
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from spec_structure import structure_text
 
 text_folder = "C:/Савелий Волкович/python/prog/Files/text_files"
 json_folder = "C:/Савелий Волкович/python/prog/Files/json"
@@ -16,54 +19,8 @@ for file_name in os.listdir(text_folder):
     if file_name.endswith(".txt"):
         file_path = os.path.join(text_folder, file_name)
         with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-
-            # Форматирование текста (заголовки в markdown)
-            formatted_content = content
-
-            # Главный заголовок
-            formatted_content = re.sub(r'^\s*Спецификация\s*$', r'# Спецификация', formatted_content, flags=re.MULTILINE)
-
-            # 1. Разделы верхнего уровня
-            formatted_content = re.sub(r'^\s*(Обзор|Коды ошибок|Приложение А[^\n]*)',
-                                       r'## \1', formatted_content, flags=re.MULTILINE)
-
-            # 1. Главы: Компонент / Интерфейс
-            formatted_content = re.sub(r'^\s*(Компонент\s+[^\n]+)', r'## \1', formatted_content, flags=re.MULTILINE)
-            formatted_content = re.sub(r'^\s*(Интерфейс\s+[^\n]+)', r'## \1', formatted_content, flags=re.MULTILINE)
-
-            # 1.1 Подглавы: Обзор
-            formatted_content = re.sub(r'^\s*(Введение|Примечание|Ссылки)\s*$', r'## \1', formatted_content,flags=re.MULTILINE)
-
-            # 1.1 Подглавы: описание интерфейсов
-            formatted_content = re.sub(r'^\s*([^\n]+ описание на ECO IDL)', r'### \1', formatted_content,
-                                       flags=re.MULTILINE)
-
-            # 1.1.1 Функции
-            formatted_content = re.sub(r'^\s*Функция\s+([^\n]+)', r'#### Функция \1', formatted_content,
-                                       flags=re.MULTILINE)
-
-            # Очистка лишних пустых строк
-            formatted_content = re.sub(r'\n{3,}', '\n\n', formatted_content)
-
-            content = formatted_content
-
-            # Извлекаем метаданные
-            title_match = re.search(r'Спецификация', content)
-            version_match = re.search(r'Версия:\s*([^\n\r]+)', content)
-            component_match = re.search(r'Компонент\s+([^\n\r]+)', content)
-            overview_match = re.search(r'Обзор\s*([\s\S]+?)(?=\n\S|\Z)', content)
-            author_match = re.search(r'Автор:\s*([^\n\r]+)', content)
-            date_match = re.search(r'Дата:\s*([^\n\r]+)', content)
-
-            metadata = {
-                "title": "Спецификация" if title_match else "",
-                "version": version_match.group(1).strip() if version_match else "",
-                "component": component_match.group(1).strip() if component_match else "",
-                "overview": overview_match.group(1).strip() if overview_match else "",
-                "author": author_match.group(1).strip() if author_match else "",
-                "date": date_match.group(1).strip() if date_match else ""
-            }
+            # Форматирование текста (заголовки в markdown) и метаданные за один проход
+            content, metadata, _ = structure_text(file.read())
 
             document = {
                 "id": str(uuid.uuid4()),
@@ -3,6 +3,7 @@ import torch
 import weaviate
 import json
 import os
+import time
 
 # Пути к папкам
 json_folder = "C:/Савелий Волкович/python/prog/Files/json"
@@ -45,15 +46,37 @@ if not any(c["class"] == "Document" for c in existing_schema.get("classes", []))
 else:
     print("ℹ️ Класс Document уже существует")
 
-def embed_and_store(text, metadata):
+# Пакетная загрузка вместо отдельного запроса на каждый документ
+BATCH_SIZE = 100
+NUM_WORKERS = 2
+failed_objects = []
+
+
+def check_batch_result(results):
+    # Собираем объекты, которые Weaviate не принял
+    for result in results or []:
+        errors = result.get("result", {}).get("errors")
+        if errors:
+            failed_objects.append(errors)
+
+
+client.batch.configure(
+    batch_size=BATCH_SIZE,
+    dynamic=True,
+    num_workers=NUM_WORKERS,
+    callback=check_batch_result
+)
+
+
+def embed_and_store(batch, text, metadata):
     # Векторизация текста
     inputs = tokenizer(text, return_tensors='pt', truncation=True, padding=True)
 
     with torch.no_grad():
         embeddings = model(**inputs).last_hidden_state.mean(dim=1).numpy()[0]
 
-    # Загрузка в Weaviate
-    client.data_object.create(
+    # Добавление в пакет Weaviate
+    batch.add_data_object(
         data_object={
             "content": text,
             "title": metadata.get("title"),
@@ -67,9 +90,17 @@ def embed_and_store(text, metadata):
 # Читаем JSON и загружаем документы
 with open(json_path, encoding='utf-8') as json_file:
     documents = json.load(json_file)
+
+start = time.perf_counter()
+with client.batch as batch:
     for doc in documents:
         text = doc["content"]
         metadata = doc["metadata"]
-        embed_and_store(text, metadata)
+        embed_and_store(batch, text, metadata)
+elapsed = time.perf_counter() - start
 
+print(f"Загружено {len(documents)} документов за {elapsed:.2f} с "
+      f"({len(documents) / elapsed if elapsed else 0:.1f} объектов/с)")
+if failed_objects:
+    print(f"❌ Ошибок при загрузке: {len(failed_objects)}")
 print("✅ Все документы загружены в Weaviate.")
\ No newline at end of file
@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import json
+import time
+from search_weaviate_v4 import RETURN_PROPERTIES, HYBRID_ALPHA, FUSIONS, result_to_dict, fuse_ranked
+from metrics import span, count, configure as configure_metrics
+
+METHODS = ("vector", "keyword", "hybrid")
+# Requests in flight at once over the shared connection
+MAX_IN_FLIGHT = 8
+# Seconds one query may take once it is sent
+QUERY_TIMEOUT = 10.0
+
+
+class AsyncSearch:
+    """
+    Concurrent search over one Weaviate async client connection (v4 API).
+
+    search_many() takes a whole list of queries (e.g. the reformulations of
+    one user question): their vectors are computed in one batched pass off
+    the event loop, at most max_in_flight requests run at once, each query is
+    cancelled after `timeout` seconds, and outcomes are yielded as soon as
+    each query completes. A failed or timed out query yields an outcome with
+    "error" and does not affect the others.
+
+        async with AsyncSearch() as search:
+            async for outcome in search.search_many(queries, method="hybrid"):
+                ...
+    """
+
+    def __init__(self, engine=None, max_in_flight=MAX_IN_FLIGHT, timeout=QUERY_TIMEOUT, collection_name=None):
+        self.engine = engine
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.collection_name = collection_name
+        self.client = None
+        self.collection = None
+
+    async def connect(self):
+        from weaviate_client import connect_async
+        from document_schema import COLLECTION_NAME
+
+        # Same host, ports, timeouts and retries as the shared sync client
+        self.client = await connect_async()
+        self.collection = self.client.collections.get(self.collection_name or COLLECTION_NAME)
+        return self
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+        if self.engine is not None and self.engine.cache is not None:
+            self.engine.cache.close()
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def search_many(self, queries, method="hybrid", limit=5, fusion="weaviate", alpha=HYBRID_ALPHA):
+        """
+        Async generator of outcomes in completion order: dicts with index (position
+        in queries), query, ms, and results (result dicts) or error
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown search method: {method}. Expected one of {METHODS}")
+        queries = list(queries)
+        vectors = [None] * len(queries)
+        if method != "keyword":
+            vectors = await asyncio.to_thread(self._embed, queries)
+
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        tasks = [asyncio.create_task(self._run(semaphore, i, query, vector, method, limit, fusion, alpha))
+                 for i, (query, vector) in enumerate(zip(queries, vectors))]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # The consumer stopped early: do not leave requests running
+            for task in tasks:
+                task.cancel()
+
+    async def search(self, query, method="hybrid", limit=5, fusion="weaviate", alpha=HYBRID_ALPHA):
+        """Outcome of a single query"""
+        outcomes = self.search_many([query], method, limit, fusion, alpha)
+        try:
+            return await outcomes.__anext__()
+        finally:
+            await outcomes.aclose()
+
+    def _embed(self, queries):
+        if self.engine is None:
+            # Imported here so keyword-only use never loads the embedding stack
+            from embedding_engine import EmbeddingEngine
+            from embedding_cache import EmbeddingCache
+            self.engine = EmbeddingEngine(cache=EmbeddingCache())
+        # A count, not a span label: one series per batch size would grow without bound
+        count("queries", len(queries))
+        with span("query_embed"):
+            return [vector.tolist() for vector in self.engine.embed(queries)]
+
+    async def _run(self, semaphore, index, query, vector, method, limit, fusion, alpha):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                with span("query", method=method, store="weaviate_async"):
+                    results = await asyncio.wait_for(self._query(query, vector, method, limit, fusion, alpha),
+                                                     self.timeout)
+                outcome = {"results": results}
+            except asyncio.TimeoutError:
+                count("errors", stage="query_timeout")
+                outcome = {"error": f"timed out after {self.timeout}s"}
+            except Exception as e:
+                count("errors", stage="query")
+                outcome = {"error": f"{type(e).__name__}: {e}"}
+        return {"index": index, "query": query, "ms": round((time.perf_counter() - start) * 1000, 2), **outcome}
+
+    async def _query(self, query, vector, method, limit, fusion, alpha):
+        from weaviate.classes.query import MetadataQuery
+
+        collection = self.collection
+        if method == "vector":
+            response = await collection.query.near_vector(
+                near_vector=vector, limit=limit,
+                return_metadata=MetadataQuery(distance=True), return_properties=RETURN_PROPERTIES)
+        elif method == "keyword":
+            response = await collection.query.bm25(
+                query=query, limit=limit,
+                return_metadata=MetadataQuery(score=True), return_properties=RETURN_PROPERTIES)
+        elif fusion == "rrf":
+            # Both legs at once on the same connection, fused on the client
+            vector_leg, keyword_leg = await asyncio.gather(
+                collection.query.near_vector(near_vector=vector, limit=limit * 4,
+                                             return_metadata=MetadataQuery(distance=True),
+                                             return_properties=RETURN_PROPERTIES),
+                collection.query.bm25(query=query, limit=limit * 4,
+                                      return_metadata=MetadataQuery(score=True),
+                                      return_properties=RETURN_PROPERTIES))
+            return fuse_ranked(vector_leg.objects, keyword_leg.objects, limit)
+        else:
+            response = await collection.query.hybrid(
+                query=query, vector=vector, alpha=alpha, limit=limit,
+                return_metadata=MetadataQuery(score=True), return_properties=RETURN_PROPERTIES)
+        return [result_to_dict(obj, rank) for rank, obj in enumerate(response.objects, 1)]
+
+
+def search_many(queries, method="hybrid", limit=5, fusion="weaviate", alpha=HYBRID_ALPHA,
+                max_in_flight=MAX_IN_FLIGHT, timeout=QUERY_TIMEOUT):
+    """Synchronous wrapper: all outcomes, in the order of the queries"""
+    async def run():
+        async with AsyncSearch(max_in_flight=max_in_flight, timeout=timeout) as search:
+            return [outcome async for outcome in search.search_many(queries, method, limit, fusion, alpha)]
+    return sorted(asyncio.run(run()), key=lambda outcome: outcome["index"])
+
+
+async def main(args):
+    start = time.perf_counter()
+    failed = 0
+    async with AsyncSearch(max_in_flight=args.concurrency, timeout=args.timeout) as search:
+        async for outcome in search.search_many(args.queries, args.method, args.limit, args.fusion, args.alpha):
+            failed += "error" in outcome
+            if args.json:
+                print(json.dumps(outcome, ensure_ascii=False))
+                continue
+            print(f"\n=== [{outcome['index'] + 1}] '{outcome['query']}' ({outcome['ms']} ms) ===")
+            if "error" in outcome:
+                print(f"❌ {outcome['error']}")
+            for item in outcome.get("results", []):
+                print(f"{item['rank']}. {item['component'] or '-'} | {item['section'] or item['title']}")
+    elapsed = time.perf_counter() - start
+    if not args.json:
+        print(f"\n{len(args.queries)} queries in {elapsed * 1000:.0f} ms (max {args.concurrency} in flight), "
+              f"{failed} failed")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run many queries concurrently over one async Weaviate connection, printing each as it completes")
+    parser.add_argument("queries", nargs="+", help="Query texts")
+    parser.add_argument("--method", choices=METHODS, default="hybrid", help="Search method (default: hybrid)")
+    parser.add_argument("--fusion", choices=FUSIONS, default="weaviate", help="Hybrid fusion (default: weaviate)")
+    parser.add_argument("--alpha", type=float, default=HYBRID_ALPHA,
+                        help=f"Weight of the vector leg in weaviate fusion (default: {HYBRID_ALPHA})")
+    parser.add_argument("--limit", type=int, default=5, help="Results per query (default: 5)")
+    parser.add_argument("--concurrency", type=int, default=MAX_IN_FLIGHT,
+                        help=f"Queries in flight at once (default: {MAX_IN_FLIGHT})")
+    parser.add_argument("--timeout", type=float, default=QUERY_TIMEOUT,
+                        help=f"Seconds per query before it is cancelled (default: {QUERY_TIMEOUT})")
+    parser.add_argument("--json", action="store_true", help="Print one JSON line per query")
+    parser.add_argument("--metrics", help="Record spans and counters to this file: *.prom for Prometheus text, "
+                                          "else JSON lines")
+    args = parser.parse_args()
+    if args.metrics:
+        configure_metrics(args.metrics)
+
+    if asyncio.run(main(args)):
+        raise SystemExit(1)
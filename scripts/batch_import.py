@@ -0,0 +1,87 @@
+import time
+from metrics import span, count
+
+BATCH_MODES = ("dynamic", "fixed")
+# Failures listed one by one (by object index) when they cannot be grouped by batch
+MAX_LISTED_FAILURES = 10
+
+
+class BatchReport:
+    """Outcome of one batch import run"""
+
+    def __init__(self, mode, batch_size):
+        self.mode = mode
+        self.batch_size = batch_size
+        self.sent = 0
+        self.elapsed = 0.0
+        self.failed = []  # weaviate ErrorObject entries
+        # Fixed mode only: failures grouped by index // batch_size, the fixed-size batch an object
+        # was added to; dynamic mode resizes its batches, so failures are listed by object index instead
+        self.failed_by_batch = {}
+
+    @property
+    def succeeded(self):
+        return self.sent - len(self.failed)
+
+    @property
+    def objects_per_sec(self):
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    def print_summary(self):
+        print(f"Batch import ({self.mode}): {self.succeeded}/{self.sent} objects "
+              f"in {self.elapsed:.2f}s ({self.objects_per_sec:.1f} objects/sec)")
+        if self.failed:
+            print(f"❌ Failed objects: {len(self.failed)}")
+            for batch_no, errors in sorted(self.failed_by_batch.items()):
+                print(f"  batch {batch_no}: {len(errors)} failed, first error: {errors[0].message}")
+            if not self.failed_by_batch:
+                for error in self.failed[:MAX_LISTED_FAILURES]:
+                    print(f"  object {getattr(error.object_, 'index', '?')}: {error.message}")
+                if len(self.failed) > MAX_LISTED_FAILURES:
+                    print(f"  ... and {len(self.failed) - MAX_LISTED_FAILURES} more")
+
+
+def batch_import(collection, objects, mode="dynamic", batch_size=100, concurrency=2, max_errors=None):
+    """
+    Import objects into a Weaviate collection through the v4 batch API (gRPC).
+
+    Args:
+        collection: Weaviate collection handle
+        objects: iterable of dicts with "properties", "vector" and optional "uuid"
+        mode: "dynamic" (server-driven batch size) or "fixed" (batch_size objects per request)
+        batch_size: objects per request in fixed mode, where failures are also grouped by batch
+        concurrency: concurrent requests in fixed mode (ignored in dynamic mode)
+        max_errors: stop adding objects once this many have failed (None = never stop)
+    """
+    if mode not in BATCH_MODES:
+        raise ValueError(f"Unknown batch mode: {mode}. Expected one of {BATCH_MODES}")
+
+    report = BatchReport(mode, batch_size)
+    if mode == "fixed":
+        batcher = collection.batch.fixed_size(batch_size=batch_size, concurrent_requests=concurrency)
+    else:
+        batcher = collection.batch.dynamic()
+
+    start = time.perf_counter()
+    # The span covers the network insert together with producing the objects (embedding) when they stream in
+    with span("insert", store="weaviate", mode=mode), batcher as batch:
+        for obj in objects:
+            batch.add_object(
+                properties=obj["properties"],
+                vector=obj.get("vector"),
+                uuid=obj.get("uuid")
+            )
+            report.sent += 1
+            if max_errors is not None and batch.number_errors > max_errors:
+                print(f"Too many batch errors ({batch.number_errors}), stopping import")
+                break
+    report.elapsed = time.perf_counter() - start
+
+    report.failed = list(collection.batch.failed_objects)
+    count("objects_inserted", report.succeeded, store="weaviate")
+    count("errors", len(report.failed), stage="insert")
+    if mode == "fixed":
+        for error in report.failed:
+            index = getattr(error.object_, "index", 0)
+            report.failed_by_batch.setdefault(index // batch_size + 1, []).append(error)
+    return report
@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+import numpy as np
+from synthetic_corpus import iter_specs, generate_queries, write_docx
+from convert_docx2text import iter_docx_blocks, write_blocks
+from map_text2json import map_text
+from chunking import chunk_document, chunk_object, count_words
+from vector_store import open_store, STORE_BACKENDS
+from embedding_engine import BACKENDS
+
+# Documents generated, mapped, chunked, embedded and inserted together; bounds memory for any corpus size
+DOCUMENT_BATCH = 256
+RESULTS_DIR = os.path.normpath("../Files/benchmarks")
+# Weaviate runs go to their own collection, never into Document
+BENCHMARK_COLLECTION = "DocumentBenchmark"
+# Vector size of the random embedder (all-MiniLM-L6-v2 has 384 dimensions)
+RANDOM_DIM = 384
+PERCENTILES = (50, 95, 99)
+
+
+class Stage:
+    """Timings of one benchmark stage: one sample per call, items processed by all calls"""
+
+    def __init__(self, name, unit):
+        self.name = name
+        self.unit = unit
+        self.samples = []
+        self.items = 0
+
+    def measure(self, func, *args, items=1):
+        start = time.perf_counter()
+        result = func(*args)
+        self.samples.append(time.perf_counter() - start)
+        self.items += items
+        return result
+
+    def result(self):
+        if not self.samples:
+            return None
+        seconds = sum(self.samples)
+        latencies = np.percentile(np.array(self.samples) * 1000, PERCENTILES)
+        result = {
+            "unit": self.unit,
+            "calls": len(self.samples),
+            "items": self.items,
+            "seconds": round(seconds, 4),
+            "throughput": round(self.items / seconds, 2) if seconds else None,
+        }
+        result.update({f"p{p}_ms": round(float(ms), 3) for p, ms in zip(PERCENTILES, latencies)})
+        return result
+
+
+def git_revision():
+    """Commit of the working tree plus whether it has local changes, or None outside git"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def random_embedder(seed):
+    """Unit vectors instead of the model, for measuring storage and search at corpus sizes the model cannot embed"""
+    rng = np.random.default_rng(seed)
+
+    def embed(texts):
+        vectors = rng.standard_normal((len(texts), RANDOM_DIM)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return embed
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def bench_convert(stage, sample, seed, work_dir):
+    """.docx -> .txt with the streaming parser on the first `sample` specifications"""
+    docx_dir = os.path.join(work_dir, "docx")
+    os.makedirs(docx_dir)
+    for file_name, text in iter_specs(sample, seed):
+        docx_path = os.path.join(docx_dir, file_name.replace(".txt", ".docx"))
+        write_docx(text, docx_path)
+        output_path = os.path.join(work_dir, file_name)
+        stage.measure(lambda: write_blocks(iter_docx_blocks(docx_path), output_path))
+
+
+def bench_ingest(stages, store, args, engine):
+    """Stream the corpus through map, chunk, tokenize, embed and insert, timing each stage per call"""
+    count_tokens = engine.count_tokens if engine else count_words
+    embed = (lambda texts: list(engine.embed(texts))) if engine else random_embedder(args.seed)
+    corpus = {"documents": 0, "chunks": 0, "text_bytes": 0}
+
+    for batch in batched(iter_specs(args.documents, args.seed), args.document_batch):
+        documents = []
+        for file_name, text in batch:
+            corpus["text_bytes"] += len(text.encode("utf-8"))
+            documents.append(stages["map"].measure(map_text, text, file_name))
+        chunks = []
+        for doc in documents:
+            doc_chunks = stages["chunk"].measure(chunk_document, doc["content"], count_tokens)
+            chunks.extend((doc, chunk) for chunk in doc_chunks)
+        texts = [chunk["text"] for _, chunk in chunks]
+        if engine:
+            stages["tokenize"].measure(engine.tokenize, texts, items=len(texts))
+        vectors = stages["embed"].measure(embed, texts, items=len(texts))
+        objects = [chunk_object(doc, chunk, vector.tolist()) for (doc, chunk), vector in zip(chunks, vectors)]
+        report = stages["insert"].measure(store.import_objects, objects, items=len(objects))
+        if report.failed:
+            raise RuntimeError(f"{len(report.failed)} objects were not inserted")
+        corpus["documents"] += len(documents)
+        corpus["chunks"] += len(chunks)
+        print(f"Ingested {corpus['documents']}/{args.documents} documents ({corpus['chunks']} chunks)")
+    return corpus
+
+
+def bench_queries(stages, store, args, engine):
+    """Vector, keyword and hybrid (RRF over both legs) latency for the query set"""
+    from search_weaviate_v4 import rrf_fuse, hybrid_items
+
+    queries = generate_queries(args.queries, args.documents, args.seed)
+    if engine:
+        vectors = [stages["query_embed"].measure(engine.embed_one, query) for query in queries]
+    else:
+        vectors = [vector.tolist() for vector in random_embedder(args.seed + 1)(queries)]
+
+    for query, vector in zip(queries, vectors):
+        stages["vector"].measure(store.vector_search, vector, args.limit)
+        stages["keyword"].measure(store.keyword_search, query, args.limit)
+        if store.name == "weaviate":
+            stages["hybrid"].measure(hybrid_items, store.collection, query, vector, args.limit)
+        else:
+            stages["hybrid"].measure(rrf_fuse, lambda n: store.vector_search(vector, n),
+                                     lambda n: store.keyword_search(query, n), args.limit)
+
+
+def print_table(results, baseline=None):
+    print(f"\n{'stage':<13}{'items':>10}{'throughput':>14}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          + ("  p95 vs baseline" if baseline else ""))
+    for name, result in results["stages"].items():
+        if result is None:
+            continue
+        line = (f"{name:<13}{result['items']:>10}{result['throughput'] or 0:>14.1f}"
+                f"{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}")
+        previous = (baseline or {}).get("stages", {}).get(name)
+        if previous and previous["p95_ms"]:
+            line += f"  {(result['p95_ms'] / previous['p95_ms'] - 1) * 100:+.1f}%"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark every stage (docx conversion, mapping, chunking, tokenization, embedding, insert, "
+                    "vector/keyword/hybrid queries) on a synthetic Eco specification corpus")
+    parser.add_argument("--documents", type=int, default=1000, help="Corpus size, 1k to 1M (default: 1000)")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per search method (default: 200)")
+    parser.add_argument("--limit", type=int, default=5, help="Results per query (default: 5)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus and query seed (default: 0)")
+    parser.add_argument("--docx-sample", type=int, default=100,
+                        help="Specifications converted from .docx; 0 skips the stage (default: 100)")
+    parser.add_argument("--embedder", choices=["model", "random"], default="model",
+                        help="model: tokenizer and embedding model; random: word counts and random unit vectors, "
+                             "for storage and search at sizes the model cannot embed (default: model)")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch", help="Inference backend (default: torch)")
+    parser.add_argument("--embed-batch-size", type=int, default=32, help="Texts per forward pass (default: 32)")
+    parser.add_argument("--store", choices=STORE_BACKENDS, default="local",
+                        help=f"local (temporary directory) or weaviate (collection {BENCHMARK_COLLECTION}, "
+                             f"dropped afterwards) (default: local)")
+    parser.add_argument("--document-batch", type=int, default=DOCUMENT_BATCH,
+                        help=f"Documents per ingest round (default: {DOCUMENT_BATCH})")
+    parser.add_argument("--output", help=f"Result file (default: {RESULTS_DIR}/<commit>_<documents>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare p95 latencies with")
+    args = parser.parse_args()
+
+    engine = None
+    if args.embedder == "model":
+        # No embedding cache: the model itself is measured
+        from embedding_engine import EmbeddingEngine
+        engine = EmbeddingEngine(batch_size=args.embed_batch_size, backend=args.backend)
+        engine.load()
+
+    stages = {name: Stage(name, unit) for name, unit in [
+        ("convert", "documents"), ("map", "documents"), ("chunk", "documents"), ("tokenize", "chunks"),
+        ("embed", "chunks"), ("insert", "chunks"), ("query_embed", "queries"), ("vector", "queries"),
+        ("keyword", "queries"), ("hybrid", "queries")]}
+
+    work_dir = tempfile.mkdtemp(prefix="benchmark_")
+    if args.store == "local":
+        store = open_store("local", store_dir=os.path.join(work_dir, "store"))
+    else:
+        store = open_store("weaviate", create=True, collection_name=BENCHMARK_COLLECTION)
+    try:
+        if args.docx_sample:
+            bench_convert(stages["convert"], min(args.docx_sample, args.documents), args.seed, work_dir)
+        start = time.perf_counter()
+        corpus = bench_ingest(stages, store, args, engine)
+        corpus["ingest_seconds"] = round(time.perf_counter() - start, 2)
+        bench_queries(stages, store, args, engine)
+    finally:
+        if args.store == "weaviate":
+            store.client.collections.delete(BENCHMARK_COLLECTION)
+        store.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        "run": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "options": vars(args),
+        },
+        "corpus": corpus,
+        "stages": {name: stage.result() for name, stage in stages.items()},
+    }
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        commit = (results["run"]["git"] or {}).get("commit", "nogit")
+        output = os.path.join(RESULTS_DIR, f"{commit}_{args.documents}.json")
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+    print_table(results, baseline)
+    print(f"\n✅ Results written to {output}")
@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# CLI entry points that must start without the ML stack. Importing the module
+# does not run its __main__ block, so this measures pure startup cost.
+ENTRY_POINTS = [
+    "search_weaviate_v4",
+    "search_weaviate_v4_simple",
+    "async_search",
+    "query_weaviate_v4",
+    "read_weaviate_v4",
+    "weaviate_v4_inspector",
+    "simple_weaviate_info",
+    "search_client",
+    "search_server",
+    "update_document_in_rag",
+    "run_pipeline",
+]
+
+# Modules that only the embedding code path may load
+HEAVY_MODULES = ["torch", "transformers", "onnxruntime"]
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"import_ms": elapsed * 1000, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+
+def measure(module, runs=3):
+    """Median import time and process wall time of an entry point, plus any heavy modules it pulled in"""
+    import_ms = []
+    wall_ms = []
+    heavy = []
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(runs):
+        code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", code], cwd=script_dir,
+                              capture_output=True, text=True)
+        wall = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0:
+            return {"module": module, "error": proc.stderr.strip().splitlines()[-1] if proc.stderr else "failed"}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        import_ms.append(result["import_ms"])
+        wall_ms.append(wall)
+        heavy = result["heavy"]
+    return {
+        "module": module,
+        "import_ms": round(statistics.median(import_ms), 1),
+        "wall_ms": round(statistics.median(wall_ms), 1),
+        "heavy": heavy,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the startup time of the search and inspection CLIs")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per entry point, the median is reported (default: 3)")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Fail when an entry point imports slower than this")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS, help="Entry points to check (default: all)")
+    args = parser.parse_args()
+
+    results = [measure(module, args.runs) for module in args.modules]
+    failures = []
+    for result in results:
+        if "error" in result:
+            failures.append(f"{result['module']}: import failed ({result['error']})")
+            continue
+        if result["heavy"]:
+            failures.append(f"{result['module']}: loads {', '.join(result['heavy'])} at import time")
+        if args.budget_ms is not None and result["import_ms"] > args.budget_ms:
+            failures.append(f"{result['module']}: import takes {result['import_ms']} ms (budget {args.budget_ms} ms)")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'entry point':<28}{'import ms':>12}{'wall ms':>12}  heavy modules")
+        for result in results:
+            if "error" in result:
+                print(f"{result['module']:<28}{'error':>12}")
+            else:
+                print(f"{result['module']:<28}{result['import_ms']:>12}{result['wall_ms']:>12}  "
+                      f"{', '.join(result['heavy']) or '-'}")
+
+    if failures:
+        print("\n❌ Startup check failed:")
+        for failure in failures:
+            print(f"- {failure}")
+        sys.exit(1)
+    print("\n✅ Startup check passed")
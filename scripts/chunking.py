@@ -0,0 +1,193 @@
+import hashlib
+import json
+import re
+from document_metadata import metadata_properties, chunk_uuid
+
+# Markdown headings produced by map_text2json.py (#, ##, ###, #### Функция)
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*\S)\s*$')
+
+MAX_TOKENS = 256
+OVERLAP_TOKENS = 32
+
+# Metadata that changes on every update without changing what a chunk says
+VOLATILE_METADATA = ("revision", "last_updated")
+
+
+def count_words(text):
+    """Cheap token estimate used when no tokenizer is supplied"""
+    return len(text.split())
+
+
+def split_sections(content):
+    """
+    Split markdown content on headings.
+
+    Returns a list of sections, each a dict with the heading line, its level,
+    the heading path from the document root and the body text under it.
+    Text before the first heading becomes a section with level 0.
+    """
+    sections = []
+    path = []
+    current = {"heading": "", "level": 0, "path": [], "lines": []}
+
+    for line in content.split('\n'):
+        match = HEADING_RE.match(line)
+        if match:
+            if current["heading"] or any(l.strip() for l in current["lines"]):
+                sections.append(current)
+            level = len(match.group(1))
+            title = match.group(2)
+            path = [p for p in path if p[0] < level] + [(level, title)]
+            current = {"heading": line.strip(), "level": level,
+                       "path": [p[1] for p in path], "lines": []}
+        else:
+            current["lines"].append(line)
+
+    if current["heading"] or any(l.strip() for l in current["lines"]):
+        sections.append(current)
+
+    for section in sections:
+        section["body"] = '\n'.join(section.pop("lines")).strip()
+    return sections
+
+
+def chunk_document(content, count_tokens=count_words, max_tokens=MAX_TOKENS, overlap=OVERLAP_TOKENS):
+    """
+    Split a document into heading-aligned chunks of at most max_tokens.
+
+    Each section becomes one chunk when it fits the budget; headings with no
+    body of their own are prepended to the next section. Longer sections are
+    sub-split on lines (and on words for single over-long lines); every
+    sub-chunk repeats the section heading and starts with the last `overlap`
+    tokens of the previous one.
+
+    Returns a list of dicts: chunk_index, section (heading path), part (index
+    among the chunks with the same section path) and text. Section and part
+    identify a chunk independently of edits elsewhere in the document.
+    """
+    chunks = []
+    pending = []
+    parts = {}
+
+    def emit(heading, body, path):
+        section = " / ".join(path)
+        for text in _split_section(heading, body, count_tokens, max_tokens, overlap):
+            part = parts.get(section, 0)
+            parts[section] = part + 1
+            chunks.append({"chunk_index": len(chunks), "section": section, "part": part, "text": text})
+
+    for section in split_sections(content):
+        # Headings without a body (e.g. "# Спецификация") are folded into the next section,
+        # unless enough of them pile up to fill a chunk on their own
+        if not section["body"]:
+            pending.append(section)
+            if count_tokens('\n'.join(p["heading"] for p in pending)) > max_tokens // 2:
+                emit("", '\n'.join(p["heading"] for p in pending), pending[0]["path"])
+                pending = []
+            continue
+        heading = '\n'.join([p["heading"] for p in pending] + [section["heading"]]).strip()
+        pending = []
+        emit(heading, section["body"], section["path"])
+    if pending:
+        emit("", '\n'.join(p["heading"] for p in pending), pending[0]["path"])
+    return chunks
+
+
+def chunk_hash(doc, chunk):
+    """
+    Hash of everything a chunk object stores except its position, revision and
+    timestamp: equal hashes mean the stored object and vector stay valid
+    """
+    metadata = {key: value for key, value in doc["metadata"].items() if key not in VOLATILE_METADATA}
+    payload = [chunk["text"], chunk["section"], doc["id"], metadata]
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def chunk_properties(doc, chunk):
+    """Weaviate properties of one chunk object, linked to its parent document by document_id"""
+    metadata = doc["metadata"]
+    return {
+        "content": chunk["text"],
+        "title": metadata.get("title", ""),
+        "metadata": json.dumps(metadata, ensure_ascii=False),  # ensure_ascii=False is good for Russian
+        "document_id": doc["id"],
+        "chunk_index": chunk["chunk_index"],
+        "section": chunk["section"],
+        "content_hash": chunk_hash(doc, chunk),
+        **metadata_properties(metadata)
+    }
+
+
+def chunk_id(doc, chunk):
+    """
+    UUID of a chunk object, derived from document_key, section path and part:
+    importing the document again overwrites it in place, and edits in other
+    sections do not move it
+    """
+    return chunk_uuid(metadata_properties(doc["metadata"])["document_key"], chunk["section"], chunk["part"])
+
+
+def chunk_object(doc, chunk, vector):
+    """Batch object of one chunk under its deterministic UUID"""
+    return {
+        "uuid": chunk_id(doc, chunk),
+        "properties": chunk_properties(doc, chunk),
+        "vector": vector
+    }
+
+
+def _split_section(heading, body, count_tokens, max_tokens, overlap):
+    full = f"{heading}\n{body}".strip()
+    if count_tokens(full) <= max_tokens:
+        return [full] if full else []
+
+    budget = max(max_tokens - count_tokens(heading), 1)
+    units = []
+    for line in body.split('\n'):
+        if not line.strip():
+            continue
+        if count_tokens(line) <= budget:
+            units.append(line)
+        else:
+            units.extend(_split_words(line, count_tokens, budget))
+
+    pieces = []
+    current = []
+    for unit in units:
+        candidate = current + [unit]
+        if current and count_tokens('\n'.join(candidate)) > budget:
+            pieces.append(current)
+            current = _tail(current, count_tokens, overlap, budget - count_tokens(unit)) + [unit]
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+
+    return [f"{heading}\n" + '\n'.join(piece) if heading else '\n'.join(piece) for piece in pieces]
+
+
+def _split_words(line, count_tokens, budget):
+    parts = []
+    current = []
+    for word in line.split():
+        if current and count_tokens(' '.join(current + [word])) > budget:
+            parts.append(' '.join(current))
+            current = []
+        current.append(word)
+    if current:
+        parts.append(' '.join(current))
+    return parts
+
+
+def _tail(units, count_tokens, overlap, room):
+    """Last words of the previous piece, used as overlap for the next one"""
+    limit = min(overlap, room)
+    if limit <= 0:
+        return []
+    words = '\n'.join(units).split()
+    tail = []
+    for word in reversed(words):
+        if count_tokens(' '.join([word] + tail)) > limit:
+            break
+        tail.insert(0, word)
+    return [' '.join(tail)] if tail else []
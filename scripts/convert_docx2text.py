@@ -1,33 +1,199 @@
+import argparse
 import os
-from docx import Document
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
-def docx_to_text(docx_path, text_folder):
-    # Проверяем, существует ли выходная папка, если нет — создаем
-    if not os.path.exists(text_folder):
-        os.makedirs(text_folder)
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+def iter_docx_blocks(docx_path):
+    """
+    Stream the text of word/document.xml in document order: one item per
+    paragraph and one per table row (cells separated by tabs). The XML is
+    parsed incrementally and processed body elements are dropped right away,
+    so memory stays flat regardless of document size. Paragraphs of a text
+    box come before the paragraph the box is anchored in.
+    """
+    with zipfile.ZipFile(docx_path) as archive:
+        with archive.open("word/document.xml") as xml_file:
+            body = None
+            depth = 0
+            body_depth = None
+            paragraphs = []  # stack of open paragraphs: a text box nests paragraphs inside a run
+            rows = []   # stack of open table rows (tables can be nested)
+            cells = []  # stack of open table cells
+            in_properties = 0  # inside <w:pPr>, whose <w:tab> elements are tab stops, not text
+            # Inside <mc:Fallback>: the same content as the preceding <mc:Choice> (e.g. a text box
+            # as VML for older readers), skipped so it is not extracted twice
+            in_fallback = 0
+            for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+                tag = elem.tag
+                if event == "start":
+                    depth += 1
+                    if tag == MC + "Fallback":
+                        in_fallback += 1
+                    elif in_fallback:
+                        pass
+                    elif tag == W + "body":
+                        body, body_depth = elem, depth
+                    elif tag == W + "p":
+                        paragraphs.append([])
+                    elif tag == W + "tr":
+                        rows.append([])
+                    elif tag == W + "tc":
+                        cells.append([])
+                    elif tag == W + "pPr":
+                        in_properties += 1
+                    continue
+
+                depth -= 1
+                if tag == MC + "Fallback":
+                    in_fallback -= 1
+                elif in_fallback:
+                    pass
+                elif tag == W + "t":
+                    if paragraphs:
+                        paragraphs[-1].append(elem.text or "")
+                elif tag == W + "pPr":
+                    in_properties -= 1
+                elif tag == W + "tab" and not in_properties:
+                    if paragraphs:
+                        paragraphs[-1].append("\t")
+                elif tag in (W + "br", W + "cr"):
+                    if paragraphs:
+                        paragraphs[-1].append("\n")
+                elif tag == W + "p":
+                    text = "".join(paragraphs.pop())
+                    if cells:
+                        cells[-1].append(text)
+                    else:
+                        yield text
+                elif tag == W + "tc":
+                    cell = " ".join(t for t in cells.pop() if t)
+                    if rows:
+                        rows[-1].append(cell)
+                elif tag == W + "tr":
+                    row = "\t".join(rows.pop())
+                    if cells:
+                        cells[-1].append(row)
+                    else:
+                        yield row
+
+                # A finished top-level body element is no longer needed
+                if body is not None and depth == body_depth:
+                    body.clear()
 
-    # Загружаем документ и извлекаем текст
+def iter_docx_blocks_fallback(docx_path):
+    """
+    python-docx based extraction, for files the streaming parser cannot read.
+    Yields the same blocks as iter_docx_blocks: body paragraphs and table rows
+    in document order (cells separated by tabs, nested table rows inside a cell).
+    """
+    from docx import Document
+    from docx.text.paragraph import Paragraph
     doc = Document(docx_path)
-    text = "\n".join([para.text for para in doc.paragraphs])
+
+    def blocks(parent):
+        for child in parent.iterchildren():
+            if child.tag == W + "p":
+                yield Paragraph(child, doc).text
+            elif child.tag == W + "tbl":
+                for row in child.iterchildren(W + "tr"):
+                    yield "\t".join(" ".join(text for text in blocks(cell) if text)
+                                     for cell in row.iterchildren(W + "tc"))
+
+    yield from blocks(doc.element.body)
+
+def docx_to_text(docx_path, text_folder):
+    # Проверяем, существует ли выходная папка, если нет — создаем
+    os.makedirs(text_folder, exist_ok=True)
 
     # Генерируем путь для сохранения .txt
     file_name = os.path.basename(docx_path).replace('.docx', '.txt')
     output_path = os.path.join(text_folder, file_name)
 
-    # Записываем текст в .txt файл
-    with open(output_path, 'w', encoding='utf-8') as text_file:
-        text_file.write(text)
+    # Потоково извлекаем текст (абзацы и строки таблиц) и сразу пишем в .txt файл
+    try:
+        write_blocks(iter_docx_blocks(docx_path), output_path)
+    except (KeyError, ET.ParseError, zipfile.BadZipFile) as e:
+        print(f"Потоковый разбор не удался ({e}), используем python-docx: {docx_path}")
+        write_blocks(iter_docx_blocks_fallback(docx_path), output_path)
 
     print(f"Файл сохранён: {output_path}")
+    return output_path
+
+def write_blocks(blocks, output_path):
+    with open(output_path, 'w', encoding='utf-8') as text_file:
+        for i, block in enumerate(blocks):
+            if i:
+                text_file.write("\n")
+            text_file.write(block)
+
+def convert_file(docx_path, text_folder):
+    """Convert one file and return (docx_path, output_path, error) instead of raising"""
+    try:
+        return docx_path, docx_to_text(docx_path, text_folder), None
+    except Exception as e:
+        return docx_path, None, f"{type(e).__name__}: {e}"
+
+def convert_all(docx_paths, text_folder, workers=1):
+    """
+    Convert .docx files, yielding (docx_path, output_path, error) as each one finishes.
+    With workers > 1 files are spread over a process pool; at most 4 files per
+    worker are in flight, so the queue stays bounded for any number of files.
+    A file that fails to convert is reported and does not stop the others.
+    """
+    if workers <= 1:
+        for docx_path in docx_paths:
+            yield convert_file(docx_path, text_folder)
+        return
+
+    max_in_flight = workers * 4
+    paths = iter(docx_paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+        for docx_path in paths:
+            in_flight.add(pool.submit(convert_file, docx_path, text_folder))
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
 
 # Путь к папке с .docx файлами
 docx_folder = os.path.normpath("../SourceDocs")
 text_folder = os.path.normpath("../Files/text_files")
 
-# Обход всех .docx файлов в папке
-for filename in os.listdir(docx_folder):
-    if filename.lower().endswith(".docx"):
-        file_path = os.path.join(docx_folder, filename)
-        docx_to_text(file_path, text_folder)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert .docx files from SourceDocs to .txt")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of conversion processes (default: 1)")
+    args = parser.parse_args()
+
+    # Обход всех .docx файлов в папке
+    docx_paths = [os.path.join(docx_folder, filename) for filename in sorted(os.listdir(docx_folder))
+                  if filename.lower().endswith(".docx")]
+    total_bytes = sum(os.path.getsize(path) for path in docx_paths)
+
+    start = time.perf_counter()
+    errors = []
+    converted = 0
+    for docx_path, output_path, error in convert_all(docx_paths, text_folder, args.workers):
+        if error:
+            errors.append((docx_path, error))
+            print(f"❌ Ошибка конвертации {docx_path}: {error}")
+        else:
+            converted += 1
+    elapsed = time.perf_counter() - start
 
-print(f"TXT-файлы сохранены в: {text_folder}")
\ No newline at end of file
+    print(f"TXT-файлы сохранены в: {text_folder}")
+    print(f"Сконвертировано {converted}/{len(docx_paths)} файлов за {elapsed:.2f} с "
+          f"({converted / elapsed if elapsed else 0:.1f} файлов/с, "
+          f"{total_bytes / 1024 / 1024 / elapsed if elapsed else 0:.1f} МБ/с, процессов: {args.workers})")
+    if errors:
+        print(f"Ошибок: {len(errors)}")
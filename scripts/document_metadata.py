@@ -0,0 +1,83 @@
+import re
+import uuid
+from datetime import datetime, timezone
+
+# Namespace of the UUIDv5 object IDs: the same document_key always maps to the same IDs
+DOCUMENT_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "search-document/Document")
+
+MONTHS = {
+    "январь": 1, "февраль": 2, "март": 3, "апрель": 4, "май": 5, "июнь": 6,
+    "июль": 7, "август": 8, "сентябрь": 9, "октябрь": 10, "ноябрь": 11, "декабрь": 12,
+    "января": 1, "февраля": 2, "марта": 3, "апреля": 4, "мая": 5, "июня": 6,
+    "июля": 7, "августа": 8, "сентября": 9, "октября": 10, "ноября": 11, "декабря": 12
+}
+MONTH_DATE_RE = re.compile(r'(\w+)\s+(\d{1,2}),?\s+(\d{4})')  # "Ноябрь 8, 2021"
+DAY_MONTH_RE = re.compile(r'(\d{1,2})\s+(\w+)\s+(\d{4})')     # "8 ноября 2021"
+
+
+def parse_date(value):
+    """RFC 3339 form of a specification date or timestamp, None if it cannot be read"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        value = str(value).strip()
+        parsed = None
+        for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                pass
+        if parsed is None:
+            try:
+                parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                pass
+        if parsed is None:
+            match = MONTH_DATE_RE.search(value)
+            if match and match.group(1).lower() in MONTHS:
+                parsed = datetime(int(match.group(3)), MONTHS[match.group(1).lower()], int(match.group(2)))
+            else:
+                match = DAY_MONTH_RE.search(value)
+                if match and match.group(2).lower() in MONTHS:
+                    parsed = datetime(int(match.group(3)), MONTHS[match.group(2).lower()], int(match.group(1)))
+        if parsed is None:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.isoformat()
+
+
+def document_key(metadata):
+    """Stable identifier of a specification, the same one update_document_weaviate.py used"""
+    return metadata.get("document_key") or f"{metadata.get('component', '')}_spec"
+
+
+def document_uuid(key):
+    """Deterministic parent document ID for a document_key"""
+    return str(uuid.uuid5(DOCUMENT_NAMESPACE, key))
+
+
+def chunk_uuid(key, section, part):
+    """Deterministic object ID of one chunk: writing the chunk again replaces the object"""
+    return str(uuid.uuid5(DOCUMENT_NAMESPACE, f"{key}#{section}#{part}"))
+
+
+def metadata_properties(metadata):
+    """Typed values of METADATA_PROPERTIES for one document's metadata; unknown values are left out"""
+    properties = {
+        "component": metadata.get("component", ""),
+        "version": metadata.get("version", ""),
+        "document_key": document_key(metadata)
+    }
+    try:
+        properties["revision"] = int(metadata["revision"])
+    except (KeyError, TypeError, ValueError):
+        pass
+    for name in ("last_updated", "date"):
+        value = parse_date(metadata.get(name))
+        if value is not None:
+            properties[name] = value
+    return properties
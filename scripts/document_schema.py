@@ -0,0 +1,82 @@
+from weaviate.classes.config import Property, DataType, Tokenization
+from weaviate.classes.query import Filter
+
+COLLECTION_NAME = "Document"
+
+# Metadata fields promoted to their own typed properties so lookups run as
+# server-side filters on the inverted index instead of json.loads over the
+# "metadata" blob (which is still stored for display)
+METADATA_PROPERTIES = [
+    # lowercase tokenization: one token per name, matched case-insensitively
+    Property(name="component", data_type=DataType.TEXT, tokenization=Tokenization.LOWERCASE,
+             index_filterable=True, description="Компонент"),
+    Property(name="version", data_type=DataType.TEXT, tokenization=Tokenization.FIELD,
+             index_filterable=True, description="Версия спецификации"),
+    Property(name="document_key", data_type=DataType.TEXT, tokenization=Tokenization.FIELD,
+             index_filterable=True, index_searchable=False, description="Стабильный ключ документа"),
+    Property(name="revision", data_type=DataType.INT,
+             index_filterable=True, index_range_filters=True, description="Номер ревизии документа"),
+    Property(name="last_updated", data_type=DataType.DATE,
+             index_filterable=True, index_range_filters=True, description="Время последнего обновления"),
+    Property(name="date", data_type=DataType.DATE,
+             index_filterable=True, index_range_filters=True, description="Дата спецификации")
+]
+
+DOCUMENT_PROPERTIES = [
+    Property(name="content", data_type=DataType.TEXT, description="Основной текст документа"),
+    Property(name="title", data_type=DataType.TEXT, description="Название документа"),
+    Property(name="metadata", data_type=DataType.TEXT, description="Метаданные документа в JSON"),
+    Property(name="document_id", data_type=DataType.TEXT, description="ID родительского документа"),
+    Property(name="chunk_index", data_type=DataType.INT, description="Номер фрагмента в документе"),
+    Property(name="section", data_type=DataType.TEXT, description="Путь заголовков раздела"),
+    Property(name="content_hash", data_type=DataType.TEXT, tokenization=Tokenization.FIELD,
+             index_searchable=False, description="Хэш содержимого фрагмента (для дельта-обновлений)")
+] + METADATA_PROPERTIES
+
+
+def ensure_document_collection(client, name=COLLECTION_NAME, vector_index=None):
+    """
+    Create the Document collection (or another collection with its schema,
+    e.g. for benchmarks) if it does not exist yet and return it, with the
+    vector_index settings (see vector_compression.vector_index_config) if given.
+    An existing collection gets the properties it is missing; objects stored
+    before that have no values for them until migrate_metadata.py runs.
+    Its vector index is left as it is: compression is chosen at creation.
+    """
+    if not client.collections.exists(name):
+        client.collections.create(
+            name,
+            description="Документы с контентом и метаданными",
+            properties=DOCUMENT_PROPERTIES,
+            vector_index_config=vector_index
+        )
+        print(f"✅ Класс {name} создан")
+        return client.collections.get(name)
+
+    print(f"ℹ️ Класс {name} уже существует")
+    if vector_index is not None and vector_index.quantizer is not None:
+        print(f"ℹ️ Сжатие векторов применяется только при создании класса, {name} остаётся как есть "
+              f"(удалите класс и загрузите документы заново)")
+    collection = client.collections.get(name)
+    existing = {prop.name for prop in collection.config.get().properties}
+    missing = [prop for prop in DOCUMENT_PROPERTIES if prop.name not in existing]
+    for prop in missing:
+        collection.config.add_property(prop)
+    if missing:
+        print(f"✅ Добавлены свойства: {', '.join(prop.name for prop in missing)} "
+              f"(для уже загруженных объектов запустите migrate_metadata.py)")
+    return collection
+
+
+def delete_stale_chunks(collection, key, chunk_ids):
+    """
+    Remove what an upsert of a document did not overwrite: every object of the
+    same document_key except its current chunks (chunk_ids), i.e. chunks of
+    removed sections and objects stored under random IDs before deterministic
+    UUIDs. A single filtered delete, nothing is read first.
+    """
+    stale = Filter.by_property("document_key").equal(key)
+    if chunk_ids:
+        # One ID clause for all kept chunks rather than one not-equal clause per chunk
+        stale = stale & Filter.by_id().contains_none([str(chunk_id) for chunk_id in chunk_ids])
+    return collection.data.delete_many(where=stale).successful
@@ -1,113 +1,151 @@
-from transformers import AutoTokenizer, AutoModel
-import torch
-import weaviate
-from weaviate.classes.config import Property, DataType
-import json
-import os
+import argparse
+import itertools
+from embedding_engine import EmbeddingEngine, BACKENDS
+from embedding_cache import EmbeddingCache
+from chunking import chunk_document, chunk_object, chunk_id, MAX_TOKENS, OVERLAP_TOKENS
+from batch_import import BATCH_MODES
+from vector_store import open_store, STORE_BACKENDS, DEFAULT_STORE_DIR
+from keyword_index import KeywordIndex, DEFAULT_INDEX_PATH
+from metrics import count, configure as configure_metrics
+from vector_compression import add_compression_arguments, vector_index_from_args
+from document_metadata import document_key
+from mapping_io import iter_documents, default_mapping_path
 
-# Пути к папкам
-json_folder = os.path.normpath("../Files/json")
-json_path = os.path.join(json_folder, "documentation_mapping.json")
+parser = argparse.ArgumentParser(description="Embed documentation_mapping and load it into Weaviate")
+parser.add_argument("--input", default=default_mapping_path(),
+                    help="Mapping file (.jsonl, .jsonl.zst or .json); '-' reads JSON Lines from stdin "
+                         "(default: %(default)s)")
+parser.add_argument("--batch-mode", choices=BATCH_MODES, default="dynamic",
+                    help="Weaviate batching: dynamic (server-driven) or fixed size (default: dynamic)")
+parser.add_argument("--batch-size", type=int, default=100, help="Objects per request in fixed mode (default: 100)")
+parser.add_argument("--concurrency", type=int, default=2,
+                    help="Concurrent requests in fixed mode, ignored in dynamic mode (default: 2)")
+parser.add_argument("--embed-batch-size", type=int, default=32, help="Texts per forward pass (default: 32)")
+parser.add_argument("--chunk-tokens", type=int, default=MAX_TOKENS,
+                    help=f"Token budget per section chunk (default: {MAX_TOKENS})")
+parser.add_argument("--chunk-overlap", type=int, default=OVERLAP_TOKENS,
+                    help=f"Tokens repeated between sub-split chunks (default: {OVERLAP_TOKENS})")
+parser.add_argument("--no-cache", action="store_true", help="Do not read or write the embedding cache")
+parser.add_argument("--store", choices=STORE_BACKENDS, default="weaviate",
+                    help="Where to store the chunks: weaviate (service from docker-compose.yml) or local "
+                         "(in-process memory-mapped store, no service needed) (default: weaviate)")
+parser.add_argument("--store-dir", default=DEFAULT_STORE_DIR, help="Directory of the local store (default: %(default)s)")
+parser.add_argument("--store-dtype", choices=["float32", "float16"], default="float32",
+                    help="Vector precision of a new local store (default: float32)")
+parser.add_argument("--hnsw", action="store_true", help="Build the optional HNSW graph of the local store (needs hnswlib)")
+parser.add_argument("--keyword-index", default=DEFAULT_INDEX_PATH,
+                    help="BM25 index for search_weaviate_v4_simple.py, built alongside Weaviate (default: %(default)s)")
+parser.add_argument("--no-keyword-index", action="store_true", help="Do not maintain the keyword index")
+parser.add_argument("--backend", choices=BACKENDS, default="torch",
+                    help="Inference backend: torch or onnx (ONNX Runtime on CPU) (default: torch)")
+parser.add_argument("--no-quantize", action="store_true", help="Run the fp32 ONNX model instead of int8")
+parser.add_argument("--threads", type=int, default=None, help="Intra-op CPU threads (default: all cores)")
+parser.add_argument("--metrics", help="Record spans and counters to this file: *.prom for Prometheus text, else JSON lines")
+add_compression_arguments(parser)
+args = parser.parse_args()
+if args.metrics:
+    configure_metrics(args.metrics)
 
-# Загрузка модели для векторизации
-tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
+# Загрузка модели для векторизации (батчами, см. embedding_engine.py)
+# Unchanged chunks are served from the on-disk cache instead of the model
+cache = None if args.no_cache else EmbeddingCache()
+engine = EmbeddingEngine(batch_size=args.embed_batch_size, cache=cache, backend=args.backend,
+                         quantize=not args.no_quantize, threads=args.threads)
 
 # Replace with a model better suited for Russian
-# tokenizer = AutoTokenizer.from_pretrained("DeepPavlov/rubert-base-cased")
-# model = AutoModel.from_pretrained("DeepPavlov/rubert-base-cased")
+# engine = EmbeddingEngine("DeepPavlov/rubert-base-cased", batch_size=args.embed_batch_size)
 
-# Connect to Weaviate
-client = weaviate.connect_to_local()
+# Connect to Weaviate (or open the local store)
+if args.store == "local":
+    store = open_store("local", store_dir=args.store_dir, dtype=args.store_dtype)
+else:
+    store = open_store("weaviate", create=True, vector_index=vector_index_from_args(args))
+    print(store.client.is_ready())  # Should print: `True`
+
+# The local store keeps its own keyword index, Weaviate chunks are indexed here as they are imported
+keywords = None
+if args.store == "weaviate" and not args.no_keyword_index:
+    keywords = KeywordIndex(args.keyword_index)
+
+# document_key -> chunk IDs of every imported document
+imported = {}
 
-print(client.is_ready())  # Should print: `True`
 
 # Define the function before it's called
-def embed_and_store(text, metadata):
-    # Tokenize with a higher max length for Russian text
-    inputs = tokenizer(text, return_tensors='pt', truncation=True, 
-                      padding=True, max_length=512)  # Increased max_length
-
-    with torch.no_grad():
-        # Get embeddings from the last hidden state
-        outputs = model(**inputs)
-        # Use mean pooling for sentence embeddings
-        embeddings = outputs.last_hidden_state.mean(dim=1).numpy()[0]
-
-    # Загрузка в Weaviate
-    docs = client.collections.get("Document")
-    docs.data.insert(
-        properties={
-            "content": text,
-            "title": metadata.get("title"),
-            "metadata": json.dumps(metadata, ensure_ascii=False)  # ensure_ascii=False is good for Russian
-        },
-        vector=embeddings.tolist()
-    )
+def iter_chunks(documents):
+    """Split every document into heading-aligned chunks linked to their parent document"""
+    for i, doc in enumerate(documents):
+        chunks = chunk_document(doc["content"], count_tokens=engine.count_tokens,
+                                max_tokens=args.chunk_tokens, overlap=args.chunk_overlap)
+        imported[document_key(doc["metadata"])] = [chunk_id(doc, chunk) for chunk in chunks]
+        count("documents")
+        count("chunks", len(chunks))
+        for chunk in chunks:
+            yield doc, chunk
+        print(f"Chunked document {i+1} ({len(chunks)} chunks)")
+
+
+def iter_objects(documents):
+    """Embed chunks batch by batch and yield Weaviate batch objects"""
+    chunks, texts = itertools.tee(iter_chunks(documents))
+    # One forward pass per batch instead of one per chunk
+    vectors = engine.embed(chunk["text"] for _, chunk in texts)
+    for (doc, chunk), embeddings in zip(chunks, vectors):
+        # Deterministic UUIDs: re-importing the corpus overwrites objects instead of duplicating them
+        yield chunk_object(doc, chunk, embeddings.tolist())
 
 
 try:
-    # Check if collection exists and create if needed
-    if not client.collections.exists("Document"):
-        # Create collection with properties
-        client.collections.create(
-            "Document",
-            description="Документы с контентом и метаданными",
-            # properties= [
-            #     {
-            #         "name": "content", 
-            #         "dataType": ["text"], 
-            #         "description": "Основной текст документа"
-            #     },
-            #     {
-            #         "name": "title", 
-            #         "dataType": ["text"], 
-            #         "description": "Название документа"
-            #     },
-            #     {
-            #         "name": "metadata", 
-            #         "dataType": ["text"], 
-            #         "description": "Метаданные документа в JSON"
-            #     }
-            # ]
-            # the below lines not yet work in python 3.13
-            properties=[
-                Property(name="content", data_type=DataType.TEXT, description="Основной текст документа"),
-                Property(name="title", data_type=DataType.TEXT, description="Название документа"),
-                Property(name="metadata", data_type=DataType.TEXT, description="Метаданные документа в JSON")
-            ]
-        )
-        print("✅ Класс Document создан")
-    else:
-        print("ℹ️ Класс Document уже существует")
-    
-    # Читаем JSON и загружаем документы
+    # Читаем документы потоково и загружаем их по мере векторизации
     try:
-        with open(json_path, encoding='utf-8') as json_file:
-            documents = json.load(json_file)
-            total = len(documents)
-            for i, doc in enumerate(documents):
-                try:
-                    text = doc["content"]
-                    metadata = doc["metadata"]
-                    embed_and_store(text, metadata)
-                    print(f"Processed {i+1}/{total} documents")
-                except Exception as e:
-                    print(f"Error processing document {i}: {e}")
+        objects = iter_objects(iter_documents(args.input))
+        if keywords is not None:
+            objects = keywords.indexing(objects)
+        report = store.import_objects(
+            objects,
+            mode=args.batch_mode,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency
+        )
+        report.print_summary()
+        count("objects_failed", len(report.failed))
+        if keywords is not None:
+            # Objects are indexed as they stream into the import; the ones Weaviate rejected must not stay searchable
+            keywords.delete_objects(error.object_.uuid for error in report.failed)
+
+        # Chunks left over from longer previous versions of the documents
+        failed_keys = {error.object_.properties.get("document_key") for error in report.failed}
+        stale = sum(store.delete_stale_chunks(key, chunk_ids)
+                    for key, chunk_ids in imported.items() if key not in failed_keys)
+        if keywords is not None:
+            for key, chunk_ids in imported.items():
+                if key not in failed_keys:
+                    keywords.delete_stale_chunks(key, chunk_ids)
+        if stale:
+            print(f"Deleted {stale} stale objects")
+        if args.hnsw and args.store == "local":
+            print(f"HNSW graph built over {store.build_hnsw()} vectors")
     except Exception as e:
-        print(f"Error loading JSON file: {e}")
+        count("errors", stage="ingest")
+        print(f"Error importing documents: {e}")
+    if cache is not None:
+        cache.print_stats()
 
 finally:
-    client.close()  # Ensure the connection is closed
+    store.close()  # Ensure the connection is closed
+    if keywords is not None:
+        keywords.close()
 
-print("✅ Все документы загружены в Weaviate.")
+print("✅ Все документы загружены в Weaviate." if args.store == "weaviate" else f"✅ Все документы загружены в {args.store_dir}.")
 
 def print_schema():
     """
     Print the schema of the Weaviate instance using v4 API
     """
+    from weaviate_client import get_client
+
     # Connect to Weaviate
-    client = weaviate.connect_to_local()
+    client = get_client()
     
     try:
         # Get all collections
@@ -147,8 +185,6 @@ def print_schema():
     
     except Exception as e:
         print(f"Error retrieving schema: {e}")
-    finally:
-        client.close()
 
 # Uncomment the line below to print the schema after loading documents
 # print_schema()
\ No newline at end of file
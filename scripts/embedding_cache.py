@@ -0,0 +1,153 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.normpath("../Files/embedding_cache")
+MAX_ENTRIES = 500_000
+# Share of the cache freed at once when it is full, so eviction is not run on every insert
+EVICT_FRACTION = 0.05
+INITIAL_ROWS = 1024
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Unicode NFC and collapsed whitespace: variants that tokenize identically share one entry"""
+    return _WHITESPACE_RE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed on-disk cache of embedding vectors.
+
+    Vectors live in one memory-mapped matrix (vectors.bin, float32 or float16);
+    index.sqlite maps the key of every entry to its row and last use time.
+    When max_entries is reached the least recently used rows are reused.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, dtype="float32", max_entries=MAX_ENTRIES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors_path = os.path.join(cache_dir, "vectors.bin")
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False)
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, row INTEGER, last_used REAL);
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+            CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY);
+        ''')
+        meta = dict(self._db.execute("SELECT name, value FROM meta"))
+        # An existing cache keeps the dtype it was created with
+        self.dtype = np.dtype(meta.get("dtype", dtype))
+        self.dim = int(meta["dim"]) if "dim" in meta else None
+        self._capacity = int(meta.get("capacity", 0))
+        self._next_row = int(meta.get("next_row", 0))
+        self._vectors = None
+        if self.dim:
+            self._open_vectors()
+
+    @staticmethod
+    def key(model_name, revision, pooling, text):
+        """Cache key of a text for one model revision and pooling strategy"""
+        payload = "\0".join([model_name, revision or "", pooling, normalize_text(text)])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """Return {key: float32 vector} for the keys present in the cache"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._db.execute(
+                    f"SELECT key, row FROM entries WHERE key IN ({placeholders})", part).fetchall()
+                for key, row in rows:
+                    found[key] = np.array(self._vectors[row], dtype=np.float32)
+            if found:
+                now = time.time()
+                self._db.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                                     [(now, key) for key in found])
+                self._db.commit()
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store (key, vector) pairs"""
+        items = list(items)
+        if not items:
+            return
+        with self._lock:
+            if self.dim is None:
+                self.dim = len(items[0][1])
+                self._db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                                     [("dim", str(self.dim)), ("dtype", self.dtype.name)])
+                self._grow(INITIAL_ROWS)
+
+            now = time.time()
+            for key, vector in items:
+                existing = self._db.execute("SELECT row FROM entries WHERE key = ?", (key,)).fetchone()
+                row = existing[0] if existing else self._allocate_row()
+                self._vectors[row] = np.asarray(vector, dtype=self.dtype)
+                self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, row, now))
+            self._vectors.flush()
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('next_row', ?)", (str(self._next_row),))
+            self._db.commit()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def print_stats(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        print(f"Embedding cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), "
+              f"{len(self)} entries in {self.cache_dir}")
+
+    def close(self):
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._db.close()
+
+    def _allocate_row(self):
+        free = self._db.execute("SELECT row FROM free_rows LIMIT 1").fetchone()
+        if free is None and self._next_row >= self.max_entries:
+            self._evict(max(1, int(self.max_entries * EVICT_FRACTION)))
+            free = self._db.execute("SELECT row FROM free_rows LIMIT 1").fetchone()
+        if free is not None:
+            self._db.execute("DELETE FROM free_rows WHERE row = ?", free)
+            return free[0]
+        if self._next_row >= self._capacity:
+            self._grow(min(max(self._capacity * 2, INITIAL_ROWS), self.max_entries))
+        row = self._next_row
+        self._next_row += 1
+        return row
+
+    def _evict(self, count):
+        """Free the rows of the least recently used entries"""
+        victims = self._db.execute(
+            "SELECT key, row FROM entries ORDER BY last_used LIMIT ?", (count,)).fetchall()
+        self._db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in victims])
+        self._db.executemany("INSERT OR IGNORE INTO free_rows VALUES (?)", [(row,) for _, row in victims])
+
+    def _grow(self, capacity):
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self._vectors_path, 'ab') as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        self._capacity = capacity
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('capacity', ?)", (str(capacity),))
+        self._open_vectors()
+
+    def _open_vectors(self):
+        self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode='r+',
+                                  shape=(self._capacity, self.dim))
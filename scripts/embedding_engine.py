@@ -0,0 +1,164 @@
+# torch and transformers are imported on first use, so importing this module
+# (e.g. from a keyword-only search CLI) stays cheap
+from metrics import span, count
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+MODEL_REVISION = "main"
+POOLING = "mean"
+MAX_LENGTH = 512
+BATCH_SIZE = 32
+# How many batches are read ahead and sorted by length together
+BUCKET_BATCHES = 16
+BACKENDS = ("torch", "onnx")
+
+
+class EmbeddingEngine:
+    """
+    Batched sentence embedder: texts are grouped into length-sorted buckets,
+    encoded with one forward pass per batch and mean pooled over the attention
+    mask. Vectors are yielded in the original order of the input texts.
+
+    With an EmbeddingCache, texts embedded before are served from the cache and
+    the model is only loaded once a text misses it.
+
+    backend="onnx" runs an ONNX export of the same model on ONNX Runtime (int8
+    weights unless quantize=False) with the same pooling and output contract.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, batch_size=BATCH_SIZE, max_length=MAX_LENGTH,
+                 revision=MODEL_REVISION, cache=None, backend="torch", quantize=True, threads=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {backend}. Expected one of {BACKENDS}")
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.revision = revision
+        self.cache = cache
+        self.backend = backend
+        self.quantize = quantize
+        self.threads = threads
+        self._tokenizer = None
+        self._model = None
+
+    @property
+    def variant(self):
+        """Model revision plus backend, so vectors of different backends never share cache entries"""
+        if self.backend == "onnx":
+            return f"{self.revision}+onnx" + ("-int8" if self.quantize else "")
+        return self.revision
+
+    def load(self):
+        """Load tokenizer and model once, on first use"""
+        if self._model is None:
+            self._load_tokenizer()
+            with span("model_load", backend=self.backend):
+                if self.backend == "onnx":
+                    from onnx_backend import export_onnx, OnnxEncoder
+                    self._model = OnnxEncoder(export_onnx(self.model_name, self.revision, self.quantize),
+                                              self.threads)
+                else:
+                    from transformers import AutoModel
+                    self._model = AutoModel.from_pretrained(self.model_name, revision=self.revision)
+                    self._model.eval()
+                    if self.threads:
+                        import torch
+                        torch.set_num_threads(self.threads)
+        return self
+
+    def _load_tokenizer(self):
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_name, revision=self.revision)
+        return self._tokenizer
+
+    def embed(self, texts):
+        """
+        Embed an iterable of texts, yielding one float32 numpy vector per text
+        in input order. The iterable is consumed in windows, so arbitrarily
+        long streams are embedded with bounded memory.
+        """
+        window = []
+        window_size = self.batch_size * BUCKET_BATCHES
+        for text in texts:
+            window.append(text)
+            if len(window) >= window_size:
+                yield from self._embed_window(window)
+                window = []
+        if window:
+            yield from self._embed_window(window)
+
+    def embed_one(self, text):
+        """Embed a single text and return it as a plain list (Weaviate-ready)"""
+        return next(iter(self.embed([text]))).tolist()
+
+    def count_tokens(self, text):
+        """Number of model tokens in text, without special tokens"""
+        return len(self._load_tokenizer()(text, add_special_tokens=False)["input_ids"])
+
+    def tokenize(self, texts):
+        """Tokenizer output for a list of texts as the model sees them (truncated, not padded)"""
+        return self._load_tokenizer()(texts, truncation=True, max_length=self.max_length)
+
+    def _embed_window(self, texts):
+        vectors = [None] * len(texts)
+        missing = list(range(len(texts)))
+        if self.cache is not None:
+            keys = [self.cache.key(self.model_name, self.variant, POOLING, text) for text in texts]
+            found = self.cache.get_many(keys)
+            for i, key in enumerate(keys):
+                vectors[i] = found.get(key)
+            missing = [i for i in missing if vectors[i] is None]
+            count("embedding_cache_hits", len(texts) - len(missing))
+        if not missing:
+            return vectors
+
+        self.load()
+        computed = self._encode([texts[i] for i in missing])
+        for i, vector in zip(missing, computed):
+            vectors[i] = vector
+        if self.cache is not None:
+            self.cache.put_many((keys[i], vectors[i]) for i in missing)
+        return vectors
+
+    def _encode(self, texts):
+        # Tokenize once without padding so the real lengths are known
+        with span("tokenize"):
+            encoded = self.tokenize(texts)
+        input_ids = encoded["input_ids"]
+        count("texts_embedded", len(texts))
+        count("tokens", sum(len(ids) for ids in input_ids))
+        # Texts cut at max_length lose their tail from the vector
+        count("truncations", sum(1 for ids in input_ids if len(ids) >= self.max_length))
+        order = sorted(range(len(texts)), key=lambda i: len(input_ids[i]))
+
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch_idx = order[start:start + self.batch_size]
+            features = {key: [encoded[key][i] for i in batch_idx] for key in encoded.keys()}
+            batch = self._tokenizer.pad(features, padding=True,
+                                        return_tensors='np' if self.backend == "onnx" else 'pt')
+            for i, vector in zip(batch_idx, self._forward(batch)):
+                vectors[i] = vector
+        return vectors
+
+    def _forward(self, batch):
+        if self.backend == "onnx":
+            from onnx_backend import mean_pool_np
+            with span("forward", backend="onnx"):
+                hidden = self._model(batch)
+            with span("pool"):
+                return mean_pool_np(hidden, batch["attention_mask"])
+
+        import torch
+        with torch.no_grad(), span("forward", backend="torch"):
+            outputs = self._model(**batch)
+        with span("pool"):
+            return mean_pool(outputs.last_hidden_state, batch["attention_mask"]).numpy()
+
+
+def mean_pool(last_hidden_state, attention_mask):
+    """Mean of token embeddings, ignoring padding positions"""
+    mask = attention_mask.unsqueeze(-1).to(last_hidden_state.dtype)
+    summed = (last_hidden_state * mask).sum(dim=1)
+    counts = mask.sum(dim=1).clamp(min=1e-9)
+    return summed / counts
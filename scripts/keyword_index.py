@@ -0,0 +1,208 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from vector_store import SearchHit
+
+DEFAULT_INDEX_PATH = os.path.normpath("../Files/keyword_index.sqlite")
+# Okapi BM25 parameters, the same defaults Weaviate uses
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Properties kept with every indexed chunk, enough to print a result without Weaviate
+STORED_PROPERTIES = ["title", "content", "metadata", "section", "document_id", "document_key", "component", "version"]
+
+WORD_RE = re.compile(r'\w+')
+# Parts of identifiers such as IEcoDateTime1 -> Eco, Date, Time
+CAMEL_RE = re.compile(r'[A-ZА-ЯЁ]?[a-zа-яё]+|[A-ZА-ЯЁ]+(?![a-zа-яё])|\d+')
+
+
+def tokenize(text):
+    """Lowercased words; identifiers also yield their camel-case parts of two or more characters"""
+    tokens = []
+    for word in WORD_RE.findall(text):
+        lower = word.lower()
+        tokens.append(lower)
+        # Plain words ("функция", "Returns", "UTF") have no parts, skip the second regex for them
+        if word.isalpha() and (word[1:] == lower[1:] or word.isupper()):
+            continue
+        parts = CAMEL_RE.findall(word)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts if len(part) > 1)
+    return tokens
+
+
+def _document_tokens(properties):
+    return tokenize(f"{properties.get('title') or ''}\n{properties.get('content') or ''}")
+
+
+class KeywordIndex:
+    """
+    Persistent inverted index with BM25 scoring.
+
+    postings holds (term, doc, tf, doc_length) with (term, doc) as the primary
+    key of a WITHOUT ROWID table, so the postings of a term are one B-tree range
+    read; a query only touches the posting lists of its own terms. docs maps
+    the internal doc number to the chunk UUID and its stored properties.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript('''
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            PRAGMA cache_size = -131072;
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER);
+            CREATE TABLE IF NOT EXISTS docs (doc INTEGER PRIMARY KEY, uuid TEXT UNIQUE, document_id TEXT,
+                                             document_key TEXT, length INTEGER, properties TEXT);
+            CREATE INDEX IF NOT EXISTS docs_document_key ON docs (document_key);
+            CREATE INDEX IF NOT EXISTS docs_document_id ON docs (document_id);
+            CREATE TABLE IF NOT EXISTS postings (term TEXT, doc INTEGER, tf INTEGER, doc_length INTEGER,
+                                                 PRIMARY KEY (term, doc)) WITHOUT ROWID;
+        ''')
+        meta = dict(self._db.execute("SELECT name, value FROM meta"))
+        self._doc_count = meta.get("doc_count", 0)
+        self._total_length = meta.get("total_length", 0)
+
+    def __len__(self):
+        return self._doc_count
+
+    def add_objects(self, objects):
+        """Index (or re-index) chunk objects: dicts with "uuid" and "properties"""
+        # The last object wins when a batch holds one uuid twice: the postings are written only
+        # after the loop, so a docs row replaced within the batch would leave orphaned postings
+        objects = {str(obj["uuid"]): obj for obj in objects}.values()
+        with self._lock:
+            postings = []
+            for obj in objects:
+                properties = obj["properties"]
+                uuid = str(obj["uuid"])
+                self._remove(self._db.execute("SELECT doc, properties FROM docs WHERE uuid = ?", (uuid,)).fetchall())
+                tokens = _document_tokens(properties)
+                stored = {name: properties.get(name) for name in STORED_PROPERTIES}
+                doc = self._db.execute(
+                    "INSERT INTO docs (uuid, document_id, document_key, length, properties) VALUES (?, ?, ?, ?, ?)",
+                    (uuid, properties.get("document_id"), properties.get("document_key"), len(tokens),
+                     json.dumps(stored, ensure_ascii=False))).lastrowid
+                length = len(tokens)
+                postings.extend([(term, doc, tf, length) for term, tf in Counter(tokens).items()])
+                self._doc_count += 1
+                self._total_length += len(tokens)
+            # Inserting in key order keeps the B-tree writes sequential
+            postings.sort()
+            self._db.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", postings)
+            self._commit()
+
+    def indexing(self, objects, batch_size=500):
+        """Pass objects through unchanged while indexing them in batches (for ingest pipelines)"""
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            yield obj
+            if len(batch) >= batch_size:
+                self.add_objects(batch)
+                batch = []
+        if batch:
+            self.add_objects(batch)
+
+    def delete_stale_chunks(self, key, chunk_ids):
+        """Remove chunks of document_key `key` that are not in chunk_ids; returns the number removed"""
+        keep = set(str(chunk_id) for chunk_id in chunk_ids)
+        with self._lock:
+            rows = self._db.execute("SELECT doc, uuid, properties FROM docs WHERE document_key = ?",
+                                    (key,)).fetchall()
+            stale = [(doc, properties) for doc, uuid, properties in rows if uuid not in keep]
+            self._remove(stale)
+            self._commit()
+        return len(stale)
+
+    def delete_objects(self, uuids):
+        """Remove chunks by UUID, e.g. objects indexed on the way to an import that then failed"""
+        with self._lock:
+            rows = []
+            for uuid in set(str(uuid) for uuid in uuids):
+                rows.extend(self._db.execute("SELECT doc, properties FROM docs WHERE uuid = ?", (uuid,)).fetchall())
+            self._remove(rows)
+            self._commit()
+        return len(rows)
+
+    def delete_document(self, document_id):
+        """Remove all chunks of a parent document"""
+        with self._lock:
+            self._remove(self._db.execute("SELECT doc, properties FROM docs WHERE document_id = ?",
+                                          (document_id,)).fetchall())
+            self._commit()
+
+    def clear(self):
+        """Drop every indexed chunk (before a rebuild)"""
+        with self._lock:
+            self._db.execute("DELETE FROM postings")
+            self._db.execute("DELETE FROM docs")
+            self._doc_count = 0
+            self._total_length = 0
+            self._commit()
+
+    def search(self, query, limit=5):
+        """
+        BM25 top-k for a query. Returns SearchHit objects (score set) with the
+        matched query terms in hit.matched_terms.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        scores = {}
+        matched = {}
+        with self._lock:
+            # The counts change together with the postings, so they are read under the same lock
+            if not terms or not self._doc_count:
+                return []
+            avg_length = self._total_length / self._doc_count
+            for term in terms:
+                postings = self._db.execute(
+                    "SELECT doc, tf, doc_length FROM postings WHERE term = ?", (term,)).fetchall()
+                if not postings:
+                    continue
+                idf = math.log(1 + (self._doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc, tf, length in postings:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    matched.setdefault(doc, []).append(term)
+
+            top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            hits = []
+            for doc, score in top:
+                uuid, properties = self._db.execute(
+                    "SELECT uuid, properties FROM docs WHERE doc = ?", (doc,)).fetchone()
+                hit = SearchHit(uuid, json.loads(properties), score=round(score, 6))
+                hit.matched_terms = matched[doc]
+                hits.append(hit)
+        return hits
+
+    def close(self):
+        self._db.close()
+
+    def _remove(self, docs):
+        """Drop (doc, stored properties) rows; their terms are recomputed to delete postings by primary key"""
+        for doc, properties in docs:
+            tokens = _document_tokens(json.loads(properties))
+            self._db.executemany("DELETE FROM postings WHERE term = ? AND doc = ?",
+                                 [(term, doc) for term in set(tokens)])
+            self._db.execute("DELETE FROM docs WHERE doc = ?", (doc,))
+            self._doc_count -= 1
+            self._total_length -= len(tokens)
+
+    def _commit(self):
+        self._db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                             [("doc_count", self._doc_count), ("total_length", self._total_length)])
+        self._db.commit()
+
+
+def open_existing_index(path=DEFAULT_INDEX_PATH):
+    """
+    The index at path if it has been built, else None. Incremental updates only
+    maintain an existing index: one started by them would miss the rest of the corpus.
+    """
+    return KeywordIndex(path) if os.path.exists(path) else None
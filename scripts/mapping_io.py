@@ -0,0 +1,117 @@
+import io
+import json
+import os
+import sys
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for .zst files
+    zstandard = None
+
+json_folder = os.path.normpath("../Files/json")
+base_filename = "documentation_mapping"
+
+
+def default_mapping_path():
+    """documentation_mapping.jsonl[.zst] if present, else the legacy documentation_mapping.json"""
+    for extension in (".jsonl", ".jsonl.zst", ".json"):
+        path = os.path.join(json_folder, base_filename + extension)
+        if os.path.exists(path):
+            return path
+    return os.path.join(json_folder, base_filename + ".jsonl")
+
+
+def _require_zstandard(path):
+    if zstandard is None:
+        raise RuntimeError(f"{path}: reading/writing .zst files needs the 'zstandard' package (pip install zstandard)")
+
+
+def iter_documents(path):
+    """
+    Stream documents from a mapping file, one at a time.
+
+    .jsonl / .jsonl.zst files (and "-" for stdin) are read line by line, so
+    memory does not depend on the corpus size. A legacy .json array (or a
+    single document object) is loaded as a whole.
+    """
+    if path == "-":
+        yield from _iter_lines(sys.stdin)
+        return
+    if path.endswith(".json"):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        # A single document object is accepted as well (update_document_in_rag.py input)
+        yield from [data] if isinstance(data, dict) else data
+        return
+    if path.endswith(".zst"):
+        _require_zstandard(path)
+        with open(path, 'rb') as raw:
+            reader = zstandard.ZstdDecompressor().stream_reader(raw)
+            yield from _iter_lines(io.TextIOWrapper(reader, encoding='utf-8'))
+        return
+    with open(path, encoding='utf-8') as f:
+        yield from _iter_lines(f)
+
+
+def _iter_lines(lines):
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+class DocumentWriter:
+    """
+    Writes documents as JSON Lines as they are produced: path ending in .zst is
+    zstd-compressed, "-" writes to stdout (so the next stage can read from a pipe),
+    .json writes the legacy pretty-printed array.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._array = path.endswith(".json")
+        self._raw = None
+        if path == "-":
+            self._file = sys.stdout
+        elif path.endswith(".zst"):
+            _require_zstandard(path)
+            self._raw = open(path, 'wb')
+            self._file = io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(self._raw), encoding='utf-8')
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+        if self._array:
+            self._file.write("[")
+
+    def write(self, document):
+        if self._array:
+            self._file.write(",\n" if self.count else "\n")
+            self._file.write(json.dumps(document, indent=4, ensure_ascii=False))
+        else:
+            self._file.write(json.dumps(document, ensure_ascii=False) + "\n")
+            # Flush per record so a reader on the other end of a pipe can start right away
+            if self.path == "-":
+                self._file.flush()
+        self.count += 1
+
+    def close(self):
+        if self._array:
+            self._file.write("\n]")
+        if self._file is sys.stdout:
+            self._file.flush()
+        else:
+            self._file.close()
+            if self._raw is not None and not self._raw.closed:
+                self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_documents(path, documents):
+    with DocumentWriter(path) as writer:
+        for document in documents:
+            writer.write(document)
+    return writer.count
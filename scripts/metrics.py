@@ -0,0 +1,141 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Path that enables metrics for any script without a --metrics flag:
+# *.prom gets a Prometheus text snapshot at exit, anything else JSON lines as spans finish
+METRICS_ENV = "RAG_METRICS"
+METRIC_PREFIX = "rag"
+
+
+class Metrics:
+    """
+    Spans (timed sections) and counters shared by the ingestion and query code.
+
+    Disabled until configure() is called, so instrumented code costs a flag
+    check per span. Without a path the totals are only kept in memory (e.g.
+    for the search server's /metrics endpoint). Spans and counters are keyed
+    by name plus labels; every finished span is aggregated (count, sum, max)
+    and, for a JSON lines sink, also written as one line. Safe to use from
+    threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._spans = {}
+        self._sink = None
+        self.path = None
+        self.enabled = False
+
+    def configure(self, path=None):
+        """Start recording, to path if given (*.prom: Prometheus text written on close, else JSON lines)"""
+        self.close()
+        self.enabled = True
+        self.path = path
+        if path and not path.endswith(".prom"):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._sink = open(path, "a", encoding="utf-8")
+        atexit.register(self.close)
+
+    @contextmanager
+    def span(self, name, **labels):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, labels, time.perf_counter() - start)
+
+    def count(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self):
+        """{"counters": [...], "spans": [...]} with the totals so far"""
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            spans = [{"name": name, "labels": dict(labels), "count": count, "seconds": round(total, 6),
+                      "max_seconds": round(peak, 6)}
+                     for (name, labels), (count, total, peak) in sorted(self._spans.items())]
+        return {"counters": counters, "spans": spans}
+
+    def prometheus_text(self):
+        """Counters as <prefix>_<name>_total, spans as a <prefix>_span_seconds summary plus a max gauge"""
+        snapshot = self.snapshot()
+        lines = []
+        names = sorted({counter["name"] for counter in snapshot["counters"]})
+        for name in names:
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+            for counter in snapshot["counters"]:
+                if counter["name"] == name:
+                    lines.append(f"{METRIC_PREFIX}_{name}_total{_labels(counter['labels'])} {counter['value']}")
+        if snapshot["spans"]:
+            lines.append(f"# TYPE {METRIC_PREFIX}_span_seconds summary")
+            for span in snapshot["spans"]:
+                labels = _labels({"span": span["name"], **span["labels"]})
+                lines.append(f"{METRIC_PREFIX}_span_seconds_count{labels} {span['count']}")
+                lines.append(f"{METRIC_PREFIX}_span_seconds_sum{labels} {span['seconds']}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_span_max_seconds gauge")
+            for span in snapshot["spans"]:
+                labels = _labels({"span": span["name"], **span["labels"]})
+                lines.append(f"{METRIC_PREFIX}_span_max_seconds{labels} {span['max_seconds']}")
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        """Flush: the Prometheus snapshot, or the JSON lines totals, then stop recording"""
+        if not self.enabled:
+            return
+        if self.path and self._sink is None:
+            with open(self.path, "w", encoding="utf-8") as file:
+                file.write(self.prometheus_text())
+        elif self._sink is not None:
+            snapshot = self.snapshot()
+            for kind in ("counters", "spans"):
+                for entry in snapshot[kind]:
+                    self._write({"type": kind[:-1] + "_total", **entry})
+            self._sink.close()
+            self._sink = None
+        self.path = None
+        self.enabled = False
+
+    def _record(self, name, labels, seconds):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            count, total, peak = self._spans.get(key, (0, 0.0, 0.0))
+            self._spans[key] = (count + 1, total + seconds, max(peak, seconds))
+        if self._sink is not None:
+            self._write({"type": "span", "name": name, "labels": labels, "ms": round(seconds * 1000, 3)})
+
+    def _write(self, record):
+        line = json.dumps({"ts": round(time.time(), 3), **record}, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._sink is not None:
+                self._sink.write(line + "\n")
+                self._sink.flush()
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+# The process-wide registry and its shortcuts
+metrics = Metrics()
+span = metrics.span
+count = metrics.count
+configure = metrics.configure
+
+if os.environ.get(METRICS_ENV):
+    configure(os.environ[METRICS_ENV])
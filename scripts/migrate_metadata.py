@@ -0,0 +1,64 @@
+from weaviate_client import get_client
+import argparse
+import json
+from document_schema import ensure_document_collection, METADATA_PROPERTIES
+from document_metadata import metadata_properties
+from batch_import import batch_import
+
+
+def _rfc3339(value):
+    # Dates come back as datetime objects, the batch API wants RFC 3339 strings
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def iter_migrated(collection, force=False):
+    """
+    Objects whose typed metadata properties are missing, rewritten with values
+    parsed from their "metadata" JSON. UUID and vector are kept, so writing them
+    back replaces the objects in place without re-embedding. Objects for which
+    parsing yields the values already stored (e.g. no component in the JSON
+    either) are skipped, so a repeated run writes nothing.
+    """
+    names = [prop.name for prop in METADATA_PROPERTIES]
+    for obj in collection.iterator(include_vector=True):
+        props = dict(obj.properties)
+        if not force and props.get("component") and props.get("document_key"):
+            continue
+        try:
+            metadata = json.loads(props.get("metadata") or "{}")
+        except ValueError:
+            metadata = {}
+        migrated = {key: _rfc3339(value) for key, value in props.items() if value is not None}
+        migrated.update(metadata_properties(metadata))
+        if all(migrated.get(name) == _rfc3339(props.get(name)) for name in names):
+            continue
+        vector = obj.vector.get("default") if isinstance(obj.vector, dict) else obj.vector
+        yield {"uuid": obj.uuid, "properties": migrated, "vector": vector}
+        print(f"  {obj.uuid}: " + ", ".join(f"{name}={migrated.get(name)!r}" for name in names if name in migrated))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Add the typed metadata properties (component, version, document_key, revision, "
+                    "last_updated, date) to the Document collection and fill them for stored objects")
+    parser.add_argument("--force", action="store_true", help="Also re-parse objects that already have the properties")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the objects that would be rewritten")
+    args = parser.parse_args()
+
+    client = get_client()
+    try:
+        collection = ensure_document_collection(client)
+        # Collected before writing: the iterator pages by UUID cursor and must not see its own writes
+        objects = list(iter_migrated(collection, args.force))
+        if args.dry_run:
+            print(f"ℹ️ {len(objects)} objects would be migrated")
+        elif not objects:
+            print("✅ Nothing to migrate")
+        else:
+            report = batch_import(collection, objects)
+            report.print_summary()
+            print("✅ Migration finished" if not report.failed else "❌ Some objects were not migrated, run again")
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
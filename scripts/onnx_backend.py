@@ -0,0 +1,95 @@
+import os
+import numpy as np
+
+# Optional dependencies: onnx + onnxruntime (pip install onnx onnxruntime)
+ONNX_FOLDER = os.path.normpath("../Files/onnx")
+
+
+def onnx_model_dir(model_name, revision):
+    return os.path.join(ONNX_FOLDER, model_name.replace("/", "__") + "@" + (revision or "main"))
+
+
+def export_onnx(model_name, revision="main", quantize=True):
+    """
+    Export the encoder to ONNX (last_hidden_state output, dynamic batch and
+    sequence axes) and optionally quantize its weights to int8. Files are
+    written once per model revision and reused afterwards.
+
+    Returns the path of the model to run.
+    """
+    model_dir = onnx_model_dir(model_name, revision)
+    fp32_path = os.path.join(model_dir, "model.onnx")
+    int8_path = os.path.join(model_dir, "model.int8.onnx")
+
+    if not os.path.exists(fp32_path):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        print(f"Exporting {model_name} to ONNX: {fp32_path}")
+        os.makedirs(model_dir, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name, revision=revision)
+        model = AutoModel.from_pretrained(model_name, revision=revision)
+        model.eval()
+        sample = tokenizer(["Функция возвращает объект DateTime"], return_tensors="pt")
+        input_names = list(sample.keys())
+
+        class Encoder(torch.nn.Module):
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, *inputs):
+                return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+        axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+        tmp_path = fp32_path + ".tmp"
+        torch.onnx.export(
+            Encoder(model),
+            tuple(sample[name] for name in input_names),
+            tmp_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=14
+        )
+        os.replace(tmp_path, fp32_path)
+
+    if not quantize:
+        return fp32_path
+
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        print(f"Quantizing to int8: {int8_path}")
+        tmp_path = int8_path + ".tmp"
+        quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+    return int8_path
+
+
+class OnnxEncoder:
+    """ONNX Runtime CPU session returning last_hidden_state for a padded numpy batch"""
+
+    def __init__(self, model_path, threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        # One batch at a time: all cores go to the operators of that batch
+        options.intra_op_num_threads = threads or os.cpu_count() or 1
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, batch):
+        feed = {name: np.asarray(batch[name], dtype=np.int64) for name in self.input_names}
+        return self.session.run(["last_hidden_state"], feed)[0]
+
+
+def mean_pool_np(last_hidden_state, attention_mask):
+    """numpy twin of embedding_engine.mean_pool"""
+    mask = attention_mask[..., None].astype(last_hidden_state.dtype)
+    summed = (last_hidden_state * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    return (summed / counts).astype(np.float32)
@@ -0,0 +1,67 @@
+import argparse
+import sys
+import time
+import numpy as np
+from embedding_engine import EmbeddingEngine
+from chunking import chunk_document
+from mapping_io import iter_documents, default_mapping_path
+
+
+def load_texts(path, limit):
+    """Section chunks of the mapped corpus: the same kind of text the ingest step embeds"""
+    texts = []
+    for doc in iter_documents(path):
+        texts.extend(chunk["text"] for chunk in chunk_document(doc["content"]))
+        if len(texts) >= limit:
+            break
+    return texts[:limit]
+
+
+def timed_embed(engine, texts):
+    engine.load()
+    list(engine.embed(texts[:engine.batch_size]))  # warm-up, not timed
+    start = time.perf_counter()
+    vectors = np.stack(list(engine.embed(texts)))
+    return vectors, time.perf_counter() - start
+
+
+def cosine(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ONNX Runtime vectors and throughput with the PyTorch backend")
+    parser.add_argument("--input", default=default_mapping_path(), help="Mapping file to take texts from")
+    parser.add_argument("--limit", type=int, default=512, help="Number of texts (default: 512)")
+    parser.add_argument("--no-quantize", action="store_true", help="Check the fp32 ONNX model instead of int8")
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads for both backends")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="Minimum cosine similarity per text (default: 0.99 for int8, 0.9999 for fp32)")
+    args = parser.parse_args()
+
+    quantize = not args.no_quantize
+    tolerance = args.tolerance or (0.99 if quantize else 0.9999)
+    texts = load_texts(args.input, args.limit)
+    print(f"Texts: {len(texts)} from {args.input}")
+
+    reference, torch_time = timed_embed(
+        EmbeddingEngine(batch_size=args.batch_size, threads=args.threads), texts)
+    candidate, onnx_time = timed_embed(
+        EmbeddingEngine(batch_size=args.batch_size, threads=args.threads, backend="onnx", quantize=quantize), texts)
+
+    similarity = cosine(reference, candidate)
+    label = "onnx-int8" if quantize else "onnx-fp32"
+    print(f"torch:     {len(texts) / torch_time:8.1f} texts/sec ({torch_time:.2f}s)")
+    print(f"{label}: {len(texts) / onnx_time:8.1f} texts/sec ({onnx_time:.2f}s), "
+          f"speedup x{torch_time / onnx_time:.2f}")
+    print(f"cosine vs torch: min {similarity.min():.5f}, mean {similarity.mean():.5f}, "
+          f"p1 {np.percentile(similarity, 1):.5f} (tolerance {tolerance})")
+
+    if similarity.min() < tolerance:
+        worst = int(similarity.argmin())
+        print(f"❌ Parity check failed, worst text #{worst}: {texts[worst][:120]!r}")
+        sys.exit(1)
+    print("✅ Parity check passed")
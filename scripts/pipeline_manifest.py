@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+
+DEFAULT_MANIFEST_PATH = os.path.normpath("../Files/manifest.json")
+
+
+def file_hash(path):
+    """sha256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Changes:
+    """Files of one stage input folder, split by what happened since the last run"""
+
+    def __init__(self):
+        self.added = []
+        self.changed = []
+        self.unchanged = []
+        self.removed = []
+
+    @property
+    def pending(self):
+        return self.added + self.changed
+
+    def __str__(self):
+        return (f"{len(self.added)} added, {len(self.changed)} changed, "
+                f"{len(self.unchanged)} unchanged, {len(self.removed)} removed")
+
+
+class Manifest:
+    """
+    Per-stage record of the source files a stage has processed: content hash,
+    mtime, size and whatever the stage produced from them (text files,
+    document IDs). A stage records a file only after it has been processed
+    successfully, so an interrupted run picks it up again next time.
+    """
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self.stages = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.stages = json.load(f).get("stages", {})
+
+    def entries(self, stage):
+        return self.stages.setdefault(stage, {})
+
+    def entry(self, stage, name):
+        return self.entries(stage).get(name)
+
+    def scan(self, stage, folder, extension):
+        """Compare the files in folder with what the stage recorded last time"""
+        changes = Changes()
+        known = self.entries(stage)
+        present = set()
+        names = sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+        for name in names:
+            if not name.lower().endswith(extension):
+                continue
+            present.add(name)
+            entry = known.get(name)
+            if entry is None:
+                changes.added.append(name)
+                continue
+            stat = os.stat(os.path.join(folder, name))
+            # mtime and size unchanged: trust the recorded hash without rereading the file
+            if entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                changes.unchanged.append(name)
+            elif entry["hash"] == file_hash(os.path.join(folder, name)):
+                # Touched but identical: refresh mtime so it is not rehashed next time
+                entry["mtime"] = stat.st_mtime
+                changes.unchanged.append(name)
+            else:
+                changes.changed.append(name)
+        changes.removed = sorted(name for name in known if name not in present)
+        return changes
+
+    def record(self, stage, folder, name, **outputs):
+        """Mark a file as processed by the stage, together with what it produced"""
+        path = os.path.join(folder, name)
+        stat = os.stat(path)
+        entry = {"hash": file_hash(path), "mtime": stat.st_mtime, "size": stat.st_size}
+        entry.update(outputs)
+        self.entries(stage)[name] = entry
+
+    def forget(self, stage, name):
+        return self.entries(stage).pop(name, None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"stages": self.stages}, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -1,29 +1,22 @@
-import weaviate
+from weaviate_client import get_client
 from weaviate.classes.query import MetadataQuery  # Import MetadataQuery directly
-from transformers import AutoTokenizer, AutoModel
-import torch
+from metrics import span, count
 
-# Load the same model used for embedding during storage
-tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
+_engine = None
 
 def vectorize_text(text):
-    # Tokenize text
-    inputs = tokenizer(text, return_tensors='pt', truncation=True, 
-                      padding=True, max_length=512)
-    
-    with torch.no_grad():
-        # Get embeddings from the last hidden state
-        outputs = model(**inputs)
-        # Use mean pooling for sentence embeddings
-        embeddings = outputs.last_hidden_state.mean(dim=1).numpy()[0]
-    
-    return embeddings.tolist()
+    global _engine
+    if _engine is None:
+        # The same model used for embedding during storage, loaded on the first query only
+        from embedding_engine import EmbeddingEngine
+        from embedding_cache import EmbeddingCache
+        _engine = EmbeddingEngine(cache=EmbeddingCache())
+    return _engine.embed_one(text)
 
 def query_weaviate(query_text):
     try:
         # Connect to Weaviate - make sure Weaviate is running locally
-        client = weaviate.connect_to_local()
+        client = get_client()
         
         # Check if the collection exists
         if not client.collections.exists("Document"):
@@ -37,35 +30,23 @@ def query_weaviate(query_text):
         query_vector = vectorize_text(query_text)
         
         # In your query_weaviate function, modify the near_vector call:
-        response = collection.query.near_vector(
-            near_vector=query_vector,
-            limit=2,
-            return_metadata=MetadataQuery(distance=True),  # Use the imported class directly
-            return_properties=["title", "content", "metadata"]
-        )
+        with span("query", method="vector", store="weaviate"):
+            response = collection.query.near_vector(
+                near_vector=query_vector,
+                limit=2,
+                return_metadata=MetadataQuery(distance=True),  # Use the imported class directly
+                return_properties=["title", "content", "metadata"]
+            )
         
         # Get the objects from the response
         results = response.objects
-        
-        # Print raw metadata for debugging
-        if hasattr(response, 'objects') and len(response.objects) > 0:
-            first_result = response.objects[0]
-            if hasattr(first_result, 'metadata'):
-                print("DEBUG: First result metadata values:")
-                for attr in ['distance', 'certainty', 'score']:
-                    try:
-                        value = getattr(first_result.metadata, attr)
-                        print(f"  {attr}: {value}")
-                    except AttributeError:
-                        print(f"  {attr}: Not available")
+        count("results", len(results))
         
         return results
     except Exception as e:
+        count("errors", stage="query")
         print(f"Error querying Weaviate: {e}")
         return []
-    finally:
-        if 'client' in locals():
-            client.close()  # Close the connection
 
 if __name__ == "__main__":
     query_text = input("Введите запрос: ")
@@ -1,5 +1,6 @@
-import weaviate
-import json
+from weaviate_client import get_client
+from weaviate.classes.query import Filter
+from weaviate.classes.aggregate import GroupByAggregate
 import sys
 
 def read_weaviate_schema():
@@ -7,7 +8,7 @@ def read_weaviate_schema():
     Read and display the Weaviate schema using v4 API
     """
     # Connect to Weaviate
-    client = weaviate.connect_to_local()
+    client = get_client()
     
     try:
         print("=== WEAVIATE SCHEMA ===")
@@ -64,15 +65,13 @@ def read_weaviate_schema():
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
-    finally:
-        client.close()
 
 def read_document_by_component(component_name):
     """
     Read a document from Weaviate by component name
     """
     # Connect to Weaviate
-    client = weaviate.connect_to_local()
+    client = get_client()
     
     try:
         print(f"=== SEARCHING FOR DOCUMENT WITH COMPONENT: {component_name} ===")
@@ -80,60 +79,50 @@ def read_document_by_component(component_name):
         # Get the Document collection
         collection = client.collections.get("Document")
         
-        # Query for documents
+        # Server-side filter on the indexed component property. All chunks are fetched:
+        # their storage order is arbitrary, so the first object is not the document start
         results = collection.query.fetch_objects(
-            limit=10  # Get multiple results to ensure we find the right one
+            filters=Filter.by_property("component").equal(component_name),
+            limit=10000
         )
         
-        # Find the document with matching component
-        found = False
-        for obj in results.objects:
-            try:
-                # Parse metadata which is stored as a JSON string
-                metadata = json.loads(obj.properties.get('metadata', '{}'))
-                if metadata.get('component') == component_name:
-                    found = True
-                    print(f"\n== Document Found ==")
-                    print(f"UUID: {obj.uuid}")
-                    print(f"Title: {obj.properties.get('title')}")
-                    print(f"Component: {metadata.get('component')}")
-                    print(f"Version: {metadata.get('version')}")
-                    print(f"Date: {metadata.get('date')}")
-                    
-                    # Print content (truncated)
-                    content = obj.properties.get('content', '')
-                    if len(content) > 200:
-                        print(f"\nContent (first 200 chars): {content[:200]}...")
-                    else:
-                        print(f"\nContent: {content}")
-                    
-                    break
-            except:
-                continue
-        
-        if not found:
+        if results.objects:
+            chunks = sorted(results.objects, key=lambda o: (o.properties.get('document_id') or '',
+                                                            o.properties.get('chunk_index') or 0))
+            obj = chunks[0]
+            props = obj.properties
+            chunks = [o for o in chunks if o.properties.get('document_id') == props.get('document_id')]
+            print(f"\n== Document Found ==")
+            print(f"UUID: {props.get('document_id') or obj.uuid}")
+            print(f"Title: {props.get('title')}")
+            print(f"Component: {props.get('component')}")
+            print(f"Version: {props.get('version')}")
+            print(f"Date: {props.get('date')}")
+            if props.get('revision') is not None:
+                print(f"Revision: {props.get('revision')}")
+            if props.get('last_updated') is not None:
+                print(f"Last updated: {props.get('last_updated')}")
+            print(f"Chunks: {len(chunks)}")
+            
+            # Print content (truncated), the chunks in document order
+            content = "\n\n".join(o.properties.get('content') or '' for o in chunks)
+            if len(content) > 200:
+                print(f"\nContent (first 200 chars): {content[:200]}...")
+            else:
+                print(f"\nContent: {content}")
+        else:
             print(f"No document found with component: {component_name}")
             print("Available components:")
             
-            # List available components
-            components = set()
-            for obj in results.objects:
-                try:
-                    metadata = json.loads(obj.properties.get('metadata', '{}'))
-                    if 'component' in metadata:
-                        components.add(metadata.get('component'))
-                except:
-                    continue
-            
-            for component in components:
-                print(f"- {component}")
+            # List available components, grouped on the server
+            groups = collection.aggregate.over_all(group_by=GroupByAggregate(prop="component"))
+            for group in groups.groups:
+                print(f"- {group.grouped_by.value}")
     
     except Exception as e:
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
-    finally:
-        client.close()
 
 if __name__ == "__main__":
     if len(sys.argv) == 1:
@@ -0,0 +1,229 @@
+import argparse
+import itertools
+import os
+from convert_docx2text import convert_all, docx_folder, text_folder
+from map_text2json import map_text_file
+from mapping_io import iter_documents, write_documents, json_folder, base_filename
+from pipeline_manifest import Manifest, file_hash
+from embedding_engine import EmbeddingEngine
+from embedding_cache import EmbeddingCache
+from chunking import chunk_document, chunk_object, chunk_id, MAX_TOKENS, OVERLAP_TOKENS
+from batch_import import batch_import
+from document_metadata import document_key
+from keyword_index import open_existing_index
+from metrics import span, count, configure as configure_metrics
+
+mapping_path = os.path.join(json_folder, base_filename + ".jsonl")
+legacy_mapping_path = os.path.join(json_folder, base_filename + ".json")
+
+
+def load_mapping():
+    for path in (mapping_path, legacy_mapping_path):
+        if os.path.exists(path):
+            return {doc["id"]: doc for doc in iter_documents(path)}
+    return {}
+
+
+def save_mapping(documents):
+    os.makedirs(json_folder, exist_ok=True)
+    write_documents(mapping_path, documents.values())
+
+
+def convert_stage(manifest, workers=1):
+    """.docx -> .txt for new and changed Word files; drop text of removed ones"""
+    changes = manifest.scan("convert", docx_folder, ".docx")
+    print(f"[convert] {changes}")
+    docx_paths = [os.path.join(docx_folder, name) for name in changes.pending]
+    for docx_path, output_path, error in convert_all(docx_paths, text_folder, workers):
+        name = os.path.basename(docx_path)
+        if error:
+            count("errors", stage="convert")
+            print(f"[convert] Error converting {name}: {error}")
+        else:
+            manifest.record("convert", docx_folder, name, outputs=[os.path.basename(output_path)])
+    for name in changes.removed:
+        entry = manifest.forget("convert", name)
+        for output in entry.get("outputs", []):
+            output_path = os.path.join(text_folder, output)
+            if os.path.exists(output_path):
+                os.remove(output_path)
+                print(f"[convert] Removed {output_path}")
+
+
+def map_stage(manifest, documents):
+    """
+    .txt -> document for new and changed text files. The document ID is derived
+    from the document_key (as in update_document_in_rag.py), so both keep the
+    chunks of a specification under one document_id. When an edit changes the
+    key, the old key is recorded as stale so the embed stage deletes its objects.
+    """
+    changes = manifest.scan("map", text_folder, ".txt")
+    print(f"[map] {changes}")
+    # Documents of a mapping built before the manifest existed, matched by component
+    tracked_ids = {doc_id for entry in manifest.entries("map").values() for doc_id in entry["document_ids"]}
+    untracked = {doc["metadata"].get("component"): doc_id
+                 for doc_id, doc in documents.items() if doc_id not in tracked_ids}
+
+    for name in changes.pending:
+        previous = manifest.entry("map", name)
+        try:
+            doc = map_text_file(os.path.join(text_folder, name))
+            # Earlier (random) IDs of the same file are replaced, their objects are
+            # overwritten or removed by document_key in the embed stage
+            old_ids = previous["document_ids"] if previous else []
+            if previous is None and doc["metadata"]["component"] in untracked:
+                old_ids = [untracked.pop(doc["metadata"]["component"])]
+            # Keys whose objects are still stored: the previous version's, and stale ones not yet embedded
+            old_keys = set(previous.get("document_keys", []) + previous.get("stale_document_keys", [])
+                           if previous else [])
+            for old_id in old_ids:
+                old_doc = documents.pop(old_id, None)
+                if old_doc is not None:
+                    old_keys.add(document_key(old_doc["metadata"]))
+            documents[doc["id"]] = doc
+            key = doc["metadata"]["document_key"]
+            stale_keys = sorted(old_keys - {key})
+            manifest.record("map", text_folder, name, document_ids=[doc["id"]], document_keys=[key],
+                            **({"stale_document_keys": stale_keys} if stale_keys else {}))
+        except Exception as e:
+            print(f"[map] Error mapping {name}: {e}")
+    for name in changes.removed:
+        for doc_id in manifest.forget("map", name).get("document_ids", []):
+            documents.pop(doc_id, None)
+    save_mapping(documents)
+
+
+def embed_stage(manifest, documents, collection, engine, keywords=None, max_tokens=MAX_TOKENS, overlap=OVERLAP_TOKENS):
+    """
+    Re-embed and upsert documents of new and changed text files; delete objects
+    of removed ones. A keyword index, if given, follows the same changes.
+    """
+    # Imported here so --skip-embed runs never load the Weaviate client
+    from weaviate.classes.query import Filter
+    from document_schema import delete_stale_chunks
+
+    changes = manifest.scan("embed", text_folder, ".txt")
+    print(f"[embed] {changes}")
+
+    for name in changes.removed:
+        entry = manifest.forget("embed", name)
+        # By document_key: it covers every chunk of the specification, whichever document_id it was written with
+        for key in entry.get("document_keys", []):
+            delete_stale_chunks(collection, key, [])
+            if keywords is not None:
+                keywords.delete_stale_chunks(key, [])
+            print(f"[embed] Deleted objects of removed file {name} ({key})")
+        if "document_keys" not in entry:
+            # Recorded before keys were kept in the manifest
+            for doc_id in entry.get("document_ids", []):
+                collection.data.delete_many(where=Filter.by_property("document_id").equal(doc_id))
+                if keywords is not None:
+                    keywords.delete_document(doc_id)
+                print(f"[embed] Deleted objects of removed file {name} ({doc_id})")
+
+    pending = []
+    for name in changes.pending:
+        entry = manifest.entry("map", name)
+        if entry is None or entry["hash"] != file_hash(os.path.join(text_folder, name)):
+            print(f"[embed] Skipping {name}: current version is not mapped")
+            continue
+        pending.append((name, [documents[doc_id] for doc_id in entry["document_ids"]]))
+    if not pending:
+        return
+
+    # Chunks are upserted under deterministic UUIDs; what the new version does
+    # not overwrite is deleted once the document is stored
+    chunk_ids = {}
+
+    def iter_chunks():
+        for _, docs in pending:
+            for doc in docs:
+                chunks = chunk_document(doc["content"], count_tokens=engine.count_tokens, max_tokens=max_tokens,
+                                        overlap=overlap)
+                chunk_ids[doc["id"]] = [chunk_id(doc, chunk) for chunk in chunks]
+                count("documents")
+                count("chunks", len(chunks))
+                for chunk in chunks:
+                    yield doc, chunk
+
+    chunks, texts = itertools.tee(iter_chunks())
+    vectors = engine.embed(chunk["text"] for _, chunk in texts)
+    objects = (chunk_object(doc, chunk, embedding.tolist())
+               for (doc, chunk), embedding in zip(chunks, vectors))
+    if keywords is not None:
+        objects = keywords.indexing(objects)
+    report = batch_import(collection, objects)
+    report.print_summary()
+    if keywords is not None:
+        # Indexed on the way in; objects Weaviate rejected must not stay searchable
+        keywords.delete_objects(error.object_.uuid for error in report.failed)
+
+    failed_ids = {error.object_.properties.get("document_id") for error in report.failed}
+    live_keys = {key for entry in manifest.entries("map").values() for key in entry.get("document_keys", [])}
+    for name, docs in pending:
+        doc_ids = [doc["id"] for doc in docs]
+        if failed_ids.intersection(doc_ids):
+            count("errors", stage="embed")
+            print(f"[embed] {name} not fully stored, will retry on the next run")
+        else:
+            keys = [document_key(doc["metadata"]) for doc in docs]
+            for doc, key in zip(docs, keys):
+                delete_stale_chunks(collection, key, chunk_ids[doc["id"]])
+                if keywords is not None:
+                    keywords.delete_stale_chunks(key, chunk_ids[doc["id"]])
+            # The file's objects under a key it no longer has, unless another file has taken that key over
+            map_entry = manifest.entry("map", name)
+            stale_keys = set((manifest.entry("embed", name) or {}).get("document_keys", []))
+            stale_keys.update(map_entry.pop("stale_document_keys", []))
+            for key in sorted(stale_keys - live_keys):
+                delete_stale_chunks(collection, key, [])
+                if keywords is not None:
+                    keywords.delete_stale_chunks(key, [])
+                print(f"[embed] Deleted objects of {name} stored under its previous key {key}")
+            manifest.record("embed", text_folder, name, document_ids=doc_ids, document_keys=keys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Incremental convert -> map -> embed pipeline: only added or changed files are processed")
+    parser.add_argument("--skip-convert", action="store_true", help="Start from the existing .txt files")
+    parser.add_argument("--skip-embed", action="store_true", help="Stop after updating documentation_mapping.jsonl")
+    parser.add_argument("--workers", type=int, default=1, help="Processes for .docx conversion (default: 1)")
+    parser.add_argument("--chunk-tokens", type=int, default=MAX_TOKENS,
+                        help=f"Token budget per section chunk, as used at ingest (default: {MAX_TOKENS})")
+    parser.add_argument("--chunk-overlap", type=int, default=OVERLAP_TOKENS,
+                        help=f"Tokens repeated between sub-split chunks, as used at ingest (default: {OVERLAP_TOKENS})")
+    parser.add_argument("--metrics", help="Record spans and counters to this file: *.prom for Prometheus text, else JSON lines")
+    args = parser.parse_args()
+    if args.metrics:
+        configure_metrics(args.metrics)
+
+    manifest = Manifest()
+    documents = load_mapping()
+    try:
+        if not args.skip_convert:
+            with span("pipeline_stage", stage="convert"):
+                convert_stage(manifest, args.workers)
+            manifest.save()
+        with span("pipeline_stage", stage="map"):
+            map_stage(manifest, documents)
+        manifest.save()
+
+        if not args.skip_embed:
+            from weaviate_client import get_client
+            from document_schema import ensure_document_collection
+
+            client = get_client()
+            cache = EmbeddingCache()
+            keywords = open_existing_index()
+            try:
+                collection = ensure_document_collection(client)
+                with span("pipeline_stage", stage="embed"):
+                    embed_stage(manifest, documents, collection, EmbeddingEngine(cache=cache), keywords,
+                                args.chunk_tokens, args.chunk_overlap)
+                cache.print_stats()
+            finally:
+                if keywords is not None:
+                    keywords.close()
+    finally:
+        manifest.save()
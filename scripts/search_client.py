@@ -0,0 +1,82 @@
+import argparse
+import json
+import sys
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+# Same defaults as search_server.py, kept here so the client does not import the server's dependencies
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def request(endpoint, params, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=30):
+    """Call the search server and return the decoded JSON response"""
+    url = f"http://{host}:{port}/{endpoint}?{urlencode(params)}"
+    try:
+        with urlopen(url, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except HTTPError as e:
+        return json.loads(e.read().decode('utf-8'))
+
+
+def print_results(payload):
+    results = payload.get("results", [])
+    if not results:
+        print("No results found")
+    for item in results:
+        print(f"\n== Result {item['rank']} ==")
+        print(f"Title: {item['title']}")
+        if item.get('section'):
+            print(f"Section: {item['section']}")
+        if item.get('fused_score') is not None:
+            print(f"Fused score: {item['fused_score']} (vector rank {item.get('vector_rank') or '-'}, "
+                  f"keyword rank {item.get('keyword_rank') or '-'})")
+        if item.get('distance') is not None:
+            print(f"Distance: {item['distance']}")
+        if item.get('score') is not None:
+            print(f"Score: {item['score']}")
+        print(f"Component: {item.get('component')}")
+        content = item.get('content') or ''
+        print(f"Content snippet: {content[:200]}..." if len(content) > 200 else f"Content: {content}")
+        print("---")
+    legs = payload.get("legs")
+    if legs:
+        print("\nLegs: " + ", ".join(f"{leg[:-3]} {ms} ms" for leg, ms in legs.items()))
+    print(f"\nServer time: {payload.get('took_ms')} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the resident search server (search_server.py)")
+    parser.add_argument("query", help="Query text, or the component name with --method component")
+    parser.add_argument("--method", choices=["vector", "keyword", "hybrid", "component"], default="vector",
+                        help="Search method (default: vector)")
+    parser.add_argument("--fusion", choices=["weaviate", "rrf"], default="weaviate",
+                        help="Hybrid fusion: weaviate hybrid query or client-side reciprocal rank fusion")
+    parser.add_argument("--alpha", type=float, default=0.5, help="Weight of the vector leg in weaviate fusion")
+    parser.add_argument("--limit", type=int, default=5, help="Maximum number of results (default: 5)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--json", action="store_true", help="Print the raw JSON response")
+    args = parser.parse_args()
+
+    if args.method == "component":
+        params = {"name": args.query}
+    else:
+        params = {"q": args.query, "limit": args.limit}
+    if args.method == "hybrid":
+        params.update(fusion=args.fusion, alpha=args.alpha)
+
+    try:
+        payload = request(args.method, params, args.host, args.port)
+    except URLError as e:
+        print(f"Search server is not reachable at {args.host}:{args.port}: {e.reason}")
+        sys.exit(1)
+
+    if "error" in payload:
+        print(f"Error: {payload['error']}")
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+    else:
+        print_results(payload)
@@ -0,0 +1,163 @@
+from weaviate_client import get_client
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from embedding_engine import EmbeddingEngine, BACKENDS
+from embedding_cache import EmbeddingCache
+from search_weaviate_v4 import (vector_query, keyword_query, hybrid_items, results_to_dicts,
+                                RETURN_PROPERTIES, FUSIONS, HYBRID_ALPHA)
+from metrics import metrics, span, count
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class SearchService:
+    """
+    Keeps the embedding model and tokenizer warm for the lifetime of the
+    process; Weaviate goes through the shared client of weaviate_client.
+    """
+
+    def __init__(self, backend="torch", quantize=True, threads=None):
+        self.engine = EmbeddingEngine(cache=EmbeddingCache(), backend=backend,
+                                      quantize=quantize, threads=threads).load()
+        self._engine_lock = threading.Lock()
+
+    @property
+    def collection(self):
+        # Looked up per request (a local handle, no round trip): after the shared
+        # client reconnects, a handle kept from startup would point at the dead one
+        from document_schema import COLLECTION_NAME
+        return get_client().collections.get(COLLECTION_NAME)
+
+    def close(self):
+        if self.engine.cache is not None:
+            self.engine.cache.close()
+
+    def vector(self, query, limit):
+        with self._engine_lock:
+            vector = self.engine.embed_one(query)
+        return results_to_dicts(vector_query(self.collection, vector, limit))
+
+    def keyword(self, query, limit):
+        return results_to_dicts(keyword_query(self.collection, query, limit))
+
+    def hybrid(self, query, limit, fusion="weaviate", alpha=HYBRID_ALPHA):
+        """Fused results and per-leg latency"""
+        with self._engine_lock:
+            vector = self.engine.embed_one(query)
+        return hybrid_items(self.collection, query, vector, limit, fusion, alpha)
+
+    def component(self, name):
+        """All chunks of the document(s) of a component, in document order"""
+        from weaviate.classes.query import Filter
+
+        # Server-side filter on the indexed component property, no scan of the collection
+        response = self.collection.query.fetch_objects(
+            filters=Filter.by_property("component").equal(name),
+            limit=10000,
+            return_properties=RETURN_PROPERTIES + ["chunk_index"]
+        )
+        objects = sorted(response.objects, key=lambda o: (o.properties.get("document_id") or "",
+                                                          o.properties.get("chunk_index") or 0))
+        return results_to_dicts(objects)
+
+
+def make_handler(service):
+    class SearchHandler(BaseHTTPRequestHandler):
+        """
+        GET /vector?q=..&limit=N, /keyword?q=..&limit=N, /hybrid?q=..&limit=N[&fusion=rrf][&alpha=A],
+        /component?name=.., /health, /metrics (Prometheus text)
+        """
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/metrics":
+                return self._send_text(200, metrics.prometheus_text())
+            known = url.path in ("/health", "/vector", "/keyword", "/hybrid", "/component")
+            with span("request", endpoint=url.path if known else "other"):
+                self._handle(url)
+
+        def _handle(self, url):
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            start = time.perf_counter()
+            try:
+                limit = int(params.get("limit", 5))
+                if url.path == "/health":
+                    payload = {"status": "ok", "ready": get_client().is_ready()}
+                elif url.path in ("/vector", "/keyword"):
+                    query = params.get("q")
+                    if not query:
+                        return self._send(400, {"error": "missing query parameter 'q'"})
+                    search = service.vector if url.path == "/vector" else service.keyword
+                    payload = {"query": query, "results": search(query, limit)}
+                elif url.path == "/hybrid":
+                    query = params.get("q")
+                    fusion = params.get("fusion", "weaviate")
+                    if not query:
+                        return self._send(400, {"error": "missing query parameter 'q'"})
+                    if fusion not in FUSIONS:
+                        return self._send(400, {"error": f"fusion must be one of {', '.join(FUSIONS)}"})
+                    results, legs = service.hybrid(query, limit, fusion, float(params.get("alpha", HYBRID_ALPHA)))
+                    payload = {"query": query, "fusion": fusion, "results": results, "legs": legs}
+                elif url.path == "/component":
+                    name = params.get("name")
+                    if not name:
+                        return self._send(400, {"error": "missing query parameter 'name'"})
+                    payload = {"component": name, "results": service.component(name)}
+                else:
+                    return self._send(404, {"error": f"unknown endpoint {url.path}"})
+            except Exception as e:
+                count("errors", stage="request")
+                return self._send(500, {"error": str(e)})
+            payload["took_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            self._send(200, payload)
+
+        def _send(self, status, payload):
+            self._send_body(status, json.dumps(payload, ensure_ascii=False), "application/json; charset=utf-8")
+
+        def _send_text(self, status, text):
+            self._send_body(status, text, "text/plain; version=0.0.4; charset=utf-8")
+
+        def _send_body(self, status, text, content_type):
+            body = text.encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return SearchHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resident search service with a warm embedding model")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Bind address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch",
+                        help="Inference backend for query embeddings (default: torch)")
+    parser.add_argument("--no-quantize", action="store_true", help="Run the fp32 ONNX model instead of int8")
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op CPU threads (default: all cores)")
+    parser.add_argument("--metrics", help="Also record spans and counters to this file: *.prom for Prometheus text, else JSON lines")
+    args = parser.parse_args()
+
+    # Always recorded in memory for GET /metrics
+    metrics.configure(args.metrics)
+
+    print("Loading embedding model (Weaviate is connected on the first request)...")
+    service = SearchService(args.backend, not args.no_quantize, args.threads)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"Search server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
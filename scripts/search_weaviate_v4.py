@@ -1,154 +1,419 @@
-import weaviate
 import json
 import argparse
-from transformers import AutoTokenizer, AutoModel
-import torch
-
-def generate_embedding(text, model, tokenizer):
-    """Generate embedding for text using the provided model"""
-    inputs = tokenizer(text, return_tensors='pt', truncation=True, 
-                      padding=True, max_length=512)
-    
-    with torch.no_grad():
-        outputs = model(**inputs)
-        embeddings = outputs.last_hidden_state.mean(dim=1).numpy()[0]
-    
-    return embeddings.tolist()
-
-def vector_search(query_text, limit=5):
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from vector_store import open_store, STORE_BACKENDS, DEFAULT_STORE_DIR
+from metrics import span, configure as configure_metrics
+
+RETURN_PROPERTIES = ["title", "content", "metadata", "section", "document_id", "component", "version"]
+
+# Hybrid search: weight of the vector leg in Weaviate's fusion (0 = pure BM25, 1 = pure vector)
+HYBRID_ALPHA = 0.5
+# Reciprocal rank fusion constant: score = sum over legs of 1 / (RRF_K + rank)
+RRF_K = 60
+FUSIONS = ("weaviate", "rrf")
+# Queries searched at once in --queries-file mode
+BATCH_CONCURRENCY = 8
+# Result fields written per hit in --queries-file mode (content is left out to keep the files small)
+BATCH_RESULT_FIELDS = ["rank", "uuid", "document_id", "component", "section", "distance", "score",
+                       "fused_score", "vector_rank", "keyword_rank"]
+
+def vector_query(collection, query_vector, limit=5):
+    """Run a near_vector query and return the result objects"""
+    from weaviate.classes.query import MetadataQuery
+
+    # In v4.14.1, the parameter is named 'near_vector' not 'vector'
+    with span("query", method="vector", store="weaviate"):
+        response = collection.query.near_vector(
+            near_vector=query_vector,
+            limit=limit,
+            return_metadata=MetadataQuery(distance=True),
+            return_properties=RETURN_PROPERTIES
+        )
+    return response.objects
+
+def keyword_query(collection, query_text, limit=5):
+    """Run a BM25 query and return the result objects"""
+    from weaviate.classes.query import MetadataQuery
+
+    with span("query", method="keyword", store="weaviate"):
+        response = collection.query.bm25(
+            query=query_text,
+            limit=limit,
+            return_metadata=MetadataQuery(score=True),
+            return_properties=RETURN_PROPERTIES
+        )
+    return response.objects
+
+def hybrid_query(collection, query_text, query_vector, limit=5, alpha=HYBRID_ALPHA):
+    """One Weaviate hybrid query: the BM25 and vector legs are fused on the server"""
+    from weaviate.classes.query import MetadataQuery
+
+    with span("query", method="hybrid", store="weaviate"):
+        response = collection.query.hybrid(
+            query=query_text,
+            vector=query_vector,
+            alpha=alpha,
+            limit=limit,
+            return_metadata=MetadataQuery(score=True, explain_score=True),
+            return_properties=RETURN_PROPERTIES
+        )
+    return response.objects
+
+def _timed(query, *args):
+    start = time.perf_counter()
+    objects = query(*args)
+    return objects, round((time.perf_counter() - start) * 1000, 2)
+
+def rrf_query(collection, query_text, query_vector, limit=5, k=RRF_K, depth=None):
+    """Client-side reciprocal rank fusion of the vector and BM25 queries of a Weaviate collection"""
+    return rrf_fuse(lambda n: vector_query(collection, query_vector, n),
+                    lambda n: keyword_query(collection, query_text, n), limit, k, depth)
+
+def rrf_fuse(vector_leg, keyword_leg, limit=5, k=RRF_K, depth=None):
+    """
+    Reciprocal rank fusion of two search legs, called as leg(n) -> result
+    objects. The legs are issued concurrently, each returning `depth`
+    candidates (4 * limit by default).
+
+    Returns (items, legs): fused result dicts with the rank of each leg, and
+    the latency of each leg in milliseconds.
+    """
+    depth = depth or limit * 4
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        vector_leg = pool.submit(_timed, vector_leg, depth)
+        keyword_leg = pool.submit(_timed, keyword_leg, depth)
+        vector_objects, vector_ms = vector_leg.result()
+        keyword_objects, keyword_ms = keyword_leg.result()
+    return fuse_ranked(vector_objects, keyword_objects, limit, k), {"vector_ms": vector_ms, "keyword_ms": keyword_ms}
+
+def fuse_ranked(vector_objects, keyword_objects, limit=5, k=RRF_K):
+    """Reciprocal rank fusion of two ranked result lists into result dicts with the rank of each leg"""
+    fused = {}
+    for leg, objects in (("vector", vector_objects), ("keyword", keyword_objects)):
+        for rank, obj in enumerate(objects, 1):
+            entry = fused.setdefault(str(obj.uuid), {"object": obj, "fused_score": 0.0})
+            entry["fused_score"] += 1.0 / (k + rank)
+            entry[f"{leg}_rank"] = rank
+            if leg == "vector":
+                entry["distance"] = obj.metadata.distance
+            else:
+                entry["score"] = obj.metadata.score
+
+    ranked = sorted(fused.values(), key=lambda entry: entry["fused_score"], reverse=True)[:limit]
+    items = []
+    for rank, entry in enumerate(ranked, 1):
+        item = result_to_dict(entry["object"], rank)
+        item.update(distance=entry.get("distance"), score=entry.get("score"),
+                    fused_score=round(entry["fused_score"], 6),
+                    vector_rank=entry.get("vector_rank"), keyword_rank=entry.get("keyword_rank"))
+        items.append(item)
+    return items
+
+def hybrid_items(collection, query_text, query_vector, limit=5, fusion="weaviate", alpha=HYBRID_ALPHA):
+    """Hybrid results as dicts plus per-leg latency, for either fusion"""
+    if fusion == "rrf":
+        return rrf_query(collection, query_text, query_vector, limit)
+    objects, hybrid_ms = _timed(hybrid_query, collection, query_text, query_vector, limit, alpha)
+    items = []
+    for rank, obj in enumerate(objects, 1):
+        item = result_to_dict(obj, rank)
+        item["explain_score"] = obj.metadata.explain_score
+        items.append(item)
+    return items, {"hybrid_ms": hybrid_ms}
+
+def store_hybrid(store, query_text, query_vector, limit=5, fusion="weaviate", alpha=HYBRID_ALPHA):
+    """Hybrid items and per-leg latency from any store"""
+    if store.name == "weaviate":
+        return hybrid_items(store.collection, query_text, query_vector, limit, fusion, alpha)
+    # Only client-side fusion exists outside Weaviate
+    return rrf_fuse(lambda n: store.vector_search(query_vector, n),
+                    lambda n: store.keyword_search(query_text, n), limit)
+
+def result_to_dict(result, rank):
+    """JSON-ready view of one result object"""
+    try:
+        metadata = json.loads(result.properties.get('metadata') or '{}')
+    except ValueError:
+        metadata = {}
+    return {
+        "rank": rank,
+        "uuid": str(result.uuid),
+        "document_id": result.properties.get('document_id'),
+        "title": result.properties.get('title'),
+        "section": result.properties.get('section'),
+        "component": result.properties.get('component') or metadata.get('component'),
+        "version": result.properties.get('version') or metadata.get('version'),
+        "distance": result.metadata.distance,
+        "score": result.metadata.score,
+        "content": result.properties.get('content', '')
+    }
+
+def results_to_dicts(results):
+    """JSON-ready views of result objects, ranked from 1"""
+    with span("parse"):
+        return [result_to_dict(result, i + 1) for i, result in enumerate(results)]
+
+def print_results(results):
+    print_items(results_to_dicts(results))
+
+def print_items(items):
+    if not items:
+        print("No results found")
+        return
+
+    print(f"\nFound {len(items)} results:")
+    for item in items:
+        print(f"\n== Result {item['rank']} ==")
+        print(f"Title: {item['title']}")
+        if item['section']:
+            print(f"Section: {item['section']}")
+        if item.get('fused_score') is not None:
+            print(f"Fused score: {item['fused_score']} (vector rank {item.get('vector_rank') or '-'}, "
+                  f"keyword rank {item.get('keyword_rank') or '-'})")
+        if item['distance'] is not None:
+            print(f"Distance: {item['distance']}")
+        if item['score'] is not None:
+            print(f"Score: {item['score']}")
+        if item.get('explain_score'):
+            print(f"Explain score: {' '.join(item['explain_score'].split())}")
+        print(f"Component: {item['component']}")
+        print(f"Version: {item['version']}")
+
+        # Print content snippet
+        content = item['content']
+        if len(content) > 200:
+            print(f"Content snippet: {content[:200]}...")
+        else:
+            print(f"Content: {content}")
+
+        print("---")
+
+def embed_query(query_text):
+    """Query vector and the time it took in milliseconds"""
+    # Imported here so keyword searches never load the embedding stack
+    from embedding_engine import EmbeddingEngine
+    from embedding_cache import EmbeddingCache
+
+    # Repeated queries are answered from the embedding cache without loading the model
+    start = time.perf_counter()
+    query_embedding = EmbeddingEngine(cache=EmbeddingCache()).embed_one(query_text)
+    return query_embedding, round((time.perf_counter() - start) * 1000, 2)
+
+def vector_search(query_text, limit=5, store="weaviate", **store_options):
     """
     Search documents using vector search by generating embeddings locally
     """
     print(f"=== VECTOR SEARCHING DOCUMENTS WITH QUERY: '{query_text}' ===")
-    
-    # Load models for embedding
-    print("Loading embedding models...")
-    tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-    model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-    
+
     # Generate embedding for the query
-    query_embedding = generate_embedding(query_text, model, tokenizer)
-    
-    # Connect to Weaviate
-    client = weaviate.connect_to_local()
-    
+    query_embedding, _ = embed_query(query_text)
+
+    # Connect to Weaviate (or open the local store)
+    store = open_store(store, **store_options)
+
     try:
-        # Get the Document collection
-        collection = client.collections.get("Document")
-        
         # Search using the generated vector
-        # In v4.14.1, the parameter is named 'near_vector' not 'vector'
-        response = collection.query.near_vector(
-            near_vector=query_embedding,  # Correct parameter name
-            limit=limit,
-            return_properties=["title", "content", "metadata"]
-        )
-        
-        # Get the objects from the response
-        results = response.objects
-        
-        if results:
-            print(f"\nFound {len(results)} results:")
-            
-            for i, result in enumerate(results):
-                print(f"\n== Result {i+1} ==")
-                print(f"Title: {result.properties.get('title')}")
-                print(f"Distance: {result.metadata.distance}")
-                
-                # Parse metadata
-                try:
-                    metadata = json.loads(result.properties.get('metadata', '{}'))
-                    print(f"Component: {metadata.get('component')}")
-                    print(f"Version: {metadata.get('version')}")
-                except:
-                    print("Could not parse metadata")
-                
-                # Print content snippet
-                content = result.properties.get('content', '')
-                if len(content) > 200:
-                    print(f"Content snippet: {content[:200]}...")
-                else:
-                    print(f"Content: {content}")
-                
-                print("---")
-        else:
-            print("No results found")
-    
+        print_results(store.vector_search(query_embedding, limit))
+
     except Exception as e:
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
     finally:
-        client.close()
+        store.close()
 
-def keyword_search(query_text, limit=5):
+def keyword_search(query_text, limit=5, store="weaviate", **store_options):
     """
     Search documents using BM25 search (keyword-based)
     """
-    # Connect to Weaviate
-    client = weaviate.connect_to_local()
-    
+    # Connect to Weaviate (or open the local store)
+    store = open_store(store, **store_options)
+
     try:
         print(f"=== KEYWORD SEARCHING DOCUMENTS WITH QUERY: '{query_text}' ===")
-        
-        # Get the Document collection
-        collection = client.collections.get("Document")
-        
+
         # Use BM25 search
-        response = collection.query.bm25(
-            query=query_text,
-            limit=limit,
-            return_properties=["title", "content", "metadata"]
-        )
-        
-        # Get the objects from the response
-        results = response.objects
-        
-        if results:
-            print(f"\nFound {len(results)} results:")
-            
-            for i, result in enumerate(results):
-                print(f"\n== Result {i+1} ==")
-                print(f"Title: {result.properties.get('title')}")
-                if hasattr(result.metadata, 'score'):
-                    print(f"Score: {result.metadata.score}")
-                
-                # Parse metadata
-                try:
-                    metadata = json.loads(result.properties.get('metadata', '{}'))
-                    print(f"Component: {metadata.get('component')}")
-                    print(f"Version: {metadata.get('version')}")
-                except:
-                    print("Could not parse metadata")
-                
-                # Print content snippet
-                content = result.properties.get('content', '')
-                if len(content) > 200:
-                    print(f"Content snippet: {content[:200]}...")
-                else:
-                    print(f"Content: {content}")
-                
-                print("---")
-        else:
-            print("No results found")
-    
+        print_results(store.keyword_search(query_text, limit))
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        store.close()
+
+def hybrid_search(query_text, limit=5, fusion="weaviate", alpha=HYBRID_ALPHA, store="weaviate", **store_options):
+    """
+    Search documents with BM25 and vector search in one call: Weaviate's hybrid
+    query (alpha weights the vector leg) or client-side reciprocal rank fusion
+    """
+    print(f"=== HYBRID SEARCHING DOCUMENTS WITH QUERY: '{query_text}' ({fusion}) ===")
+
+    query_embedding, embed_ms = embed_query(query_text)
+
+    store = open_store(store, **store_options)
+
+    try:
+        items, legs = store_hybrid(store, query_text, query_embedding, limit, fusion, alpha)
+        print_items(items)
+        print(f"\nLatency: embedding {embed_ms} ms, " + ", ".join(f"{leg[:-3]} {ms} ms" for leg, ms in legs.items()))
+
     except Exception as e:
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
     finally:
-        client.close()
+        store.close()
+
+def read_queries(path):
+    """
+    (id, query) pairs from a file with one query per line, or JSON Lines objects
+    with "query" and an optional "id" (default: the line number); '-' reads stdin
+    """
+    file = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                yield record.get("id", number), record["query"]
+            else:
+                yield number, line
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))]
+
+def batch_search(queries_path, output_path="-", method="vector", limit=5, fusion="weaviate", alpha=HYBRID_ALPHA,
+                 concurrency=BATCH_CONCURRENCY, store="weaviate", **store_options):
+    """
+    Run every query of a file and stream one JSON line per query (id, query,
+    ms, ranked hits with IDs and distances/scores) to output_path ('-' = stdout),
+    in input order. Query vectors come from batched forward passes while the
+    searches of earlier queries are already running on `concurrency` threads.
+    Prints throughput and latency percentiles at the end.
+    """
+    queries = list(read_queries(queries_path))
+    embed_seconds = 0.0
+
+    def iter_vectors():
+        nonlocal embed_seconds
+        if method == "keyword":
+            yield from (None for _ in queries)
+            return
+        from embedding_engine import EmbeddingEngine
+        from embedding_cache import EmbeddingCache
+        vectors = EmbeddingEngine(cache=EmbeddingCache()).embed(query for _, query in queries)
+        while True:
+            start = time.perf_counter()
+            vector = next(vectors, None)
+            embed_seconds += time.perf_counter() - start
+            if vector is None:
+                return
+            yield vector.tolist()
+
+    def run(query_id, query_text, query_vector):
+        record = {"id": query_id, "query": query_text}
+        start = time.perf_counter()
+        try:
+            if method == "vector":
+                items = results_to_dicts(store.vector_search(query_vector, limit))
+            elif method == "keyword":
+                items = results_to_dicts(store.keyword_search(query_text, limit))
+            else:
+                items, _ = store_hybrid(store, query_text, query_vector, limit, fusion, alpha)
+            record["results"] = [{field: item[field] for field in BATCH_RESULT_FIELDS if item.get(field) is not None}
+                                 for item in items]
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return record
+
+    store = open_store(store, **store_options)
+    output = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    log = sys.stderr if output_path == "-" else sys.stdout
+    latencies = []
+    failed = 0
+
+    def write(record):
+        nonlocal failed
+        latencies.append(record["ms"])
+        failed += "error" in record
+        output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    start = time.perf_counter()
+    try:
+        # At most a few queries per thread wait for their turn, results are written in input order
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for (query_id, query_text), query_vector in zip(queries, iter_vectors()):
+                pending.append(pool.submit(run, query_id, query_text, query_vector))
+                while len(pending) >= concurrency * 4 or (pending and pending[0].done()):
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        store.close()
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{len(queries)} queries in {elapsed:.2f}s ({len(queries) / elapsed if elapsed else 0:.1f} queries/s, "
+          f"embedding {embed_seconds:.2f}s, {concurrency} threads), {failed} failed", file=log)
+    print("Search latency: " + ", ".join(f"p{p} {percentile(latencies, p)} ms" for p in (50, 95, 99)), file=log)
+    return failed
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Search Weaviate documents")
-    parser.add_argument("query", help="Query text for search")
+    parser.add_argument("query", nargs="?", help="Query text for search")
+    parser.add_argument("--queries-file",
+                        help="Batch mode: file with one query per line or JSON Lines {\"query\", \"id\"} ('-' = stdin); "
+                             "results are written as JSON Lines")
+    parser.add_argument("--output", default="-", help="JSON Lines output of batch mode (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help=f"Searches in flight in batch mode (default: {BATCH_CONCURRENCY})")
     parser.add_argument("--limit", type=int, default=5, help="Maximum number of results (default: 5)")
-    parser.add_argument("--method", choices=["vector", "keyword"], default="vector", 
-                        help="Search method: vector (semantic) or keyword (BM25)")
-    
+    parser.add_argument("--method", choices=["vector", "keyword", "hybrid"], default="vector",
+                        help="Search method: vector (semantic), keyword (BM25) or hybrid (both, fused)")
+    parser.add_argument("--fusion", choices=FUSIONS, default="weaviate",
+                        help="Hybrid fusion: weaviate (server-side hybrid query) or rrf "
+                             "(client-side reciprocal rank fusion of concurrent legs) (default: weaviate)")
+    parser.add_argument("--store", choices=STORE_BACKENDS, default="weaviate",
+                        help="Search the Weaviate service or the in-process local store (default: weaviate)")
+    parser.add_argument("--store-dir", default=DEFAULT_STORE_DIR, help="Directory of the local store (default: %(default)s)")
+    parser.add_argument("--alpha", type=float, default=HYBRID_ALPHA,
+                        help=f"Weight of the vector leg in weaviate fusion, 0 = BM25 only, 1 = vector only "
+                             f"(default: {HYBRID_ALPHA})")
+    parser.add_argument("--metrics",
+                        help="Record spans and counters to this file: *.prom for Prometheus text, else JSON lines")
+
     args = parser.parse_args()
-    
-    if args.method == "vector":
-        vector_search(args.query, args.limit)
+    if not args.query and not args.queries_file:
+        parser.error("a query or --queries-file is required")
+    if args.metrics:
+        configure_metrics(args.metrics)
+    store_options = {"store": args.store}
+    if args.store == "local":
+        store_options["store_dir"] = args.store_dir
+
+    if args.queries_file:
+        failed = batch_search(args.queries_file, args.output, args.method, args.limit, args.fusion, args.alpha,
+                              args.concurrency, **store_options)
+        sys.exit(1 if failed else 0)
+    elif args.method == "vector":
+        vector_search(args.query, args.limit, **store_options)
+    elif args.method == "hybrid":
+        hybrid_search(args.query, args.limit, args.fusion, args.alpha, **store_options)
     else:
-        keyword_search(args.query, args.limit)
\ No newline at end of file
+        keyword_search(args.query, args.limit, **store_options)
@@ -1,109 +1,102 @@
-import weaviate
 import json
 import argparse
-from transformers import AutoTokenizer, AutoModel
-import torch
-
-def generate_embedding(text, model, tokenizer):
-    """Generate embedding for text using the provided model"""
-    inputs = tokenizer(text, return_tensors='pt', truncation=True, 
-                      padding=True, max_length=512)
-    
-    with torch.no_grad():
-        outputs = model(**inputs)
-        embeddings = outputs.last_hidden_state.mean(dim=1).numpy()[0]
-    
-    return embeddings.tolist()
-
-def simple_search(query_text, limit=5):
+import time
+from keyword_index import KeywordIndex, DEFAULT_INDEX_PATH, STORED_PROPERTIES, open_existing_index
+
+def rebuild_index(index_path=DEFAULT_INDEX_PATH):
     """
-    A very simple search that retrieves all documents and ranks them by keyword matching
+    Build the keyword index from every chunk stored in Weaviate (needed once for
+    collections loaded before the index existed; ingestion keeps it up to date)
     """
-    print(f"=== SIMPLE SEARCHING DOCUMENTS WITH QUERY: '{query_text}' ===")
-    
+    from weaviate_client import get_client
+    from document_schema import COLLECTION_NAME
+
+    print(f"=== REBUILDING KEYWORD INDEX {index_path} ===")
+
     # Connect to Weaviate
-    client = weaviate.connect_to_local()
-    
+    client = get_client()
+    index = KeywordIndex(index_path)
+
     try:
-        # Get the Document collection
-        collection = client.collections.get("Document")
-        
-        # Get all documents
-        all_docs = collection.query.fetch_objects(
-            limit=100,  # Adjust as needed
-            return_properties=["title", "content", "metadata"]
-        )
-        
-        if not all_docs.objects:
-            print("No documents found in collection")
+        collection = client.collections.get(COLLECTION_NAME)
+        start = time.perf_counter()
+        index.clear()
+        # The iterator pages through the whole collection, not only the first 100 objects
+        objects = ({"uuid": obj.uuid, "properties": obj.properties}
+                   for obj in collection.iterator(return_properties=STORED_PROPERTIES))
+        for _ in index.indexing(objects):
+            pass
+        print(f"✅ Indexed {len(index)} chunks in {time.perf_counter() - start:.1f}s")
+
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        index.close()
+
+def simple_search(query_text, limit=5, index_path=DEFAULT_INDEX_PATH):
+    """
+    Keyword search over the persisted inverted index: BM25 over the posting
+    lists of the query terms only, no Weaviate round trip. Without an index
+    file the query goes to Weaviate's BM25 instead; the file is not created
+    here, since ingestion would then keep updating an index missing the
+    rest of the corpus.
+    """
+    print(f"=== SIMPLE SEARCHING DOCUMENTS WITH QUERY: '{query_text}' ===")
+
+    index = open_existing_index(index_path)
+
+    try:
+        start = time.perf_counter()
+        if index is None:
+            print(f"No keyword index at {index_path} (build it with --rebuild), using Weaviate BM25")
+            top_results = weaviate_bm25(query_text, limit)
+            print(f"Searched Weaviate in {(time.perf_counter() - start) * 1000:.2f} ms")
+        elif not len(index):
+            print("Keyword index is empty, build it with --rebuild (or load documents with embed_and_store2weaviate.py)")
             return
-        
-        print(f"Retrieved {len(all_docs.objects)} documents for processing")
-        
-        # Simple keyword matching
-        query_terms = query_text.lower().split()
-        results = []
-        
-        for doc in all_docs.objects:
-            content = doc.properties.get('content', '').lower()
-            title = doc.properties.get('title', '').lower()
-            
-            # Count term occurrences
-            term_matches = {}
-            for term in query_terms:
-                content_count = content.count(term)
-                title_count = title.count(term) * 2  # Title matches count double
-                term_matches[term] = content_count + title_count
-            
-            # Calculate score based on term frequency
-            total_matches = sum(term_matches.values())
-            matched_terms = sum(1 for count in term_matches.values() if count > 0)
-            
-            # Score is a combination of total matches and term coverage
-            score = total_matches * (matched_terms / len(query_terms) if query_terms else 0)
-            
-            results.append({
-                'doc': doc,
-                'score': score,
-                'matched_terms': matched_terms,
-                'total_matches': total_matches
-            })
-        
-        # Sort by score
-        results.sort(key=lambda x: x['score'], reverse=True)
-        
-        # Take top results
-        top_results = results[:limit]
-        
+        else:
+            top_results = index.search(query_text, limit)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f"Searched {len(index)} chunks in {elapsed_ms:.2f} ms")
+
+        query_terms = list(dict.fromkeys(query_text.lower().split()))
+
         if top_results:
             print(f"\nFound {len(top_results)} results:")
-            
+
             for i, result in enumerate(top_results):
-                doc = result['doc']
                 print(f"\n== Result {i+1} ==")
-                print(f"Title: {doc.properties.get('title')}")
-                print(f"Score: {result['score']:.2f} (matched {result['matched_terms']}/{len(query_terms)} terms, {result['total_matches']} occurrences)")
-                
+                print(f"Title: {result.properties.get('title')}")
+                if result.properties.get('section'):
+                    print(f"Section: {result.properties.get('section')}")
+                matched_terms = getattr(result, "matched_terms", [])
+                if matched_terms:
+                    print(f"Score: {result.metadata.score:.2f} (matched {', '.join(matched_terms)})")
+                else:
+                    print(f"Score: {result.metadata.score:.2f}")
+
                 # Parse metadata
                 try:
-                    metadata = json.loads(doc.properties.get('metadata', '{}'))
-                    print(f"Component: {metadata.get('component')}")
-                    print(f"Version: {metadata.get('version')}")
-                except:
+                    metadata = json.loads(result.properties.get('metadata') or '{}')
+                    print(f"Component: {result.properties.get('component') or metadata.get('component')}")
+                    print(f"Version: {result.properties.get('version') or metadata.get('version')}")
+                except ValueError:
                     print("Could not parse metadata")
-                
+
                 # Print content snippet with highlighted terms
-                content = doc.properties.get('content', '')
-                
+                content = result.properties.get('content') or ''
+
                 # Find a relevant snippet (first paragraph with query terms)
                 paragraphs = content.split('\n\n')
                 relevant_paragraph = None
-                
+
                 for para in paragraphs:
-                    if any(term.lower() in para.lower() for term in query_terms):
+                    if any(term in para.lower() for term in query_terms + matched_terms):
                         relevant_paragraph = para
                         break
-                
+
                 if relevant_paragraph:
                     if len(relevant_paragraph) > 200:
                         print(f"Content snippet: {relevant_paragraph[:200]}...")
@@ -114,22 +107,38 @@ def simple_search(query_text, limit=5):
                         print(f"Content snippet: {content[:200]}...")
                     else:
                         print(f"Content: {content}")
-                
+
                 print("---")
         else:
             print("No results found")
-    
+
     except Exception as e:
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
     finally:
-        client.close()
+        if index is not None:
+            index.close()
+
+def weaviate_bm25(query_text, limit):
+    """BM25 on the Weaviate collection, for when no local index has been built"""
+    from weaviate_client import get_client
+    from document_schema import COLLECTION_NAME
+    from search_weaviate_v4 import keyword_query
+
+    return keyword_query(get_client().collections.get(COLLECTION_NAME), query_text, limit)
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Simple search for Weaviate documents")
-    parser.add_argument("query", help="Query text for search")
+    parser = argparse.ArgumentParser(description="Simple keyword search over the persisted BM25 index")
+    parser.add_argument("query", nargs="?", help="Query text for search")
     parser.add_argument("--limit", type=int, default=5, help="Maximum number of results (default: 5)")
-    
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Keyword index file (default: %(default)s)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from the Weaviate collection first")
+
     args = parser.parse_args()
-    simple_search(args.query, args.limit)
\ No newline at end of file
+    if not args.query and not args.rebuild:
+        parser.error("a query is required unless --rebuild is given")
+    if args.rebuild:
+        rebuild_index(args.index)
+    if args.query:
+        simple_search(args.query, args.limit, args.index)
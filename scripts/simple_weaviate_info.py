@@ -1,11 +1,11 @@
-import weaviate
+from weaviate_client import get_client
 
 def print_weaviate_info():
     """
     A very simple Weaviate info printer using only public v4 API methods
     """
     # Connect to Weaviate
-    client = weaviate.connect_to_local()
+    client = get_client()
     
     try:
         print("=== WEAVIATE INFO ===")
@@ -49,8 +49,6 @@ def print_weaviate_info():
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
-    finally:
-        client.close()
 
 if __name__ == "__main__":
     print_weaviate_info()
\ No newline at end of file
@@ -0,0 +1,151 @@
+import re
+
+# Heading rules, tried in order on the left-stripped line; the first match wins.
+# Each rule: (level, pattern, markdown builder)
+HEADING_RULES = [
+    (1, re.compile(r'Спецификация\s*$'), lambda m, line: "# Спецификация"),
+    (2, re.compile(r'(?:Обзор|Коды ошибок|Приложение А)'), lambda m, line: "## " + line),
+    (2, re.compile(r'Компонент\s+\S'), lambda m, line: "## " + line),
+    (2, re.compile(r'Интерфейс\s+\S'), lambda m, line: "## " + line),
+    (2, re.compile(r'(?:Введение|Примечание|Ссылки)\s*$'), lambda m, line: "## " + line.rstrip()),
+    (3, re.compile(r'.+ описание на ECO IDL'), lambda m, line: "### " + line),
+    (4, re.compile(r'Функция\s+(.+)'), lambda m, line: "#### Функция " + m.group(1)),
+]
+
+# A bare "Функция" line is an empty placeholder in the source documents
+STUB_RE = re.compile(r'\s*Функция\s*$')
+
+VERSION_RE = re.compile(r'Версия:\s*(.+)')
+COMPONENT_RE = re.compile(r'Компонент\s+(.+)')
+AUTHOR_RE = re.compile(r'Автор:\s*(.+)')
+DATE_RE = re.compile(r'Дата:\s*(.+)')
+OVERVIEW_RE = re.compile(r'Обзор\s*(.*)')
+
+
+def classify_line(line):
+    """Return (level, markdown heading) for a heading line, or (0, None) for body text"""
+    stripped = line.lstrip()
+    for level, pattern, build in HEADING_RULES:
+        match = pattern.match(stripped)
+        if match:
+            return level, build(match, stripped)
+    return 0, None
+
+
+class _Metadata:
+    """Collects the metadata fields line by line, keeping the first match of each"""
+
+    def __init__(self):
+        self.fields = {"title": "", "version": "", "component": "", "overview": "", "author": "", "date": ""}
+        self._overview = None  # None: not started, list: collecting, False: done
+
+    def feed(self, line):
+        fields = self.fields
+        if not fields["title"] and "Спецификация" in line:
+            fields["title"] = "Спецификация"
+        for name, pattern in (("version", VERSION_RE), ("component", COMPONENT_RE),
+                              ("author", AUTHOR_RE), ("date", DATE_RE)):
+            if not fields[name]:
+                match = pattern.search(line)
+                if match:
+                    fields[name] = match.group(1).strip()
+        self._feed_overview(line)
+
+    def _feed_overview(self, line):
+        # Overview: text after the first "Обзор" up to the next line that starts
+        # with a non-space character (blank and indented lines continue it)
+        if self._overview is None:
+            match = OVERVIEW_RE.search(line)
+            if match:
+                self._overview = [match.group(1)] if match.group(1).strip() else []
+        elif self._overview is not False:
+            if not self._overview:
+                if line.strip():
+                    self._overview.append(line.lstrip())
+            elif not line or line[0].isspace():
+                self._overview.append(line)
+            else:
+                self.fields["overview"] = '\n'.join(self._overview).strip()
+                self._overview = False
+
+    def result(self):
+        if self._overview:
+            self.fields["overview"] = '\n'.join(self._overview).strip()
+        return self.fields
+
+
+def structure_text(content):
+    """
+    Single pass over the lines of a plain-text specification.
+
+    Every line is classified once: headings become markdown (#, ##, ###,
+    #### Функция) and lose the blank lines in front of them, runs of empty
+    lines are collapsed to one, bare "Функция" placeholders are dropped and
+    the metadata fields are collected on the way.
+
+    Returns (markdown, metadata, sections) where sections is the heading tree:
+    dicts with level, title, start and end byte offsets into the UTF-8 encoded
+    markdown, and children.
+    """
+    out = []
+    metadata = _Metadata()
+    root = {"level": 0, "title": "", "start": 0, "end": 0, "children": []}
+    stack = [root]
+    offset = 0
+    blanks = []
+    skip_blanks = False
+
+    def emit(line):
+        nonlocal offset
+        out.append(line)
+        metadata.feed(line)
+        offset += len(line.encode('utf-8')) + 1
+
+    for line in content.split('\n'):
+        if STUB_RE.match(line):
+            continue
+        if not line.strip():
+            # Held back: dropped before a heading, collapsed otherwise
+            if not skip_blanks:
+                blanks.append(line)
+            continue
+        skip_blanks = False
+
+        level, heading = classify_line(line)
+        if level:
+            blanks = []
+            while stack[-1]["level"] >= level:
+                stack.pop()["end"] = offset
+            node = {"level": level, "title": heading.lstrip('# '), "start": offset, "end": None, "children": []}
+            stack[-1]["children"].append(node)
+            stack.append(node)
+            emit(heading)
+            # The document title also swallows the blank lines after it
+            skip_blanks = level == 1
+            continue
+
+        _flush_blanks(blanks, out, emit)
+        blanks = []
+        emit(line)
+
+    _flush_blanks(blanks, out, emit)
+    markdown = '\n'.join(out)
+    end = len(markdown.encode('utf-8'))
+    while stack:
+        stack.pop()["end"] = end
+    return markdown, metadata.result(), root["children"]
+
+
+def _flush_blanks(blanks, out, emit):
+    for line in blanks:
+        # "\n{3,}" -> "\n\n": never two empty lines in a row
+        if line == "" and out and out[-1] == "":
+            continue
+        emit(line)
+
+
+def iter_sections(sections):
+    """Depth-first walk over a section tree"""
+    for section in sections:
+        yield section
+        yield from iter_sections(section["children"])
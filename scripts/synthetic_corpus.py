@@ -0,0 +1,197 @@
+import argparse
+import os
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+# Synthetic specifications shaped like Files/text_files/Eco*_RU.txt: title block,
+# overview, component, interfaces with their ECO IDL functions and an error code table.
+# Every document is generated from (seed, index) alone, so any corpus size is
+# reproducible and can be streamed without keeping it in memory.
+
+SUBJECTS = ["DateTime", "Log", "Socket", "File", "Timer", "Queue", "Memory", "String", "Crypto", "Thread",
+            "Mutex", "Event", "Registry", "Stream", "Buffer", "Parser", "Json", "Xml", "Http", "Matrix",
+            "Vector", "List", "Map", "Set", "Heap", "Pipe", "Signal", "Process", "Module", "Path"]
+VERBS = ["get", "set", "Create", "Open", "Close", "Read", "Write", "Append", "Remove", "Find", "Lock",
+         "Unlock", "Reset", "Clone", "Compare", "Copy", "Parse", "Format", "Send", "Receive", "Wait", "Start"]
+NOUNS = ["Value", "Name", "Size", "Count", "Item", "Buffer", "Handle", "State", "Mode", "Options", "Pattern",
+         "Position", "Length", "Timeout", "Address", "Data", "Flags", "Format", "Level", "Path"]
+# Function descriptions, filled with an object word and a qualifier
+DESCRIPTIONS = [
+    "Функция возвращает {obj} {qual}.",
+    "Функция задает {obj} {qual}.",
+    "Функция создает новый {obj} и возвращает указатель на него.",
+    "Функция освобождает {obj}, выделенный ранее {qual}.",
+    "Функция проверяет, что {obj} {qual}, и возвращает результат сравнения.",
+    "Функция преобразует {obj} в эквивалентное ему строковое представление {qual}.",
+    "Функция извлекает {obj} из внутреннего буфера {qual}.",
+    "Функция блокирует {obj} до завершения операции {qual}.",
+    "Функция отправляет {obj} {qual} и возвращает число переданных байтов.",
+    "Функция получает {obj} {qual} без установления соединения.",
+]
+OBJECTS = ["объект", "буфер", "дескриптор", "параметр", "элемент", "адрес сокета", "текущее значение",
+           "идентификатор", "заголовок сообщения", "массив структур", "поток данных", "системное время"]
+QUALIFIERS = ["для текущего компонента", "с использованием указанных сведений о форматировании",
+              "в указанную структуру", "данного компьютера", "в соответствии с заданными параметрами",
+              "без изменения исходного объекта", "в кодировке UTF-8", "для вызывающего потока",
+              "с учетом региональных параметров", "в пределах заданного интервала ожидания"]
+ERRORS = [("ERR_ECO_SUCCESES", "0x00000000", "Операция выполнена успешно"),
+          ("ERR_ECO_POINTER", "0x80004003", "Недопустимый указатель"),
+          ("ERR_ECO_OUTOFMEMORY", "0x8007000E", "Недостаточно памяти"),
+          ("ERR_ECO_INVALIDARG", "0x80070057", "Неверный аргумент"),
+          ("ERR_ECO_NOINTERFACE", "0x80004002", "Интерфейс не поддерживается"),
+          ("ERR_ECO_UNEXPECTED", "0x8000FFFF", "Непредвиденная ошибка"),
+          ("ERR_ECO_TIMEOUT", "0x800705B4", "Истекло время ожидания"),
+          ("ERR_ECO_ACCESSDENIED", "0x80070005", "Доступ запрещен"),
+          ("ERR_ECO_NOTIMPL", "0x80004001", "Функция не реализована")]
+MONTH_NAMES = ["Январь", "Февраль", "Март", "Апрель", "Май", "Июнь", "Июль", "Август", "Сентябрь",
+               "Октябрь", "Ноябрь", "Декабрь"]
+
+
+def component_name(index):
+    """Unique component name of document `index`: IEco + one or two subjects + a number"""
+    first = SUBJECTS[index % len(SUBJECTS)]
+    rest = index // len(SUBJECTS)
+    second = SUBJECTS[rest % len(SUBJECTS)] if rest else ""
+    return f"IEco{first}{second}{rest // len(SUBJECTS) + 1}"
+
+
+def function_name(rng):
+    verb = rng.choice(VERBS)
+    separator = "_" if verb in ("get", "set") else ""
+    return verb + separator + rng.choice(NOUNS)
+
+
+def generate_spec(index, seed=0):
+    """Plain text of synthetic specification number `index` (as convert_docx2text.py writes it)"""
+    rng = random.Random(seed * 1_000_003 + index)
+    name = component_name(index)
+    short = name[len("IEco"):]
+    lines = [
+        "Спецификация",
+        f"Компонент {name}",
+        "Статус: " + rng.choice(["Черновик", "Утверждено", "На согласовании"]),
+        f"Дата: {rng.choice(MONTH_NAMES)} {rng.randint(1, 28)}, {rng.randint(2015, 2025)}",
+        f"Версия: {rng.randint(1, 3)}.{rng.randint(0, 9)}",
+        "", "", "",
+        "Обзор",
+        f"Данный документ описывает требования к реализации компонента Eco.{short}.",
+        "Введение",
+        "Описание.",
+        "",
+        "Ссылки",
+        "Данный параграф содержит ссылки на информацию, помогающую понять данный документ: ",
+        "[] – наименование ссылки",
+        "Доступен по: http://адрес",
+        "",
+        f" Компонент Eco. {short}",
+        "",
+        "Компонент. ",
+        "Компонент, имеет следующие описание:",
+        "",
+    ]
+    for number in range(rng.randint(1, 3)):
+        interface = name if number == 0 else f"{name}{rng.choice(NOUNS)}"
+        lines += [f"Интерфейс {interface}", "", f"{interface} описание на ECO IDL", "", ""]
+        functions = dict.fromkeys(function_name(rng) for _ in range(rng.randint(3, 12)))
+        for function in functions:
+            lines += [f"Функция {function}", ""]
+            for _ in range(rng.randint(1, 3)):
+                lines.append(rng.choice(DESCRIPTIONS).format(obj=rng.choice(OBJECTS), qual=rng.choice(QUALIFIERS)))
+    lines += ["", "Коды ошибок", "", "Следующая таблица содержит коды ошибок.", "",
+              "Код ошибки\tЗначение\tОписание"]
+    lines += ["\t".join(row) for row in rng.sample(ERRORS, rng.randint(3, len(ERRORS)))]
+    lines += ["", "Приложение А: Обучающие программы", ""]
+    return "\n".join(lines)
+
+
+def iter_specs(count, seed=0):
+    """(file name, text) of the first `count` synthetic specifications"""
+    for index in range(count):
+        yield f"Eco{component_name(index)[len('IEco'):]}_RU.txt", generate_spec(index, seed)
+
+
+def generate_queries(count, documents, seed=0):
+    """Queries over a corpus of `documents` specs: component names, function names and phrases"""
+    rng = random.Random(seed + 7)
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.3:
+            queries.append(component_name(rng.randrange(documents)))
+        elif kind < 0.6:
+            queries.append(f"Функция {function_name(rng)}")
+        elif kind < 0.8:
+            queries.append(f"{rng.choice(OBJECTS)} {rng.choice(QUALIFIERS)}")
+        else:
+            queries.append(rng.choice(ERRORS)[rng.choice([0, 2])])
+    return queries
+
+
+def write_docx(text, path):
+    """
+    Minimal .docx of a specification: one paragraph per line, tab-separated
+    lines as table rows, which is what convert_docx2text.py turns back into text
+    """
+    w = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+    def paragraph(line):
+        return f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>'
+
+    body = []
+    rows = []
+    for line in text.split("\n") + [""]:
+        if "\t" in line:
+            cells = "".join(f"<w:tc>{paragraph(cell)}</w:tc>" for cell in line.split("\t"))
+            rows.append(f"<w:tr>{cells}</w:tr>")
+            continue
+        if rows:
+            body.append("<w:tbl>" + "".join(rows) + "</w:tbl>")
+            rows = []
+        body.append(paragraph(line))
+    body.pop()  # the sentinel line that closed a trailing table
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml",
+                         '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/'
+                         'package/2006/content-types"><Default Extension="rels" ContentType="application/'
+                         'vnd.openxmlformats-package.relationships+xml"/><Default Extension="xml" '
+                         'ContentType="application/xml"/><Override PartName="/word/document.xml" ContentType='
+                         '"application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+                         '</Types>')
+        archive.writestr("_rels/.rels",
+                         '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.openxmlformats'
+                         '.org/package/2006/relationships"><Relationship Id="rId1" Type="http://schemas.'
+                         'openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+                         'Target="word/document.xml"/></Relationships>')
+        archive.writestr("word/document.xml",
+                         f'<?xml version="1.0" encoding="UTF-8"?><w:document {w}><w:body>{"".join(body)}'
+                         f'</w:body></w:document>')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic corpus of Eco specifications")
+    parser.add_argument("--documents", type=int, default=1000, help="Number of specifications (default: 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed (default: 0)")
+    parser.add_argument("--format", choices=["txt", "docx", "jsonl"], default="txt",
+                        help="txt/docx files in --output, or one mapped JSON Lines file (default: txt)")
+    parser.add_argument("--output", default=os.path.normpath("../Files/synthetic"),
+                        help="Output directory, or file for jsonl (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.format == "jsonl":
+        from map_text2json import map_text
+        from mapping_io import DocumentWriter
+        with DocumentWriter(args.output) as writer:
+            for file_name, text in iter_specs(args.documents, args.seed):
+                writer.write(map_text(text, file_name))
+    else:
+        os.makedirs(args.output, exist_ok=True)
+        for file_name, text in iter_specs(args.documents, args.seed):
+            path = os.path.join(args.output, file_name)
+            if args.format == "docx":
+                write_docx(text, path.replace(".txt", ".docx"))
+            else:
+                with open(path, "w", encoding="utf-8") as file:
+                    file.write(text)
+    print(f"✅ {args.documents} synthetic specifications written to {args.output}")
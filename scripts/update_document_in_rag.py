@@ -1,144 +1,302 @@
-import weaviate
-import json
-import uuid
+from weaviate_client import get_client
+from weaviate.classes.query import Filter
+import argparse
+import itertools
+import os
 import sys
-from transformers import AutoTokenizer, AutoModel
-import torch
-
-def generate_embedding(text, model, tokenizer):
-    """Generate embedding for text using the provided model"""
-    inputs = tokenizer(text, return_tensors='pt', truncation=True, 
-                      padding=True, max_length=512)
-    
-    with torch.no_grad():
-        outputs = model(**inputs)
-        embeddings = outputs.last_hidden_state.mean(dim=1).numpy()[0]
-    
-    return embeddings.tolist()
+import time
+from datetime import datetime, timezone
+from embedding_engine import EmbeddingEngine
+from embedding_cache import EmbeddingCache
+from chunking import chunk_document, chunk_object, chunk_id, chunk_hash, MAX_TOKENS, OVERLAP_TOKENS
+from batch_import import batch_import
+from document_schema import COLLECTION_NAME, delete_stale_chunks
+from document_metadata import document_key, document_uuid
+from mapping_io import iter_documents
+from keyword_index import open_existing_index
+from metrics import count, configure as configure_metrics
 
-def update_document_in_rag(json_file_path, component_name=None):
+DOCUMENT_EXTENSIONS = (".json", ".jsonl", ".jsonl.zst")
+# Stored chunks are read in pages of this many objects (properties only)
+STORED_PAGE_SIZE = 1000
+# Weaviate rejects offset + limit beyond its QUERY_MAXIMUM_RESULTS (10000 by default)
+QUERY_MAXIMUM_RESULTS = 10000
+# Documents whose stored chunks are read by one filtered query
+KEYS_PER_QUERY = 20
+
+
+def iter_input_documents(paths):
     """
-    Update a document in the RAG system based on component name or create a new one if it doesn't exist
-    
-    Args:
-        json_file_path: Path to the JSON file with the updated document
-        component_name: Name of the component to update (if None, will be extracted from the JSON)
+    Changed documents from files (a JSON object, a JSON array or JSON Lines),
+    directories (every such file inside, in name order) and "-" (JSON Lines on stdin)
     """
-    # Load the document to update
-    try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            updated_doc = json.load(f)
-        
-        if not isinstance(updated_doc, dict):
-            if isinstance(updated_doc, list) and len(updated_doc) > 0:
-                updated_doc = updated_doc[0]  # Take the first document if it's a list
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(name for name in os.listdir(path) if name.endswith(DOCUMENT_EXTENSIONS))
+            for name in names:
+                yield from iter_documents(os.path.join(path, name))
+        else:
+            yield from iter_documents(path)
+
+
+def prepare_document(doc):
+    """Check one changed document and stamp its metadata; returns its document_key"""
+    if not isinstance(doc, dict) or not doc.get('content'):
+        raise ValueError("expected an object with 'content'")
+    metadata = doc.setdefault('metadata', {})
+    if not metadata.get('component') and not metadata.get('document_key'):
+        raise ValueError("component name not provided and not found in document metadata")
+    metadata['last_updated'] = datetime.now(timezone.utc).isoformat()
+    key = document_key(metadata)
+    metadata['document_key'] = key
+    doc['id'] = document_uuid(key)
+    return key
+
+
+def fetch_stored_chunks(collection, keys):
+    """
+    document_key -> {"revision": highest stored revision, "chunks": {uuid: (content_hash, chunk_index)}}
+    for the keys already in the collection. One filtered query per group of
+    keys (paged, without vectors or content); a group with more chunks than
+    one query can page through is split.
+    """
+    stored = {}
+    groups = [keys[i:i + KEYS_PER_QUERY] for i in range(0, len(keys), KEYS_PER_QUERY)]
+    while groups:
+        group = groups.pop()
+        objects = _fetch_chunks_of(collection, group)
+        if objects is None:
+            if len(group) == 1:
+                raise RuntimeError(f"{group[0]} has more than {QUERY_MAXIMUM_RESULTS} stored chunks")
+            groups += [group[:len(group) // 2], group[len(group) // 2:]]
+            continue
+        for obj in objects:
+            props = obj.properties
+            entry = stored.setdefault(props["document_key"], {"revision": 0, "chunks": {}})
+            entry["revision"] = max(entry["revision"], props.get("revision") or 0)
+            entry["chunks"][str(obj.uuid)] = (props.get("content_hash"), props.get("chunk_index"))
+    return stored
+
+
+def _fetch_chunks_of(collection, keys):
+    """Stored chunk objects of the keys, or None if they do not fit below QUERY_MAXIMUM_RESULTS"""
+    objects = []
+    while len(objects) + STORED_PAGE_SIZE <= QUERY_MAXIMUM_RESULTS:
+        response = collection.query.fetch_objects(
+            filters=Filter.by_property("document_key").contains_any(keys),
+            limit=STORED_PAGE_SIZE,
+            offset=len(objects),
+            return_properties=["document_key", "content_hash", "chunk_index", "revision"]
+        )
+        objects.extend(response.objects)
+        if len(response.objects) < STORED_PAGE_SIZE:
+            return objects
+    return None
+
+
+def fetch_stored_vectors(collection, ids):
+    """uuid -> stored vector for the chunk IDs, read by ID in pages (no properties)"""
+    vectors = {}
+    for i in range(0, len(ids), STORED_PAGE_SIZE):
+        page = ids[i:i + STORED_PAGE_SIZE]
+        response = collection.query.fetch_objects(filters=Filter.by_id().contains_any(page), limit=len(page),
+                                                  include_vector=True, return_properties=[])
+        for obj in response.objects:
+            vectors[str(obj.uuid)] = obj.vector["default"]
+    return vectors
+
+
+def update_documents(collection, engine, documents, keywords=None, max_tokens=MAX_TOKENS, overlap=OVERLAP_TOKENS):
+    """
+    Upsert changed documents in bulk as section-level deltas. The stored chunk
+    hashes of all documents are read first; only chunks that were added or
+    changed are embedded (in shared batches), chunks of removed sections are
+    deleted, and unchanged chunks of a document with a new revision are
+    rewritten with their stored vectors, all in one batch import, so every
+    object of a document has the same revision.
+    A keyword index, if given, is updated the same way. max_tokens and overlap
+    must be the chunking used at ingest, or every chunk boundary moves. Returns
+    one outcome dict per input document.
+    """
+    outcomes = []
+    pending = {}
+    for doc in documents:
+        try:
+            key = prepare_document(doc)
+        except ValueError as e:
+            outcomes.append({"key": None, "status": "invalid", "error": str(e)})
+            continue
+        if key in pending:
+            # The later version of a document wins
+            pending[key]["outcome"].update(status="duplicate", error="superseded by a later version in the input")
+        outcome = {"key": key, "component": doc['metadata'].get('component')}
+        outcomes.append(outcome)
+        pending[key] = {"doc": doc, "outcome": outcome}
+
+    stored = fetch_stored_chunks(collection, list(pending))
+    for key, item in pending.items():
+        doc, outcome = item["doc"], item["outcome"]
+        previous = stored.get(key, {"revision": 0, "chunks": {}})
+        chunks = chunk_document(doc['content'], count_tokens=engine.count_tokens, max_tokens=max_tokens,
+                                overlap=overlap)
+        item["chunk_ids"] = [chunk_id(doc, chunk) for chunk in chunks]
+        # Hashes leave out position, revision and timestamp, so they can be compared before those are set
+        item["changed"] = []
+        item["kept"] = []
+        moved = 0
+        for chunk, cid in zip(chunks, item["chunk_ids"]):
+            stored_hash, stored_index = previous["chunks"].get(cid, (None, None))
+            if stored_hash != chunk_hash(doc, chunk):
+                item["changed"].append(chunk)
             else:
-                print("Error: Invalid JSON format. Expected an object or array of objects.")
-                return
-    except Exception as e:
-        print(f"Error loading JSON file: {e}")
-        return
-    
-    # Extract component name if not provided
-    if component_name is None:
-        if 'metadata' in updated_doc and 'component' in updated_doc['metadata']:
-            component_name = updated_doc['metadata']['component']
+                item["kept"].append((cid, chunk))
+                moved += stored_index != chunk["chunk_index"]
+        removed = len(set(previous["chunks"]) - set(item["chunk_ids"]))
+        if key in stored and not item["changed"] and not moved and not removed:
+            outcome.update(status="unchanged", revision=previous["revision"])
+            item["kept"] = []
         else:
-            print("Error: Component name not provided and not found in document metadata")
-            return
-    
-    print(f"Updating document for component: {component_name}")
-    
-    # Load models for embedding
-    print("Loading embedding models...")
-    tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-    model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-    
-    # Connect to Weaviate
+            doc['metadata']['revision'] = previous["revision"] + 1
+            outcome.update(status="updated" if key in stored else "inserted", revision=previous["revision"] + 1)
+        outcome.update(chunks=len(chunks), removed=removed)
+        count("documents")
+        count("chunks", len(chunks))
+
+    # Unchanged chunks of a new revision are rewritten with their stored vectors, so every
+    # object of a document carries the same revision, last_updated and metadata
+    stored_vectors = fetch_stored_vectors(collection, [cid for item in pending.values() for cid, _ in item["kept"]])
+    for item in pending.values():
+        # A chunk deleted since its hash was read is embedded again
+        item["changed"] += [chunk for cid, chunk in item["kept"] if cid not in stored_vectors]
+        item["kept"] = [(cid, chunk) for cid, chunk in item["kept"] if cid in stored_vectors]
+        item["outcome"].update(written=len(item["changed"]), kept=len(item["kept"]))
+
+    def iter_chunks():
+        for item in pending.values():
+            for chunk in item["changed"]:
+                yield item["doc"], chunk
+
+    def iter_objects():
+        # One embedding stream for the changed chunks of all documents
+        chunks, texts = itertools.tee(iter_chunks())
+        vectors = engine.embed(chunk["text"] for _, chunk in texts)
+        for (doc, chunk), embedding in zip(chunks, vectors):
+            yield chunk_object(doc, chunk, embedding.tolist())
+        for item in pending.values():
+            for cid, chunk in item["kept"]:
+                yield chunk_object(item["doc"], chunk, stored_vectors[cid])
+
+    # One batch import for the written and the kept chunks
+    objects = iter_objects()
+    if keywords is not None:
+        objects = keywords.indexing(objects)
+    report = batch_import(collection, objects)
+    report.print_summary()
+    if keywords is not None:
+        # Indexed on the way in; objects Weaviate rejected must not stay searchable
+        keywords.delete_objects(error.object_.uuid for error in report.failed)
+
+    failed_keys = {}
+    for error in report.failed:
+        key = error.object_.properties.get("document_key")
+        failed_keys[key] = failed_keys.get(key, 0) + 1
+    for key, item in pending.items():
+        outcome = item["outcome"]
+        if key in failed_keys:
+            # Removed sections are kept until the update is repeated and succeeds
+            outcome.update(status="failed", error=f"{failed_keys[key]} chunks not stored")
+        elif outcome["removed"]:
+            delete_stale_chunks(collection, key, item["chunk_ids"])
+            if keywords is not None:
+                keywords.delete_stale_chunks(key, item["chunk_ids"])
+    return outcomes
+
+
+def print_report(outcomes, elapsed):
+    print(f"\n{'document_key':<32}{'status':<11}{'revision':>9}{'chunks':>8}{'written':>9}{'kept':>7}"
+          f"{'removed':>9}  note")
+    counts = {}
+    for outcome in outcomes:
+        counts[outcome['status']] = counts.get(outcome['status'], 0) + 1
+        print(f"{outcome['key'] or '-':<32}{outcome['status']:<11}{outcome.get('revision', '-'):>9}"
+              f"{outcome.get('chunks', '-'):>8}{outcome.get('written', '-'):>9}{outcome.get('kept', '-'):>7}"
+              f"{outcome.get('removed', '-'):>9}"
+              f"  {outcome.get('error', '')}")
+    print(f"\n{len(outcomes)} documents in {elapsed:.1f}s: " +
+          ", ".join(f"{count} {status}" for status, count in counts.items()))
+
+
+def update_in_rag(documents, max_tokens=MAX_TOKENS, overlap=OVERLAP_TOKENS):
+    """Load the engine and connect once, update all documents and print the per-document report"""
+    # The model itself is loaded only for text that is not in the embedding cache
+    print("Preparing embedding engine...")
+    engine = EmbeddingEngine(cache=EmbeddingCache())
+
     print("Connecting to Weaviate...")
-    client = weaviate.connect_to_local()
-    
+    client = get_client()
+    keywords = open_existing_index()
     try:
-        # Check if Document collection exists
-        collections = client.collections.list_all()
-        if "Document" not in collections:
+        if not client.collections.exists(COLLECTION_NAME):
             print("Error: Document collection not found in Weaviate")
-            return
-        
-        # Get the Document collection
-        collection = client.collections.get("Document")
-        
-        # Search for existing document with the same component
-        print(f"Searching for existing document with component: {component_name}")
-        
-        # Query to find documents with matching component in metadata
-        query_results = collection.query.fetch_objects(
-            limit=10  # Get multiple results to ensure we find the right one
-        )
-        
-        # Find the document with matching component
-        existing_doc = None
-        for obj in query_results.objects:
-            try:
-                # Parse metadata which is stored as a JSON string
-                metadata = json.loads(obj.properties.get('metadata', '{}'))
-                if metadata.get('component') == component_name:
-                    existing_doc = obj
-                    break
-            except:
-                continue
-        
-        # Generate embedding for the updated content
-        print("Generating embedding for updated content...")
-        embedding = generate_embedding(updated_doc['content'], model, tokenizer)
-        
-        if existing_doc:
-            # Update existing document
-            print(f"Updating existing document with UUID: {existing_doc.uuid}")
-            
-            # Update the document
-            collection.data.update(
-                uuid=existing_doc.uuid,
-                properties={
-                    "content": updated_doc['content'],
-                    "title": updated_doc['metadata'].get('title', ''),
-                    "metadata": json.dumps(updated_doc['metadata'], ensure_ascii=False)
-                },
-                vector=embedding  # Update the vector with new embedding
-            )
-            print("✅ Document updated successfully")
-        else:
-            # Create new document
-            print("No existing document found. Creating new document...")
-            
-            # Generate UUID if not provided
-            doc_uuid = updated_doc.get('id', str(uuid.uuid4()))
-            
-            # Insert new document
-            collection.data.insert(
-                uuid=doc_uuid,
-                properties={
-                    "content": updated_doc['content'],
-                    "title": updated_doc['metadata'].get('title', ''),
-                    "metadata": json.dumps(updated_doc['metadata'], ensure_ascii=False)
-                },
-                vector=embedding
-            )
-            print(f"✅ New document created with UUID: {doc_uuid}")
-        
+            return None
+        collection = client.collections.get(COLLECTION_NAME)
+
+        start = time.perf_counter()
+        outcomes = update_documents(collection, engine, documents, keywords, max_tokens, overlap)
+        print_report(outcomes, time.perf_counter() - start)
+        for outcome in outcomes:
+            if outcome["status"] in ("failed", "invalid"):
+                count("errors", stage="update")
+        return outcomes
     except Exception as e:
-        print(f"Error updating document: {e}")
+        print(f"Error updating documents: {e}")
         import traceback
         traceback.print_exc()
     finally:
-        client.close()
+        engine.cache.close()
+        if keywords is not None:
+            keywords.close()
+
+
+def update_document_in_rag(json_file_path, component_name=None):
+    """
+    Update a document in the RAG system based on component name or create a new one if it doesn't exist
+
+    Args:
+        json_file_path: Path to the JSON file with the updated document
+        component_name: Name of the component to update (if None, will be extracted from the JSON)
+    """
+    documents = list(iter_input_documents([json_file_path]))
+    if len(documents) != 1:
+        print(f"Error: expected one document, got {len(documents)}; pass the file without a component name")
+        return None
+    if component_name is not None:
+        documents[0].setdefault('metadata', {})['component'] = component_name
+    return update_in_rag(documents)
+
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python update_document_in_rag.py <json_file_path> [component_name]")
+    parser = argparse.ArgumentParser(
+        description="Update or insert changed documents in Weaviate: files, directories or JSON Lines on stdin")
+    parser.add_argument("paths", nargs="+",
+                        help="JSON object/array or JSON Lines files, directories of them, '-' for stdin")
+    parser.add_argument("--component", help="Component name of the document (single-document input only)")
+    parser.add_argument("--chunk-tokens", type=int, default=MAX_TOKENS,
+                        help=f"Token budget per section chunk, as used at ingest (default: {MAX_TOKENS})")
+    parser.add_argument("--chunk-overlap", type=int, default=OVERLAP_TOKENS,
+                        help=f"Tokens repeated between sub-split chunks, as used at ingest (default: {OVERLAP_TOKENS})")
+    parser.add_argument("--metrics", help="Record spans and counters to this file: *.prom for Prometheus text, else JSON lines")
+    args = parser.parse_args()
+    if args.metrics:
+        configure_metrics(args.metrics)
+
+    documents = list(iter_input_documents(args.paths))
+    if args.component is not None:
+        if len(documents) != 1:
+            print("Error: --component needs exactly one input document")
+            sys.exit(1)
+        documents[0].setdefault('metadata', {})['component'] = args.component
+
+    outcomes = update_in_rag(documents, args.chunk_tokens, args.chunk_overlap)
+    if not outcomes or any(outcome['status'] in ("failed", "invalid") for outcome in outcomes):
         sys.exit(1)
-    
-    json_file_path = sys.argv[1]
-    component_name = sys.argv[2] if len(sys.argv) > 2 else None
-    
-    update_document_in_rag(json_file_path, component_name)
\ No newline at end of file
@@ -1,4 +1,4 @@
-import weaviate
+from weaviate_client import get_client
 import json
 import uuid
 from datetime import datetime
@@ -20,7 +20,7 @@ def update_rag_document(updated_doc_path, collection_name="Documentation"):
     document_key = f"{component}_spec"  # Create a stable identifier
     
     # 3. Connect to vector database
-    client = weaviate.connect_to_local()
+    client = get_client()
     collection = client.collections.get(collection_name)
     
     # 4. Check if document exists
@@ -0,0 +1,295 @@
+import argparse
+import json
+import random
+import time
+import numpy as np
+
+# Vector compression of the HNSW index: product, binary or scalar quantization.
+# Vectors in memory shrink to one byte per segment (pq), one bit per dimension
+# (bq) or one byte per dimension (sq) instead of four bytes per dimension; the
+# full vectors stay on disk and rescore the top candidates (bq/sq: rescore limit).
+COMPRESSIONS = ("none", "pq", "bq", "sq")
+# Objects per page when the report scans the stored vectors
+SCAN_PAGE = 5000
+RECALL_K = 10
+REPORT_QUERIES = 200
+# Seed of the stored vectors sampled as queries, so reports of two collections compare like with like
+REPORT_SEED = 0
+
+
+def vector_index_config(compression="none", training_limit=None, rescore_limit=None, segments=None, cache=None,
+                        vector_cache_max_objects=None):
+    """
+    HNSW index settings for a new collection. training_limit: objects collected
+    before the pq/sq codebook is trained and compression starts; rescore_limit:
+    candidates rescored with the full vectors (bq, sq); segments: pq codes per
+    vector (must divide the dimensions); cache: keep the compressed vectors in
+    memory; vector_cache_max_objects: vectors held in the in-memory cache.
+    None leaves the server default.
+    """
+    from weaviate.classes.config import Configure
+
+    if compression == "pq":
+        quantizer = Configure.VectorIndex.Quantizer.pq(segments=segments, training_limit=training_limit, cache=cache)
+    elif compression == "bq":
+        quantizer = Configure.VectorIndex.Quantizer.bq(rescore_limit=rescore_limit, cache=cache)
+    elif compression == "sq":
+        quantizer = Configure.VectorIndex.Quantizer.sq(rescore_limit=rescore_limit, training_limit=training_limit,
+                                                       cache=cache)
+    elif compression == "none":
+        quantizer = None
+    else:
+        raise ValueError(f"Unknown vector compression: {compression}. Expected one of {COMPRESSIONS}")
+    return Configure.VectorIndex.hnsw(quantizer=quantizer, vector_cache_max_objects=vector_cache_max_objects)
+
+
+def add_compression_arguments(parser):
+    """--compression and its settings, for scripts that create the collection"""
+    group = parser.add_argument_group("vector compression (applied when the collection is created)")
+    group.add_argument("--compression", choices=COMPRESSIONS, default="none",
+                       help="Quantization of the HNSW vectors: product, binary or scalar (default: none)")
+    group.add_argument("--training-limit", type=int,
+                       help="pq/sq: objects collected before the codebook is trained (server default: 100000)")
+    group.add_argument("--rescore-limit", type=int,
+                       help="bq/sq: candidates rescored with the uncompressed vectors (server default)")
+    group.add_argument("--pq-segments", type=int,
+                       help="pq: codes per vector, must divide the vector dimensions (server default)")
+    group.add_argument("--compression-cache", action=argparse.BooleanOptionalAction,
+                       help="Keep the compressed vectors in memory (server default)")
+    group.add_argument("--vector-cache-max-objects", type=int,
+                       help="Vectors held in the in-memory cache (server default)")
+
+
+def vector_index_from_args(args):
+    return vector_index_config(args.compression, args.training_limit, args.rescore_limit, args.pq_segments,
+                               args.compression_cache, args.vector_cache_max_objects)
+
+
+def quantizer_name(vector_index):
+    """"pq", "bq", "sq" or "none" for the vector index config of an existing collection"""
+    quantizer = getattr(vector_index, "quantizer", None)
+    if quantizer is None:
+        return "none"
+    # _PQConfig, _BQConfig, _SQConfig
+    return type(quantizer).__name__.strip("_").lower().replace("config", "")
+
+
+def vector_bytes(compression, dimensions, segments=None):
+    """Bytes one vector takes in memory, None when pq segments are left to the server"""
+    if compression == "pq":
+        # 256 centroids per segment: one byte per code
+        return segments or None
+    if compression == "bq":
+        return -(-dimensions // 64) * 8
+    if compression == "sq":
+        return dimensions
+    return dimensions * 4
+
+
+def similarity(queries, vectors, metric):
+    """Query x vector scores where higher is closer, for the collection's distance metric"""
+    if metric == "cosine":
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return queries @ vectors.T
+    if metric == "dot":
+        return queries @ vectors.T
+    if metric == "l2-squared":
+        return 2 * queries @ vectors.T - (vectors ** 2).sum(axis=1) - (queries ** 2).sum(axis=1, keepdims=True)
+    raise ValueError(f"Exact search does not support the {metric} distance")
+
+
+def exact_neighbours(collection, queries, k, metric):
+    """
+    Uncompressed ground truth: the k nearest object IDs per query vector by
+    brute force over every stored vector, scanned page by page so memory
+    stays at one page plus k candidates per query
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    if metric == "cosine":
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), 0), dtype=np.int64)
+    ids = []
+    page = []
+
+    def merge():
+        nonlocal best_scores, best_ids
+        scores = np.concatenate([best_scores, similarity(queries, np.asarray(page, dtype=np.float32), metric)], 1)
+        positions = np.arange(len(ids) - len(page), len(ids))
+        candidates = np.concatenate([best_ids, np.broadcast_to(positions, (len(queries), len(page)))], 1)
+        top = np.argpartition(-scores, min(k, scores.shape[1]) - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, top, 1)
+        best_ids = np.take_along_axis(candidates, top, 1)
+        page.clear()
+
+    for obj in collection.iterator(include_vector=True, return_properties=[]):
+        ids.append(str(obj.uuid))
+        page.append(obj.vector["default"])
+        if len(page) >= SCAN_PAGE:
+            merge()
+    if page:
+        merge()
+
+    order = np.argsort(-best_scores, axis=1)
+    return [[ids[i] for i in row] for row in np.take_along_axis(best_ids, order, 1)], len(ids)
+
+
+def compressed_neighbours(collection, queries, k):
+    """The k nearest object IDs per query from the collection's own (compressed) index, plus latencies in ms"""
+    results, latencies = [], []
+    for vector in queries:
+        start = time.perf_counter()
+        response = collection.query.near_vector(near_vector=list(map(float, vector)), limit=k, return_properties=[])
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([str(obj.uuid) for obj in response.objects])
+    return results, latencies
+
+
+def recall_at_k(found, expected, exclude, k):
+    """Mean share of the exact top k found, leaving out each query's own object"""
+    recalls = []
+    for found_ids, expected_ids, own_id in zip(found, expected, exclude):
+        found_ids = [i for i in found_ids if i != own_id][:k]
+        expected_ids = [i for i in expected_ids if i != own_id][:k]
+        if expected_ids:
+            recalls.append(len(set(found_ids) & set(expected_ids)) / len(expected_ids))
+    return float(np.mean(recalls)) if recalls else None
+
+
+def sample_queries(collection, count, seed=REPORT_SEED):
+    """
+    Stored vectors used as queries, with their own IDs (left out of the recall):
+    a seeded uniform sample (reservoir sampling over an ID-only scan), since the
+    first objects by ID cluster in whatever documents happen to hash low
+    """
+    from weaviate.classes.query import Filter
+
+    rng = random.Random(seed)
+    sample = []
+    for seen, obj in enumerate(collection.iterator(return_properties=[])):
+        if seen < count:
+            sample.append(obj.uuid)
+        else:
+            slot = rng.randrange(seen + 1)
+            if slot < count:
+                sample[slot] = obj.uuid
+    if not sample:
+        return [], []
+    response = collection.query.fetch_objects(filters=Filter.by_id().contains_any(sample), limit=len(sample),
+                                              include_vector=True, return_properties=[])
+    objects = sorted(response.objects, key=lambda obj: str(obj.uuid))
+    return [obj.vector["default"] for obj in objects], [str(obj.uuid) for obj in objects]
+
+
+def embed_queries(path):
+    """Query texts from a file (see search_weaviate_v4.read_queries) embedded with the ingestion model"""
+    from search_weaviate_v4 import read_queries
+    from embedding_engine import EmbeddingEngine
+
+    texts = [query for _, query in read_queries(path)]
+    return [vector.tolist() for vector in EmbeddingEngine().embed(texts)], [None] * len(texts)
+
+
+def compression_report(client, collection_name, k=RECALL_K, queries=REPORT_QUERIES, queries_file=None,
+                       seed=REPORT_SEED):
+    """
+    Memory taken by the vectors with and without the collection's compression,
+    and recall@k of its index against exact uncompressed search over the same
+    stored vectors. The recall loss includes the HNSW approximation itself.
+    """
+    collection = client.collections.get(collection_name)
+    vector_index = collection.config.get().vector_index_config
+    compression = quantizer_name(vector_index)
+    metric = vector_index.distance_metric.value
+
+    if queries_file:
+        query_vectors, own_ids = embed_queries(queries_file)
+    else:
+        query_vectors, own_ids = sample_queries(collection, queries, seed)
+    if not query_vectors:
+        raise ValueError(f"No queries: {collection_name} is empty")
+    dimensions = len(query_vectors[0])
+    # One extra neighbour so that a query's own object can be left out
+    fetch = k + (0 if queries_file else 1)
+
+    start = time.perf_counter()
+    expected, objects = exact_neighbours(collection, query_vectors, fetch, metric)
+    exact_seconds = time.perf_counter() - start
+    found, latencies = compressed_neighbours(collection, query_vectors, fetch)
+
+    shards = [shard for node in client.cluster.nodes(collection=collection_name, output="verbose")
+              for shard in node.shards or []]
+    full = vector_bytes("none", dimensions) * objects
+    compressed = vector_bytes(compression, dimensions, getattr(vector_index.quantizer, "segments", None))
+    compressed = compressed * objects if compressed else None
+    return {
+        "collection": collection_name,
+        "objects": objects,
+        "dimensions": dimensions,
+        "distance": metric,
+        "compression": compression,
+        "quantizer": {key: str(value) for key, value in vars(vector_index.quantizer).items()}
+                     if vector_index.quantizer else {},
+        # pq/sq only compress once the training limit is reached
+        "compressed_shards": f"{sum(bool(getattr(shard, 'compressed', False)) for shard in shards)}/{len(shards)}",
+        "vector_memory_bytes": full,
+        "compressed_memory_bytes": compressed,
+        "memory_saved": round(1 - compressed / full, 4) if compressed and full else None,
+        "k": k,
+        "queries": len(query_vectors),
+        "recall_at_k": recall_at_k(found, expected, own_ids, k),
+        "query_p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "query_p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "exact_scan_seconds": round(exact_seconds, 2),
+    }
+
+
+def print_report(report):
+    mb = 1024 * 1024
+    print(f"=== VECTOR COMPRESSION: {report['collection']} ===")
+    print(f"Objects: {report['objects']}, {report['dimensions']} dimensions, {report['distance']} distance")
+    settings = ", ".join(f"{key}={value}" for key, value in report["quantizer"].items())
+    print(f"Compression: {report['compression']}" + (f" ({settings})" if settings else ""))
+    print(f"Compressed shards: {report['compressed_shards']}")
+    print(f"Vectors in memory, uncompressed: {report['vector_memory_bytes'] / mb:.1f} MB")
+    if report["compression"] == "none":
+        print("ℹ️ The collection is not compressed, recall shows the HNSW approximation alone")
+    elif report["compressed_memory_bytes"] is None:
+        print("ℹ️ Compressed size unknown: pq segments are chosen by the server")
+    else:
+        print(f"Vectors in memory, compressed: {report['compressed_memory_bytes'] / mb:.1f} MB "
+              f"(saved {report['memory_saved'] * 100:.1f}%; the HNSW graph itself is not compressed)")
+    if report["recall_at_k"] is None:
+        # Every sampled query was the collection's only object
+        print(f"Recall@{report['k']}: not measurable, no query has neighbours besides itself")
+    else:
+        print(f"Recall@{report['k']} vs exact uncompressed search: {report['recall_at_k']:.4f} "
+              f"(lost {(1 - report['recall_at_k']) * 100:.2f}%) over {report['queries']} queries")
+    print(f"Query latency: p50 {report['query_p50_ms']} ms, p95 {report['query_p95_ms']} ms "
+          f"(exact scan: {report['exact_scan_seconds']} s)")
+
+
+if __name__ == "__main__":
+    from document_schema import COLLECTION_NAME
+    from weaviate_client import get_client
+
+    parser = argparse.ArgumentParser(
+        description="Report the vector memory saved by a collection's compression and the recall@k it loses "
+                    "against exact uncompressed search over the same vectors")
+    parser.add_argument("--collection", default=COLLECTION_NAME, help="Collection (default: %(default)s)")
+    parser.add_argument("--k", type=int, default=RECALL_K, help=f"Neighbours compared (default: {RECALL_K})")
+    parser.add_argument("--queries", type=int, default=REPORT_QUERIES,
+                        help=f"Stored vectors used as queries (default: {REPORT_QUERIES})")
+    parser.add_argument("--seed", type=int, default=REPORT_SEED,
+                        help=f"Seed of the stored vectors sampled as queries (default: {REPORT_SEED})")
+    parser.add_argument("--queries-file",
+                        help="Query texts (one per line or JSON Lines) to embed instead of stored vectors")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = compression_report(get_client(), args.collection, args.k, args.queries, args.queries_file,
+                                args.seed)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
@@ -0,0 +1,347 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+from batch_import import BatchReport
+from metrics import span, count
+
+# Storage backends for chunk objects: the Weaviate Document collection, or an
+# in-process store that needs no service (edge deployments, CI benchmarks)
+STORE_BACKENDS = ("weaviate", "local")
+
+DEFAULT_STORE_DIR = os.path.normpath("../Files/vector_store")
+INITIAL_ROWS = 1024
+# Rows multiplied per matrix product in brute-force search, bounds the temporary score memory
+SEARCH_BLOCK_ROWS = 65536
+# Below this many objects brute force beats building and querying a graph
+HNSW_MIN_ROWS = 50_000
+
+
+class SearchHit:
+    """One search result, shaped like a Weaviate result object (uuid, properties, metadata)"""
+
+    class Metadata:
+        def __init__(self, distance=None, score=None):
+            self.distance = distance
+            self.score = score
+            self.explain_score = None
+
+    def __init__(self, uuid, properties, distance=None, score=None):
+        self.uuid = uuid
+        self.properties = properties
+        self.metadata = SearchHit.Metadata(distance, score)
+
+
+class VectorStore(ABC):
+    """
+    Storage backend interface used by the ingest and search scripts.
+
+    Objects are the batch objects of chunking.chunk_object: dicts with "uuid",
+    "properties" and "vector". Search methods return objects with .uuid,
+    .properties and .metadata.distance / .metadata.score.
+    """
+
+    name = None
+
+    @abstractmethod
+    def import_objects(self, objects, **options):
+        """Upsert objects by UUID; returns a batch_import.BatchReport"""
+
+    @abstractmethod
+    def delete_stale_chunks(self, key, chunk_ids):
+        """Delete objects of document_key `key` that are not in chunk_ids; returns the number deleted"""
+
+    @abstractmethod
+    def vector_search(self, vector, limit=5):
+        """Nearest objects to a query vector"""
+
+    @abstractmethod
+    def keyword_search(self, text, limit=5):
+        """BM25 top-k for a query text"""
+
+    def close(self):
+        pass
+
+
+class WeaviateStore(VectorStore):
+    """The Weaviate Document collection (needs the service from docker-compose.yml)"""
+
+    name = "weaviate"
+
+    def __init__(self, client=None, create=False, collection_name=None, vector_index=None):
+        from document_schema import ensure_document_collection, COLLECTION_NAME
+
+        self._client = client
+        self.collection_name = collection_name or COLLECTION_NAME
+        if create:
+            ensure_document_collection(self.client, self.collection_name, vector_index)
+
+    @property
+    def client(self):
+        """The client passed in, else the process-wide shared one (it stays open after close())"""
+        from weaviate_client import get_client
+        # Asked for on every use so a reconnect of the shared client reaches long-lived stores
+        return self._client or get_client()
+
+    @property
+    def collection(self):
+        return self.client.collections.get(self.collection_name)
+
+    def import_objects(self, objects, **options):
+        from batch_import import batch_import
+        return batch_import(self.collection, objects, **options)
+
+    def delete_stale_chunks(self, key, chunk_ids):
+        from document_schema import delete_stale_chunks
+        return delete_stale_chunks(self.collection, key, chunk_ids)
+
+    def vector_search(self, vector, limit=5):
+        from search_weaviate_v4 import vector_query
+        return vector_query(self.collection, vector, limit)
+
+    def keyword_search(self, text, limit=5):
+        from search_weaviate_v4 import keyword_query
+        return keyword_query(self.collection, text, limit)
+
+
+class LocalStore(VectorStore):
+    """
+    In-process store: zero network hops and a cold start of one file open.
+
+    Vectors are L2-normalized rows of a memory-mapped matrix (vectors.bin,
+    float32 or float16); objects.sqlite maps every object UUID to its row,
+    document_key and properties. Search is exact: cosine distance from
+    vectorized matrix products over the live rows. For large stores an
+    optional HNSW graph (hnswlib) can be built with build_hnsw(). Keyword
+    search uses the BM25 index in keyword.sqlite, kept in step with the objects.
+    """
+
+    name = "local"
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR, dtype="float32"):
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self._lock = threading.Lock()
+        self._vectors_path = os.path.join(store_dir, "vectors.bin")
+        self._hnsw_path = os.path.join(store_dir, "hnsw.bin")
+        self._db = sqlite3.connect(os.path.join(store_dir, "objects.sqlite"), check_same_thread=False)
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS objects (uuid TEXT PRIMARY KEY, row INTEGER UNIQUE,
+                                                document_key TEXT, properties TEXT);
+            CREATE INDEX IF NOT EXISTS objects_document_key ON objects (document_key);
+            CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY);
+        ''')
+        meta = dict(self._db.execute("SELECT name, value FROM meta"))
+        # An existing store keeps the dtype it was created with
+        self.dtype = np.dtype(meta.get("dtype", dtype))
+        self.dim = int(meta["dim"]) if "dim" in meta else None
+        self._capacity = int(meta.get("capacity", 0))
+        self._next_row = int(meta.get("next_row", 0))
+        # Bumped on every write, an HNSW graph built for an older version is not used
+        self._version = int(meta.get("version", 0))
+        self._vectors = None
+        self._live = np.zeros(self._capacity, dtype=bool)
+        self._hnsw = None
+        # Imported here: keyword_index itself imports SearchHit from this module
+        from keyword_index import KeywordIndex
+        self._keywords = KeywordIndex(os.path.join(store_dir, "keyword.sqlite"))
+        if self.dim:
+            self._open_vectors()
+            rows = [row for (row,) in self._db.execute("SELECT row FROM objects")]
+            self._live[rows] = True
+
+    def __len__(self):
+        return int(self._live.sum())
+
+    def import_objects(self, objects, batch_size=500, **options):
+        """Upsert objects in transactions of batch_size; Weaviate batch options are ignored"""
+        report = BatchReport(self.name, batch_size)
+        start = time.perf_counter()
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                with span("insert", store="local"):
+                    self._write(batch)
+                report.sent += len(batch)
+                batch = []
+        if batch:
+            with span("insert", store="local"):
+                self._write(batch)
+            report.sent += len(batch)
+        report.elapsed = time.perf_counter() - start
+        count("objects_inserted", report.sent, store="local")
+        return report
+
+    def delete_stale_chunks(self, key, chunk_ids):
+        keep = set(str(chunk_id) for chunk_id in chunk_ids)
+        with self._lock:
+            rows = self._db.execute("SELECT uuid, row FROM objects WHERE document_key = ?", (key,)).fetchall()
+            stale = [(uuid, row) for uuid, row in rows if uuid not in keep]
+            self._release(stale)
+        self._keywords.delete_stale_chunks(key, chunk_ids)
+        return len(stale)
+
+    def vector_search(self, vector, limit=5):
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        with self._lock, span("query", method="vector", store="local"):
+            if not self.dim or not self._live.any():
+                return []
+            if self._hnsw_ready():
+                rows, similarities = self._hnsw_search(query, limit)
+            else:
+                rows, similarities = self._exact_search(query, limit)
+            return [self._hit(row, distance=max(0.0, float(1.0 - similarity)))
+                    for row, similarity in zip(rows, similarities)]
+
+    def keyword_search(self, text, limit=5):
+        with span("query", method="keyword", store="local"):
+            return self._keywords.search(text, limit)
+
+    def build_hnsw(self, m=16, ef_construction=200):
+        """Build (or rebuild) the optional HNSW graph over the live rows; needs `pip install hnswlib`"""
+        try:
+            import hnswlib
+        except ImportError:
+            raise RuntimeError("HNSW search needs the 'hnswlib' package (pip install hnswlib)")
+        with self._lock:
+            rows = np.flatnonzero(self._live)
+            index = hnswlib.Index(space='ip', dim=self.dim)
+            index.init_index(max_elements=max(len(rows), 1), ef_construction=ef_construction, M=m)
+            for start in range(0, len(rows), SEARCH_BLOCK_ROWS):
+                part = rows[start:start + SEARCH_BLOCK_ROWS]
+                index.add_items(np.asarray(self._vectors[part], dtype=np.float32), part)
+            index.save_index(self._hnsw_path)
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('hnsw_version', ?)", (str(self._version),))
+            self._db.commit()
+            self._hnsw = index
+        return len(rows)
+
+    def close(self):
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._db.close()
+        self._keywords.close()
+
+    def _write(self, objects):
+        with self._lock:
+            if self.dim is None:
+                self.dim = len(objects[0]["vector"])
+                self._db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                                     [("dim", str(self.dim)), ("dtype", self.dtype.name)])
+                self._grow(INITIAL_ROWS)
+            for obj in objects:
+                uuid = str(obj["uuid"])
+                vector = np.asarray(obj["vector"], dtype=np.float32)
+                existing = self._db.execute("SELECT row FROM objects WHERE uuid = ?", (uuid,)).fetchone()
+                row = existing[0] if existing else self._allocate_row()
+                self._vectors[row] = vector / (np.linalg.norm(vector) or 1.0)
+                self._live[row] = True
+                properties = obj["properties"]
+                self._db.execute("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?)",
+                                 (uuid, row, properties.get("document_key"),
+                                  json.dumps(properties, ensure_ascii=False)))
+            self._vectors.flush()
+            self._commit_write()
+        self._keywords.add_objects(objects)
+
+    def _release(self, objects):
+        if not objects:
+            return
+        self._db.executemany("DELETE FROM objects WHERE uuid = ?", [(uuid,) for uuid, _ in objects])
+        self._db.executemany("INSERT OR IGNORE INTO free_rows VALUES (?)", [(row,) for _, row in objects])
+        for _, row in objects:
+            self._live[row] = False
+        self._commit_write()
+
+    def _commit_write(self):
+        self._version += 1
+        self._db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                             [("next_row", str(self._next_row)), ("version", str(self._version))])
+        self._db.commit()
+
+    def _exact_search(self, query, limit):
+        live_rows = self._next_row
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, live_rows, SEARCH_BLOCK_ROWS):
+            end = min(start + SEARCH_BLOCK_ROWS, live_rows)
+            scores = np.asarray(self._vectors[start:end], dtype=np.float32) @ query
+            scores[~self._live[start:end]] = -np.inf
+            candidates = min(limit, end - start)
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            best_rows = np.concatenate([best_rows, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+        order = np.argsort(-best_scores)[:limit]
+        keep = np.isfinite(best_scores[order])
+        return best_rows[order][keep], best_scores[order][keep]
+
+    def _hnsw_ready(self):
+        """Use the graph only for large stores and only if it was built for the current data"""
+        if len(self) < HNSW_MIN_ROWS or not os.path.exists(self._hnsw_path):
+            return False
+        built = self._db.execute("SELECT value FROM meta WHERE name = 'hnsw_version'").fetchone()
+        if built is None or int(built[0]) != self._version:
+            return False
+        if self._hnsw is None:
+            try:
+                import hnswlib
+            except ImportError:
+                return False
+            self._hnsw = hnswlib.Index(space='ip', dim=self.dim)
+            self._hnsw.load_index(self._hnsw_path)
+        return True
+
+    def _hnsw_search(self, query, limit):
+        self._hnsw.set_ef(max(limit * 4, 64))
+        labels, distances = self._hnsw.knn_query(query, k=min(limit, len(self)))
+        # hnswlib's inner product distance is 1 - dot product
+        return labels[0], 1.0 - distances[0]
+
+    def _hit(self, row, distance):
+        uuid, properties = self._db.execute("SELECT uuid, properties FROM objects WHERE row = ?",
+                                            (int(row),)).fetchone()
+        return SearchHit(uuid, json.loads(properties), distance=distance)
+
+    def _allocate_row(self):
+        free = self._db.execute("SELECT row FROM free_rows LIMIT 1").fetchone()
+        if free is not None:
+            self._db.execute("DELETE FROM free_rows WHERE row = ?", free)
+            return free[0]
+        if self._next_row >= self._capacity:
+            self._grow(max(self._capacity * 2, INITIAL_ROWS))
+        row = self._next_row
+        self._next_row += 1
+        return row
+
+    def _grow(self, capacity):
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self._vectors_path, 'ab') as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        self._capacity = capacity
+        self._live = np.concatenate([self._live, np.zeros(capacity - len(self._live), dtype=bool)])
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('capacity', ?)", (str(capacity),))
+        self._open_vectors()
+
+    def _open_vectors(self):
+        self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode='r+',
+                                  shape=(self._capacity, self.dim))
+
+
+def open_store(backend="weaviate", **options):
+    """
+    Storage backend by name: "weaviate" (options: client, create, collection_name, vector_index)
+    or "local" (options: store_dir, dtype)
+    """
+    if backend == "weaviate":
+        return WeaviateStore(**options)
+    if backend == "local":
+        return LocalStore(**options)
+    raise ValueError(f"Unknown storage backend: {backend}. Expected one of {STORE_BACKENDS}")
@@ -0,0 +1,171 @@
+import asyncio
+import atexit
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Connection settings; the environment overrides the docker-compose.yml defaults
+DEFAULT_HOST = "localhost"
+DEFAULT_HTTP_PORT = 8080
+DEFAULT_GRPC_PORT = 50051
+# Seconds: connection setup, queries and batch inserts
+DEFAULT_TIMEOUTS = (30, 60, 120)
+CONNECT_RETRIES = 5
+# First retry delay in seconds, doubled (with jitter) on every further attempt
+RETRY_BACKOFF = 0.5
+# A client idle for longer than this is checked with a cheap liveness call before it is handed out
+HEALTH_CHECK_INTERVAL = 30
+
+
+class ClientConfig:
+    """Where and how to connect: host, ports, timeouts and retry policy"""
+
+    def __init__(self, host=DEFAULT_HOST, http_port=DEFAULT_HTTP_PORT, grpc_port=DEFAULT_GRPC_PORT,
+                 timeouts=DEFAULT_TIMEOUTS, retries=CONNECT_RETRIES, backoff=RETRY_BACKOFF,
+                 health_check_interval=HEALTH_CHECK_INTERVAL):
+        self.host = host
+        self.http_port = http_port
+        self.grpc_port = grpc_port
+        self.timeouts = timeouts
+        self.retries = retries
+        self.backoff = backoff
+        self.health_check_interval = health_check_interval
+
+    @classmethod
+    def from_env(cls):
+        """
+        WEAVIATE_HOST, WEAVIATE_HTTP_PORT, WEAVIATE_GRPC_PORT, WEAVIATE_RETRIES and
+        WEAVIATE_TIMEOUTS (seconds as "init,query,insert")
+        """
+        env = os.environ
+        timeouts = env.get("WEAVIATE_TIMEOUTS")
+        return cls(host=env.get("WEAVIATE_HOST", DEFAULT_HOST),
+                   http_port=int(env.get("WEAVIATE_HTTP_PORT", DEFAULT_HTTP_PORT)),
+                   grpc_port=int(env.get("WEAVIATE_GRPC_PORT", DEFAULT_GRPC_PORT)),
+                   timeouts=tuple(int(t) for t in timeouts.split(",")) if timeouts else DEFAULT_TIMEOUTS,
+                   retries=int(env.get("WEAVIATE_RETRIES", CONNECT_RETRIES)))
+
+    def connect_params(self):
+        """Keyword arguments for weaviate.connect_to_local / use_async_with_local"""
+        from weaviate.classes.init import AdditionalConfig, Timeout
+
+        init, query, insert = self.timeouts
+        return {"host": self.host, "port": self.http_port, "grpc_port": self.grpc_port,
+                "additional_config": AdditionalConfig(timeout=Timeout(init=init, query=query, insert=insert))}
+
+
+def with_retries(connect, config):
+    """Call connect() until it succeeds, sleeping with exponential backoff between failed attempts"""
+    for attempt in range(config.retries + 1):
+        try:
+            return connect()
+        except _retryable_errors() as e:
+            if attempt == config.retries:
+                raise
+            time.sleep(_retry_delay(config, attempt, e))
+
+
+async def with_retries_async(connect, config):
+    """with_retries for a coroutine function: await connect() until it succeeds"""
+    for attempt in range(config.retries + 1):
+        try:
+            return await connect()
+        except _retryable_errors() as e:
+            if attempt == config.retries:
+                raise
+            await asyncio.sleep(_retry_delay(config, attempt, e))
+
+
+def _retryable_errors():
+    from weaviate.exceptions import WeaviateStartUpError, WeaviateConnectionError
+    return WeaviateStartUpError, WeaviateConnectionError, OSError
+
+
+def _retry_delay(config, attempt, error):
+    delay = config.backoff * 2 ** attempt * random.uniform(0.8, 1.2)
+    print(f"Weaviate not reachable at {config.host}:{config.http_port} ({type(error).__name__}), "
+          f"retrying in {delay:.1f}s ({attempt + 1}/{config.retries})")
+    return delay
+
+
+class ClientManager:
+    """
+    Owns one long-lived Weaviate client per process. get() connects on first
+    use (with retries) and afterwards returns the same client, so scripts and
+    services pay the HTTP + gRPC handshake once. A client that has been idle
+    longer than the health check interval is probed with is_live() and
+    replaced when the probe fails. The v4 sync client is safe to share
+    between threads; creation and replacement are serialized by a lock.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or ClientConfig.from_env()
+        self._lock = threading.Lock()
+        self._client = None
+        self._last_used = 0.0
+
+    def get(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._client is not None and now - self._last_used > self.config.health_check_interval:
+                if not self._is_live():
+                    self._discard()
+            if self._client is None:
+                import weaviate
+                self._client = with_retries(lambda: weaviate.connect_to_local(**self.config.connect_params()),
+                                            self.config)
+            self._last_used = now
+            return self._client
+
+    def close(self):
+        with self._lock:
+            self._discard()
+
+    def _is_live(self):
+        try:
+            return self._client.is_live()
+        except Exception:
+            return False
+
+    def _discard(self):
+        if self._client is not None:
+            try:
+                self._client.close()
+            except Exception:
+                pass
+            self._client = None
+
+
+_manager = ClientManager()
+atexit.register(_manager.close)
+
+
+def get_client():
+    """The shared process-wide client; do not close it, it is closed at exit (or by close_client)"""
+    return _manager.get()
+
+
+@contextmanager
+def weaviate_client():
+    """The shared client for a with-block; the connection stays open for the next user"""
+    yield _manager.get()
+
+
+def close_client():
+    _manager.close()
+
+
+async def connect_async():
+    """
+    A new connected async client with the shared configuration and retry policy;
+    its owner closes it (await client.close())
+    """
+    import weaviate
+
+    async def connect():
+        client = weaviate.use_async_with_local(**_manager.config.connect_params())
+        await client.connect()
+        return client
+    return await with_retries_async(connect, _manager.config)
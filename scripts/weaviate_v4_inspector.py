@@ -1,4 +1,4 @@
-import weaviate
+from weaviate_client import get_client
 import json
 import sys
 
@@ -7,7 +7,7 @@ def inspect_weaviate():
     A Weaviate schema inspector that uses only the public v4 API
     """
     # Connect to Weaviate
-    client = weaviate.connect_to_local()
+    client = get_client()
     
     try:
         print("=== WEAVIATE V4 SCHEMA INSPECTOR ===")
@@ -121,8 +121,6 @@ def inspect_weaviate():
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
-    finally:
-        client.close()
 
 if __name__ == "__main__":
     inspect_weaviate()
\ No newline at end of file
@@ -0,0 +1,82 @@
+from chunking import chunk_document, chunk_hash, chunk_id, count_words, split_sections
+
+CONTENT = """# Спецификация
+## Компонент IEcoDateTime1
+Версия: 1.0
+## Интерфейс IEcoDateTime1
+### IEcoDateTime1 описание на ECO IDL
+#### Функция Now
+Возвращает текущие дату и время.
+#### Функция Clone
+Создаёт копию объекта."""
+
+
+def document(content=CONTENT, **metadata):
+    return {"id": "doc-1", "content": content,
+            "metadata": {"component": "IEcoDateTime1", "version": "1.0", **metadata}}
+
+
+def test_split_sections_tracks_heading_path():
+    sections = split_sections(CONTENT)
+    now = next(section for section in sections if section["heading"] == "#### Функция Now")
+    assert now["path"] == ["Спецификация", "Интерфейс IEcoDateTime1", "IEcoDateTime1 описание на ECO IDL",
+                           "Функция Now"]
+    assert now["body"] == "Возвращает текущие дату и время."
+
+
+def test_one_chunk_per_section_with_empty_headings_folded():
+    chunks = chunk_document(CONTENT)
+    assert [chunk["section"].split(" / ")[-1] for chunk in chunks] == [
+        "Компонент IEcoDateTime1", "Функция Now", "Функция Clone"]
+    # "# Спецификация" has no body and is prepended to the next section
+    assert chunks[0]["text"].startswith("# Спецификация\n## Компонент IEcoDateTime1")
+    assert [chunk["chunk_index"] for chunk in chunks] == [0, 1, 2]
+
+
+def test_long_section_is_split_within_budget_with_overlap():
+    body = "\n".join(f"строка {i}" + " слово" * 8 for i in range(40))
+    chunks = chunk_document(f"#### Функция Parse\n{body}", max_tokens=50, overlap=5)
+    assert len(chunks) > 1
+    assert [chunk["part"] for chunk in chunks] == list(range(len(chunks)))
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert count_words(chunk["text"]) <= 50
+        # Every piece repeats the heading and starts with the tail of the previous one
+        assert chunk["text"].startswith("#### Функция Parse\n")
+        tail = chunk["text"].split("\n")[1]
+        assert 0 < len(tail.split()) <= 5
+        assert previous["text"].split()[-len(tail.split()):] == tail.split()
+
+
+def test_over_long_line_is_split_on_words():
+    chunks = chunk_document("## Обзор\n" + "слово " * 100, max_tokens=30, overlap=0)
+    assert all(count_words(chunk["text"]) <= 30 for chunk in chunks)
+    assert sum(count_words(chunk["text"]) - 2 for chunk in chunks) == 100
+
+
+def test_ids_and_hashes_are_stable_across_unrelated_edits():
+    doc = document()
+    edited = document(CONTENT.replace("Создаёт копию объекта.", "Создаёт глубокую копию объекта."))
+    before = {chunk["section"]: chunk for chunk in chunk_document(doc["content"])}
+    after = {chunk["section"]: chunk for chunk in chunk_document(edited["content"])}
+    assert before.keys() == after.keys()
+    for section in before:
+        assert chunk_id(doc, before[section]) == chunk_id(edited, after[section])
+        same = chunk_hash(doc, before[section]) == chunk_hash(edited, after[section])
+        assert same == (not section.endswith("Функция Clone"))
+
+
+def test_inserted_section_keeps_other_ids_and_hashes():
+    doc = document()
+    edited = document(CONTENT.replace("#### Функция Clone", "#### Функция Today\nДата без времени.\n"
+                                                            "#### Функция Clone"))
+    before = {chunk_id(doc, chunk): chunk_hash(doc, chunk) for chunk in chunk_document(doc["content"])}
+    after = {chunk_id(edited, chunk): chunk_hash(edited, chunk) for chunk in chunk_document(edited["content"])}
+    assert len(after) == len(before) + 1
+    assert all(after[cid] == digest for cid, digest in before.items())
+
+
+def test_hash_ignores_revision_and_timestamp_but_not_metadata():
+    chunk = chunk_document(CONTENT)[1]
+    base = chunk_hash(document(), chunk)
+    assert chunk_hash(document(revision=3, last_updated="2026-01-01T00:00:00+00:00"), chunk) == base
+    assert chunk_hash(document(version="2.0"), chunk) != base
@@ -0,0 +1,46 @@
+import zipfile
+
+from convert_docx2text import iter_docx_blocks
+
+NAMESPACES = ('xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+              'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+              'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+              'xmlns:v="urn:schemas-microsoft-com:vml"')
+
+
+def paragraph(*runs):
+    return "<w:p>" + "".join(runs) + "</w:p>"
+
+
+def run(text):
+    return f"<w:r><w:t>{text}</w:t></w:r>"
+
+
+def text_box(*paragraphs):
+    """A text box as Word writes it: DrawingML in mc:Choice, the same content as VML in mc:Fallback"""
+    content = "<w:txbxContent>" + "".join(paragraphs) + "</w:txbxContent>"
+    return ("<w:r><mc:AlternateContent>"
+            f"<mc:Choice Requires=\"wps\"><w:drawing><wps:txbx>{content}</wps:txbx></w:drawing></mc:Choice>"
+            f"<mc:Fallback><w:pict><v:textbox>{content}</v:textbox></w:pict></mc:Fallback>"
+            "</mc:AlternateContent></w:r>")
+
+
+def write_docx(path, body):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", f'<w:document {NAMESPACES}><w:body>{body}</w:body></w:document>')
+    return str(path)
+
+
+def test_paragraphs_and_table_rows_in_document_order(tmp_path):
+    body = (paragraph(run("Функция Now"))
+            + "<w:tbl><w:tr><w:tc>" + paragraph(run("Имя")) + "</w:tc><w:tc>" + paragraph(run("Тип"))
+            + "</w:tc></w:tr></w:tbl>"
+            + paragraph("<w:pPr><w:tabs><w:tab/></w:tabs></w:pPr>", run("a"), "<w:r><w:tab/></w:r>", run("b")))
+    assert list(iter_docx_blocks(write_docx(tmp_path / "spec.docx", body))) == ["Функция Now", "Имя\tТип", "a\tb"]
+
+
+def test_text_box_is_extracted_once_and_keeps_the_outer_paragraph(tmp_path):
+    body = (paragraph(run("До "), text_box(paragraph(run("Врезка 1")), paragraph(run("Врезка 2"))), run("после"))
+            + paragraph(run("Следующий абзац")))
+    blocks = list(iter_docx_blocks(write_docx(tmp_path / "spec.docx", body)))
+    assert blocks == ["Врезка 1", "Врезка 2", "До после", "Следующий абзац"]
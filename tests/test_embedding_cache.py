@@ -0,0 +1,64 @@
+import itertools
+import numpy as np
+import pytest
+from embedding_cache import EmbeddingCache, normalize_text
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Distinct last-used times, so the LRU order does not depend on the timer resolution
+    ticks = itertools.count(1)
+    monkeypatch.setattr("embedding_cache.time.time", lambda: float(next(ticks)))
+
+
+def vector(i, dim=4):
+    return np.full(dim, i, dtype=np.float32)
+
+
+def test_round_trip_and_stats(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    try:
+        cache.put_many([("a", vector(1)), ("b", vector(2))])
+        found = cache.get_many(["a", "b", "c"])
+        assert sorted(found) == ["a", "b"]
+        np.testing.assert_array_equal(found["b"], vector(2))
+        assert (cache.hits, cache.misses) == (2, 1)
+    finally:
+        cache.close()
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = EmbeddingCache(str(tmp_path), max_entries=20)
+    try:
+        for i in range(20):
+            cache.put_many([(f"k{i}", vector(i))])
+        # k0 is used again, so k1 is now the least recently used entry
+        cache.get_many(["k0"])
+        cache.put_many([("new", vector(99))])
+        assert len(cache) == 20
+        found = cache.get_many(["k0", "k1", "k2", "new"])
+        assert sorted(found) == ["k0", "k2", "new"]
+        # The freed row is reused: the new vector did not overwrite a live entry
+        np.testing.assert_array_equal(found["k2"], vector(2))
+        np.testing.assert_array_equal(found["new"], vector(99))
+    finally:
+        cache.close()
+
+
+def test_cache_persists_and_keeps_dtype(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dtype="float16")
+    cache.put_many([("a", vector(3))])
+    cache.close()
+    reopened = EmbeddingCache(str(tmp_path), dtype="float32")
+    try:
+        assert reopened.dtype == np.float16
+        np.testing.assert_array_equal(reopened.get_many(["a"])["a"], vector(3))
+    finally:
+        reopened.close()
+
+
+def test_key_ignores_whitespace_and_normalization_variants():
+    assert normalize_text("  Функция  Now\n") == "Функция Now"
+    key = EmbeddingCache.key("model", "rev", "mean", "Функция Now")
+    assert EmbeddingCache.key("model", "rev", "mean", "Функция   Now ") == key
+    assert EmbeddingCache.key("model", "rev2", "mean", "Функция Now") != key
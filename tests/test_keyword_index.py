@@ -0,0 +1,93 @@
+import pytest
+from keyword_index import KeywordIndex, open_existing_index, tokenize
+
+
+def chunk(uuid, content, title="Spec", key="EcoDateTime1", document_id="doc-1"):
+    return {"uuid": uuid, "properties": {"title": title, "content": content, "document_key": key,
+                                         "document_id": document_id}}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = KeywordIndex(str(tmp_path / "keyword.sqlite"))
+    yield index
+    index.close()
+
+
+def test_tokenize_splits_identifiers():
+    assert tokenize("IEcoDateTime1 функция") == ["iecodatetime1", "eco", "date", "time", "функция"]
+
+
+def test_bm25_ranks_by_term_frequency(index):
+    index.add_objects([
+        chunk("a", "дата дата дата время"),
+        chunk("b", "дата время время время"),
+        chunk("c", "строка символ"),
+    ])
+    hits = index.search("дата", limit=5)
+    assert [hit.uuid for hit in hits] == ["a", "b"]
+    assert hits[0].metadata.score > hits[1].metadata.score
+    assert hits[0].matched_terms == ["дата"]
+
+
+def test_rare_term_outweighs_common_term(index):
+    index.add_objects([chunk(str(i), "функция возвращает значение") for i in range(10)]
+                      + [chunk("rare", "функция GetDay")])
+    assert index.search("функция getday", limit=1)[0].uuid == "rare"
+
+
+def test_reindexing_replaces_postings(index):
+    index.add_objects([chunk("a", "старый текст")])
+    index.add_objects([chunk("a", "новый текст")])
+    assert len(index) == 1
+    assert index.search("старый") == []
+    assert [hit.uuid for hit in index.search("новый")] == ["a"]
+
+
+def test_duplicate_uuids_in_one_batch_keep_the_last(index):
+    # RU/EN variants of one component map to the same document_key and chunk uuids
+    index.add_objects([chunk("a", "первый вариант"), chunk("b", "другой"), chunk("a", "второй вариант")])
+    assert len(index) == 2
+    assert index.search("первый") == []
+    assert [hit.uuid for hit in index.search("второй")] == ["a"]
+
+
+def test_indexing_passes_objects_through(index):
+    objects = [chunk(str(i), f"текст {i}") for i in range(7)] + [chunk("0", "повтор")]
+    assert list(index.indexing(objects, batch_size=3)) == objects
+    assert len(index) == 7
+
+
+def test_delete_stale_chunks_and_documents(index):
+    index.add_objects([chunk("a", "дата"), chunk("b", "дата"), chunk("c", "дата", key="Other", document_id="doc-2")])
+    assert index.delete_stale_chunks("EcoDateTime1", ["a"]) == 1
+    assert sorted(hit.uuid for hit in index.search("дата")) == ["a", "c"]
+    index.delete_document("doc-2")
+    assert [hit.uuid for hit in index.search("дата")] == ["a"]
+    assert len(index) == 1
+
+
+def test_index_persists_counts(tmp_path):
+    path = str(tmp_path / "keyword.sqlite")
+    index = KeywordIndex(path)
+    index.add_objects([chunk("a", "дата время"), chunk("b", "строка")])
+    index.close()
+    reopened = KeywordIndex(path)
+    try:
+        assert len(reopened) == 2
+        assert [hit.uuid for hit in reopened.search("строка")] == ["b"]
+    finally:
+        reopened.close()
+
+
+def test_missing_index_is_not_created_by_opening(tmp_path):
+    path = tmp_path / "keyword.sqlite"
+    assert open_existing_index(str(path)) is None
+    assert not path.exists()
+
+
+def test_delete_objects_removes_only_the_given_uuids(index):
+    index.add_objects([chunk("a", "дата время"), chunk("b", "дата строка"), chunk("c", "символ")])
+    assert index.delete_objects(["b", "missing"]) == 1
+    assert [hit.uuid for hit in index.search("дата строка")] == ["a"]
+    assert len(index) == 2
@@ -0,0 +1,62 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+import search_server
+
+
+class FakeClient:
+    def __init__(self, ready=True):
+        self.ready = ready
+        self.calls = 0
+
+    def is_ready(self):
+        self.calls += 1
+        return self.ready
+
+
+@pytest.fixture
+def server():
+    # /health and /metrics only need the shared client, not the embedding model
+    server = ThreadingHTTPServer(("127.0.0.1", 0), search_server.make_handler(service=None))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url):
+    with urlopen(url, timeout=5) as response:
+        return response.status, json.loads(response.read())
+
+
+def test_health_reports_readiness_of_the_shared_client(server, monkeypatch):
+    client = FakeClient(ready=True)
+    monkeypatch.setattr(search_server, "get_client", lambda: client)
+    status, payload = get(f"{server}/health")
+    assert status == 200
+    assert payload["status"] == "ok" and payload["ready"] is True
+    assert client.calls == 1
+
+    client.ready = False
+    assert get(f"{server}/health")[1]["ready"] is False
+
+
+def test_health_returns_500_when_weaviate_is_unreachable(server, monkeypatch):
+    def unreachable():
+        raise ConnectionError("connection refused")
+    monkeypatch.setattr(search_server, "get_client", unreachable)
+    with pytest.raises(HTTPError) as error:
+        urlopen(f"{server}/health", timeout=5)
+    assert error.value.code == 500
+    assert json.loads(error.value.read())["error"] == "connection refused"
+
+
+def test_unknown_endpoint_is_404(server):
+    with pytest.raises(HTTPError) as error:
+        urlopen(f"{server}/nothing", timeout=5)
+    assert error.value.code == 404
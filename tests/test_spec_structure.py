@@ -0,0 +1,60 @@
+from spec_structure import classify_line, structure_text, iter_sections
+
+SPEC = """Спецификация
+Компонент IEcoDateTime1
+Дата: Ноябрь 8, 2021
+Версия: 1.0
+
+
+
+Обзор
+Данный документ описывает компонент.
+IEcoDateTime1 описание на ECO IDL
+
+
+Функция Now
+
+Возвращает текущее время.
+Функция
+Функция Clone
+Создаёт копию.
+Коды ошибок
+ERR_OK\t0"""
+
+
+def test_function_lines_become_level_four_headings():
+    assert classify_line("Функция get_SystemTime") == (4, "#### Функция get_SystemTime")
+    assert classify_line("  Функция Now") == (4, "#### Функция Now")
+    assert classify_line("Функция") == (0, None)
+    assert classify_line("Возвращает текущее время.") == (0, None)
+
+
+def test_structure_text_markdown():
+    markdown, _, _ = structure_text(SPEC)
+    lines = markdown.split("\n")
+    assert "#### Функция Now" in lines
+    assert "#### Функция Clone" in lines
+    # The bare placeholder is dropped and blank lines before headings are removed
+    assert "Функция" not in lines
+    assert lines[lines.index("#### Функция Clone") - 1] == "Возвращает текущее время."
+    assert "\n\n\n" not in markdown
+    assert lines[0] == "# Спецификация"
+
+
+def test_structure_text_metadata():
+    _, metadata, _ = structure_text(SPEC)
+    assert metadata["component"] == "IEcoDateTime1"
+    assert metadata["version"] == "1.0"
+    assert metadata["date"] == "Ноябрь 8, 2021"
+    assert metadata["overview"] == "Данный документ описывает компонент."
+
+
+def test_function_sections_nest_under_the_idl_section():
+    markdown, _, sections = structure_text(SPEC)
+    encoded = markdown.encode("utf-8")
+    by_title = {section["title"]: section for section in iter_sections(sections)}
+    idl = by_title["IEcoDateTime1 описание на ECO IDL"]
+    assert [child["title"] for child in idl["children"]] == ["Функция Now", "Функция Clone"]
+    now = by_title["Функция Now"]
+    assert encoded[now["start"]:now["end"]].decode("utf-8").strip() == "#### Функция Now\n\nВозвращает текущее время."
+    assert by_title["Коды ошибок"]["level"] == 2
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from vector_store import LocalStore, VectorStore
+
+
+def objects(vectors, key="EcoDateTime1", prefix="obj"):
+    return [{"uuid": f"{prefix}-{i}", "vector": vector.tolist(),
+             "properties": {"title": "Spec", "content": f"текст {i}", "document_key": key}}
+            for i, vector in enumerate(vectors)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalStore(str(tmp_path / "store"))
+    yield store
+    store.close()
+
+
+def brute_force(vectors, query, limit):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return [f"obj-{i}" for i in np.argsort(-scores)[:limit]]
+
+
+def test_exact_top_k_matches_brute_force(store, monkeypatch):
+    # Several search blocks, so the per-block top-k merge is exercised
+    monkeypatch.setattr("vector_store.SEARCH_BLOCK_ROWS", 128)
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((1500, 16)).astype(np.float32)
+    store.import_objects(objects(vectors), batch_size=400)
+    assert len(store) == 1500
+    for query in rng.standard_normal((20, 16)).astype(np.float32):
+        hits = store.vector_search(query.tolist(), limit=10)
+        assert [hit.uuid for hit in hits] == brute_force(vectors, query, 10)
+        distances = [hit.metadata.distance for hit in hits]
+        assert distances == sorted(distances)
+
+
+def test_upsert_and_stale_deletes(store):
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((10, 8)).astype(np.float32)
+    store.import_objects(objects(vectors))
+    # The same uuid written again replaces the object instead of adding a row
+    store.import_objects(objects(vectors[:3]))
+    assert len(store) == 10
+    assert store.delete_stale_chunks("EcoDateTime1", ["obj-0", "obj-1"]) == 8
+    assert len(store) == 2
+    hits = store.vector_search(vectors[5].tolist(), limit=5)
+    assert sorted(hit.uuid for hit in hits) == ["obj-0", "obj-1"]
+    assert store.keyword_search("текст", limit=5) and all(
+        hit.uuid in ("obj-0", "obj-1") for hit in store.keyword_search("текст", limit=5))
+
+
+def test_duplicate_uuids_in_one_batch(store):
+    rng = np.random.default_rng(2)
+    batch = objects(rng.standard_normal((3, 8)).astype(np.float32))
+    batch.append(dict(batch[0], properties=dict(batch[0]["properties"], content="последний")))
+    store.import_objects(batch)
+    assert len(store) == 3
+    assert [hit.uuid for hit in store.keyword_search("последний")] == ["obj-0"]
+
+
+def test_reopen_keeps_objects(tmp_path):
+    rng = np.random.default_rng(3)
+    vectors = rng.standard_normal((50, 8)).astype(np.float32)
+    store = LocalStore(str(tmp_path / "store"))
+    store.import_objects(objects(vectors))
+    store.delete_stale_chunks("EcoDateTime1", [f"obj-{i}" for i in range(40)])
+    store.close()
+    reopened = LocalStore(str(tmp_path / "store"))
+    try:
+        assert len(reopened) == 40
+        hits = reopened.vector_search(vectors[7].tolist(), limit=1)
+        assert hits[0].uuid == "obj-7"
+        assert hits[0].metadata.distance == pytest.approx(0.0, abs=1e-5)
+    finally:
+        reopened.close()
+
+
+def test_backend_must_implement_the_interface():
+    class PartialStore(VectorStore):
+        def import_objects(self, objects, **options):
+            pass
+
+    with pytest.raises(TypeError):
+        PartialStore()